@@ -4,13 +4,24 @@ Demo mode with optional OpenAI ChatGPT integration
 """
 import re
 import os
+import heapq
+import math
+import string
 from collections import Counter
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence
 import json
+import numpy as np
 import requests
 from bs4 import BeautifulSoup
-from news_scraper import analyze_news_metrics
+from news_scraper import analyze_news_metrics_async
+from resilience import get_breaker
+from llm_cache import LLM_CACHE, completion_key
+from llm_limiter import LLM_LIMITER, estimate_tokens
+
+# OpenAI-compatible API root; point at devtools/openai_stub.py for offline runs
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL', 'https://api.openai.com/v1').rstrip('/')
+INSIGHT_MODEL = "gpt-3.5-turbo"
 
 # ==========================================
 # SENTIMENT ANALYSIS KEYWORDS
@@ -37,16 +48,14 @@ NEGATIVE_KEYWORDS = [
 # ==========================================
 # SENTIMENT ANALYSIS
 # ==========================================
-def analyze_text_sentiment(text: str) -> Dict[str, Any]:
-    """Analyze sentiment of a single text"""
-    if not text:
-        return {"sentiment": "neutral", "score": 0.0}
-    
-    text_lower = text.lower()
-    
-    positive_count = sum(1 for word in POSITIVE_KEYWORDS if word in text_lower)
-    negative_count = sum(1 for word in NEGATIVE_KEYWORDS if word in text_lower)
-    
+# "token" matches whole words; "substring" reproduces the original scan where
+# e.g. "new" also matched inside "renewal"
+SENTIMENT_MATCH_MODE = os.environ.get('SENTIMENT_MATCH_MODE', 'token')
+
+_TOKEN_SEPARATORS = str.maketrans({c: " " for c in string.punctuation + string.digits})
+
+def sentiment_result(positive_count: int, negative_count: int) -> Dict[str, Any]:
+    """analyze_text_sentiment's result for the given keyword counts."""
     total = positive_count + negative_count
     if total == 0:
         return {"sentiment": "neutral", "score": 0.0}
@@ -67,46 +76,164 @@ def analyze_text_sentiment(text: str) -> Dict[str, Any]:
         "negative_keywords": negative_count
     }
 
+class SentimentBatch:
+    """Per-text keyword counts and scores for a batch, as NumPy vectors."""
+    def __init__(self, positive: np.ndarray, negative: np.ndarray):
+        self.positive = positive
+        self.negative = negative
+        total = positive + negative
+        self.raw_scores = np.divide(positive - negative, total, out=np.zeros(len(total)), where=total > 0)
+        # Same values analyze_text_sentiment reports
+        self.scores = np.round(self.raw_scores, 2)
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    @property
+    def labels(self) -> np.ndarray:
+        return np.where(self.raw_scores > 0.2, "positive", np.where(self.raw_scores < -0.2, "negative", "neutral"))
+
+    def mean_score(self) -> float:
+        return float(self.scores.mean()) if len(self) else 0.0
+
+    def result(self, i: int) -> Dict[str, Any]:
+        return sentiment_result(int(self.positive[i]), int(self.negative[i]))
+
+class SentimentScorer:
+    """
+    Counts the distinct positive/negative keywords in each text.
+    Token mode tokenizes once and intersects with frozensets; substring
+    mode keeps the original per-keyword `in` scan for compatibility.
+    """
+    def __init__(self, positive: List[str] = POSITIVE_KEYWORDS, negative: List[str] = NEGATIVE_KEYWORDS,
+                 mode: str = SENTIMENT_MATCH_MODE):
+        if mode not in ("token", "substring"):
+            raise ValueError(f"Unknown sentiment match mode: {mode}")
+        self.mode = mode
+        self.positive = frozenset(w.lower() for w in positive)
+        self.negative = frozenset(w.lower() for w in negative)
+        self._positive_list = list(self.positive)
+        self._negative_list = list(self.negative)
+
+    def counts(self, text: str) -> tuple:
+        if not text:
+            return 0, 0
+        text_lower = text.lower()
+        if self.mode == "substring":
+            return (sum(1 for word in self._positive_list if word in text_lower),
+                    sum(1 for word in self._negative_list if word in text_lower))
+        words = text_lower.translate(_TOKEN_SEPARATORS).split()
+        return len(self.positive.intersection(words)), len(self.negative.intersection(words))
+
+    def score_many(self, texts: List[str]) -> SentimentBatch:
+        """Score a whole batch of texts in one call."""
+        counts = self.counts
+        pairs = np.array([counts(text) for text in texts], dtype=np.int64).reshape(-1, 2)
+        return SentimentBatch(pairs[:, 0], pairs[:, 1])
+
+    def analyze(self, text: str) -> Dict[str, Any]:
+        return sentiment_result(*self.counts(text))
+
+SENTIMENT_SCORER = SentimentScorer()
+
+def analyze_text_sentiment(text: str) -> Dict[str, Any]:
+    """Analyze sentiment of a single text"""
+    return SENTIMENT_SCORER.analyze(text)
+
+def sentiment_summary(batch: SentimentBatch) -> Dict[str, Any]:
+    """Running-aggregate form of a batch: count, label tallies and score sum."""
+    labels = batch.labels
+    return {
+        "count": len(batch),
+        "positive": int((labels == "positive").sum()),
+        "negative": int((labels == "negative").sum()),
+        "neutral": int((labels == "neutral").sum()),
+        "scoreSum": float(batch.scores.sum()),
+    }
+
+def sentiment_increment(text: str) -> Dict[str, Any]:
+    """$inc update adding one text to a sentiment summary stored under `sentiment.`"""
+    result = analyze_text_sentiment(text)
+    return {
+        "sentiment.count": 1,
+        f"sentiment.{result['sentiment']}": 1,
+        "sentiment.scoreSum": result['score'],
+    }
+
+def overall_sentiment_from_summary(summary: Dict[str, Any]) -> tuple:
+    """(overall label, average score) from a sentiment summary."""
+    count = summary.get('count', 0)
+    if not count:
+        return "Neutral", 0.0
+    positive_count = summary.get('positive', 0)
+    negative_count = summary.get('negative', 0)
+    if positive_count > negative_count * 1.5:
+        overall_sentiment = "Positive"
+    elif negative_count > positive_count * 1.5:
+        overall_sentiment = "Negative"
+    else:
+        overall_sentiment = "Neutral"
+    return overall_sentiment, summary.get('scoreSum', 0.0) / count
+
+# ==========================================
+# KEYWORD EXTRACTION
+# ==========================================
+# Common words to exclude
+KEYWORD_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'is', 'was', 'are', 'were', 'been', 'be', 'have', 'has',
+    'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'this',
+    'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they'
+})
+KEYWORD_PATTERN = re.compile(r'\b[a-z]{3,}\b')
+
+def keyword_counts(text: str) -> Counter:
+    """Term frequencies of one text (lowercase words of 3+ letters, stop words removed)"""
+    return Counter(w for w in KEYWORD_PATTERN.findall(text.lower()) if w not in KEYWORD_STOP_WORDS)
+
 def extract_keywords(texts: List[str], top_n: int = 10) -> List[str]:
     """Extract top keywords from multiple texts"""
-    # Common words to exclude
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-                  'of', 'with', 'is', 'was', 'are', 'were', 'been', 'be', 'have', 'has',
-                  'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'this',
-                  'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they'}
-    
-    # Combine all texts
-    combined_text = ' '.join(texts).lower()
-    
-    # Extract words (alphanumeric only)
-    words = re.findall(r'\b[a-z]{3,}\b', combined_text)
-    
-    # Filter out stop words
-    filtered_words = [w for w in words if w not in stop_words]
-    
-    # Count frequencies
-    word_counts = Counter(filtered_words)
-    
-    # Return top N
+    word_counts = Counter()
+    for text in texts:
+        word_counts.update(keyword_counts(text))
     return [word for word, count in word_counts.most_common(top_n)]
 
+def top_keyword_candidates(term_counts: Dict[str, int], limit: int) -> Dict[str, int]:
+    """The `limit` most frequent terms (ties by term), the ones top_keywords_tfidf ranks"""
+    return dict(heapq.nsmallest(limit, term_counts.items(), key=lambda item: (-item[1], item[0])))
+
+def top_keywords_tfidf(term_counts: Dict[str, int], df: Dict[str, int], documents: int,
+                       top_n: int = 10) -> List[str]:
+    """
+    Top terms of a territory by TF-IDF: term count times smoothed inverse
+    document frequency across all posts/events in the city, so words used
+    everywhere rank below words that set this territory apart.
+    """
+    def score(item):
+        word, count = item
+        return count * (math.log((1 + documents) / (1 + df.get(word, 0))) + 1)
+    return [word for word, _ in heapq.nlargest(top_n, term_counts.items(), key=score)]
+
 # ==========================================
 # ACTIVITY TYPE ANALYSIS
 # ==========================================
 def analyze_activity_types(pins: List[Dict], posts: List[Dict], 
                            events: List[Dict], projects: List[Dict]) -> Dict[str, Any]:
     """Analyze dominant activity types in territory"""
-    
+    return activity_from_types([pin.get('type') for pin in pins], len(posts), len(events), len(projects))
+
+def activity_from_types(pin_type_lists: Sequence, total_posts: int, total_events: int,
+                        total_projects: int) -> Dict[str, Any]:
+    """analyze_activity_types over each pin's type (list or legacy string) and the content counts"""
     pin_types = {}
-    for pin in pins:
-        pin_type = pin.get('type', 'other')
-        pin_types[pin_type] = pin_types.get(pin_type, 0) + 1
+    for types in pin_type_lists:
+        # Pins carry a list of types; older documents stored a single string
+        types = types or ['other']
+        for pin_type in ([types] if isinstance(types, str) else types):
+            pin_types[pin_type] = pin_types.get(pin_type, 0) + 1
     
     # Calculate totals
-    total_pins = len(pins)
-    total_posts = len(posts)
-    total_events = len(events)
-    total_projects = len(projects)
+    total_pins = len(pin_type_lists)
     
     # Determine dominant activity
     activity_scores = {
@@ -135,58 +262,125 @@ def analyze_activity_types(pins: List[Dict], posts: List[Dict],
 # ==========================================
 # ENGAGEMENT ANALYSIS
 # ==========================================
+def safe_parse_date(date_val):
+    """Safely parse date string or datetime object"""
+    if isinstance(date_val, datetime):
+        # Ensure datetime is timezone-aware
+        if date_val.tzinfo is None:
+            return date_val.replace(tzinfo=timezone.utc)
+        return date_val
+    if isinstance(date_val, str):
+        try:
+            dt = datetime.fromisoformat(date_val.replace('Z', '+00:00'))
+            if dt.tzinfo is None:
+                return dt.replace(tzinfo=timezone.utc)
+            return dt
+        except (ValueError, TypeError):
+            return datetime(2020, 1, 1, tzinfo=timezone.utc)
+    return datetime(2020, 1, 1, tzinfo=timezone.utc)
+
 def analyze_engagement(posts: List[Dict], events: List[Dict], 
                        communities: List[Dict]) -> Dict[str, Any]:
     """Analyze engagement rates"""
-    
+    return engagement_from_dates(
+        [p.get('createdAt') for p in posts],
+        [e.get('createdAt') for e in events],
+        [len(c.get('members', [])) for c in communities]
+    )
+
+def engagement_from_dates(post_dates: Sequence, event_dates: Sequence,
+                          member_counts: Sequence[int]) -> Dict[str, Any]:
+    """analyze_engagement over post/event createdAt values and each community's member count"""
     recent_cutoff = datetime.now(timezone.utc) - timedelta(days=30)
     
-    def safe_parse_date(date_val):
-        """Safely parse date string or datetime object"""
-        if isinstance(date_val, datetime):
-            # Ensure datetime is timezone-aware
-            if date_val.tzinfo is None:
-                return date_val.replace(tzinfo=timezone.utc)
-            return date_val
-        if isinstance(date_val, str):
-            try:
-                dt = datetime.fromisoformat(date_val.replace('Z', '+00:00'))
-                if dt.tzinfo is None:
-                    return dt.replace(tzinfo=timezone.utc)
-                return dt
-            except (ValueError, TypeError):
-                return datetime(2020, 1, 1, tzinfo=timezone.utc)
-        return datetime(2020, 1, 1, tzinfo=timezone.utc)
-    
-    recent_posts = [p for p in posts 
-                    if safe_parse_date(p.get('createdAt')) > recent_cutoff]
-    
-    recent_events = [e for e in events
-                     if safe_parse_date(e.get('createdAt')) > recent_cutoff]
-    
-    total_members = sum(len(c.get('members', [])) for c in communities)
+    recent_posts = sum(1 for d in post_dates if safe_parse_date(d) > recent_cutoff)
+    recent_events = sum(1 for d in event_dates if safe_parse_date(d) > recent_cutoff)
+    
+    total_members = sum(member_counts)
     
     # Calculate engagement rate
-    if len(communities) > 0:
-        avg_members_per_community = total_members / len(communities)
+    if len(member_counts) > 0:
+        avg_members_per_community = total_members / len(member_counts)
     else:
         avg_members_per_community = 0
     
     # Engagement score (0-10)
     engagement_score = min(10, (
-        (len(recent_posts) * 0.5) +
-        (len(recent_events) * 1.0) +
+        (recent_posts * 0.5) +
+        (recent_events * 1.0) +
         (avg_members_per_community * 0.2)
     ))
     
     return {
-        "recent_posts_30d": len(recent_posts),
-        "recent_events_30d": len(recent_events),
+        "recent_posts_30d": recent_posts,
+        "recent_events_30d": recent_events,
         "total_community_members": total_members,
-        "active_communities": len(communities),
+        "active_communities": len(member_counts),
         "engagement_score": round(engagement_score, 1)
     }
 
+# ==========================================
+# CONTENT SUMMARY (PROCESS-POOL SAFE)
+# ==========================================
+# These take and return only plain tuples, strings and numbers so they can
+# run in a worker process without shipping Mongo documents across.
+
+def territory_content_inputs(posts: List[Dict], events: List[Dict], pins: List[Dict],
+                             projects: List[Dict], communities: List[Dict], with_texts: bool = True) -> tuple:
+    """Compact positional arguments for territory_content_summary"""
+    return (
+        tuple(tuple(t) if isinstance(t, list) else t for t in (pin.get('type') for pin in pins)),
+        tuple(p.get('text') or '' for p in posts) if with_texts else (),
+        tuple(p.get('createdAt') for p in posts),
+        tuple(e.get('title') or '' for e in events) if with_texts else (),
+        tuple(e.get('createdAt') for e in events),
+        tuple(len(c.get('members', [])) for c in communities),
+        len(projects),
+        with_texts,
+    )
+
+def territory_content_summary(pin_types: tuple, post_texts: tuple, post_dates: tuple, event_titles: tuple,
+                              event_dates: tuple, member_counts: tuple, project_count: int,
+                              text_analysis: bool = True) -> Dict[str, Any]:
+    """
+    CPU-bound part of analyze_territory_intelligence: activity and engagement,
+    plus sentiment and keywords over all texts when `text_analysis` is set
+    (callers with maintained aggregates skip it).
+    """
+    summary = {
+        "activity": activity_from_types(pin_types, len(post_dates), len(event_dates), project_count),
+        "engagement": engagement_from_dates(post_dates, event_dates, member_counts),
+    }
+    if text_analysis:
+        texts = [t for t in post_texts + event_titles if t]
+        summary["sentiment"] = texts_sentiment_summary(texts)
+        summary["keywords"] = extract_keywords(texts, top_n=8)
+    return summary
+
+def texts_sentiment_summary(texts: Sequence[str]) -> Dict[str, Any]:
+    """sentiment_summary of one batch call over `texts`"""
+    return sentiment_summary(SENTIMENT_SCORER.score_many(list(texts)))
+
+def texts_keyword_counts(texts: Sequence[str]) -> Dict[str, int]:
+    """Summed keyword_counts of `texts`"""
+    counts = Counter()
+    for text in texts:
+        counts.update(keyword_counts(text))
+    return dict(counts)
+
+def texts_document_frequencies(texts: Sequence[Optional[str]]) -> tuple:
+    """
+    (documents, {keyword: number of texts it appears in}) over `texts`. Only
+    non-empty texts are documents; the city-wide backfill and each new post
+    or event count through here so IDF doesn't shift after a backfill.
+    """
+    documents, df = 0, Counter()
+    for text in texts:
+        if text:
+            documents += 1
+            df.update(keyword_counts(text).keys())
+    return documents, dict(df)
+
 # ==========================================
 # AI INSIGHT GENERATION (DEMO MODE)
 # ==========================================
@@ -276,22 +470,31 @@ Livability Index: {territory_data.get('livability_index')}/10
 
 Provide actionable insights for stakeholders."""
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={"Authorization": f"Bearer {api_key}"},
-                json={
-                    "model": "gpt-3.5-turbo",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "max_tokens": 200,
-                    "temperature": 0.7
-                },
-                timeout=30.0
+        messages = [{"role": "user", "content": prompt}]
+        params = {"max_tokens": 200, "temperature": 0.7}
+        
+        async def complete():
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{OPENAI_BASE_URL}/chat/completions",
+                    headers={"Authorization": f"Bearer {api_key}"},
+                    json={"model": INSIGHT_MODEL, "messages": messages, **params},
+                    timeout=30.0
+                )
+                response.raise_for_status()
+                return response.json()
+        
+        async def insight():
+            # Fails fast while OpenAI is down; the demo insight below is the fallback
+            result = await LLM_LIMITER.call(
+                api_key, complete, breaker=get_breaker("openai"), timeout=30.0,
+                tokens=estimate_tokens(messages, params["max_tokens"])
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result['choices'][0]['message']['content'].strip()
+            return result['choices'][0]['message']['content'].strip()
+        
+        # The prompt holds every input, so an unchanged territory state reuses the last answer
+        key = completion_key(INSIGHT_MODEL, messages, **params)
+        return await LLM_CACHE.get_or_create(key, insight, model=INSIGHT_MODEL)
     except Exception as e:
         print(f"ChatGPT API error: {e}")
     
@@ -309,48 +512,45 @@ async def analyze_territory_intelligence(
     pins: List[Dict],
     projects: List[Dict],
     communities: List[Dict],
-    rating: float
+    rating: float,
+    news_metrics: Optional[Dict[str, Any]] = None,
+    sentiment_stats: Optional[Dict[str, Any]] = None,
+    top_keywords: Optional[List[str]] = None,
+    content_summary: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Comprehensive AI analysis of territory data
     Returns sentiment, insights, and recommendations
-    """
-    
-    # Extract all text content
-    post_texts = [p.get('text', '') for p in posts if p.get('text')]
-    event_titles = [e.get('title', '') for e in events if e.get('title')]
     
-    all_texts = post_texts + event_titles
+    Callers may pass `content_summary` (territory_content_summary, e.g.
+    computed in a worker process) so no CPU-heavy work runs here.
+    """
     
-    # Analyze sentiment
-    sentiment_results = [analyze_text_sentiment(text) for text in all_texts]
+    if content_summary is None:
+        text_analysis = sentiment_stats is None or top_keywords is None
+        content_summary = territory_content_summary(
+            *territory_content_inputs(posts, events, pins, projects, communities, with_texts=text_analysis)
+        )
     
-    if sentiment_results:
-        avg_sentiment_score = sum(s['score'] for s in sentiment_results) / len(sentiment_results)
-        positive_count = sum(1 for s in sentiment_results if s['sentiment'] == 'positive')
-        negative_count = sum(1 for s in sentiment_results if s['sentiment'] == 'negative')
-        
-        if positive_count > negative_count * 1.5:
-            overall_sentiment = "Positive"
-        elif negative_count > positive_count * 1.5:
-            overall_sentiment = "Negative"
-        else:
-            overall_sentiment = "Neutral"
-    else:
-        overall_sentiment = "Neutral"
-        avg_sentiment_score = 0.0
+    # Analyze sentiment: from maintained aggregates when the caller has them,
+    # else one batch call for all texts
+    if sentiment_stats is None:
+        sentiment_stats = content_summary["sentiment"]
+    overall_sentiment, avg_sentiment_score = overall_sentiment_from_summary(sentiment_stats)
     
-    # Extract keywords
-    top_keywords = extract_keywords(all_texts, top_n=8)
+    # Extract keywords (the caller may pass TF-IDF ranked ones from its keyword index)
+    if top_keywords is None:
+        top_keywords = content_summary["keywords"]
     
     # Analyze activities
-    activity_analysis = analyze_activity_types(pins, posts, events, projects)
+    activity_analysis = content_summary["activity"]
     
     # Analyze engagement
-    engagement_metrics = analyze_engagement(posts, events, communities)
+    engagement_metrics = content_summary["engagement"]
     
-    # Scrape news for comprehensive metrics
-    news_metrics = analyze_news_metrics(pages=2)
+    # Scrape news for comprehensive metrics (unless the caller has a snapshot)
+    if news_metrics is None:
+        news_metrics = await analyze_news_metrics_async(pages=2)
     
     # Compile all data
     territory_intelligence = {
@@ -371,6 +571,7 @@ async def analyze_territory_intelligence(
         },
         "engagement_metrics": engagement_metrics,
         "territory_rating": rating,
+        "news_scope": news_metrics.get('scope', 'city'),
         "crime_rate_score": news_metrics['crime_rate_score'],
         "investment_activity_score": news_metrics['investment_activity_score'],
         "job_market_score": news_metrics['job_market_score'],
@@ -0,0 +1,153 @@
+"""
+Territory Analysis Process Pool
+Runs CPU-bound territory analysis (sentiment scoring, keyword counting,
+engagement date parsing) in a capped ProcessPoolExecutor, so one territory
+with tens of thousands of posts cannot stall the event loop for everyone
+else on the worker. Inputs are compact tuples, not Mongo documents.
+
+Small inputs run inline: below ANALYSIS_OFFLOAD_MIN_ITEMS the pickling
+round trip costs more than the work. Each offloaded task waits at most
+ANALYSIS_TASK_TIMEOUT seconds (or what is left of the request deadline)
+for a slot and a result, then fails with AnalysisTimeout. A task whose
+worker process dies fails with AnalysisUnavailable; the next task starts a
+fresh pool.
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from resilience import DeadlineExceeded, deadline_timeout
+
+# Worker processes (0 runs everything inline), and tasks queued or running at once
+ANALYSIS_POOL_WORKERS = int(os.environ.get('ANALYSIS_POOL_WORKERS', '2'))
+ANALYSIS_POOL_MAX_PENDING = int(os.environ.get('ANALYSIS_POOL_MAX_PENDING', '8'))
+# Seconds one task may take, queueing included
+ANALYSIS_TASK_TIMEOUT = float(os.environ.get('ANALYSIS_TASK_TIMEOUT', '20'))
+# Posts + events + pins below which analysis runs inline
+ANALYSIS_OFFLOAD_MIN_ITEMS = int(os.environ.get('ANALYSIS_OFFLOAD_MIN_ITEMS', '2000'))
+
+class AnalysisUnavailable(Exception):
+    """Raised when an offloaded analysis task cannot produce a result; worth retrying later."""
+
+class AnalysisTimeout(AnalysisUnavailable, asyncio.TimeoutError):
+    """Raised when an offloaded analysis task does not finish within its timeout."""
+
+def _warm_up() -> bool:
+    # Importing the analyzer (numpy, keyword tables) is the slow part of a fresh worker
+    import ai_sentiment_analyzer  # noqa: F401
+    return True
+
+class AnalysisPool:
+    def __init__(self, workers: int = ANALYSIS_POOL_WORKERS, max_pending: int = ANALYSIS_POOL_MAX_PENDING,
+                 timeout: float = ANALYSIS_TASK_TIMEOUT, min_items: int = ANALYSIS_OFFLOAD_MIN_ITEMS):
+        self.workers = workers
+        self.timeout = timeout
+        self.min_items = min_items
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Held until the worker process is actually done, even after the caller timed out
+        self._slots = asyncio.Semaphore(max_pending)
+        self.max_pending = max_pending
+        self.pending = 0
+        self.inline = 0
+        self.offloaded = 0
+        self.timeouts = 0
+        self.broken = 0
+        self.task_seconds_total = 0.0
+        self.task_seconds_max = 0.0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the parent has a running event loop and driver threads
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def start(self):
+        """Start the workers ahead of the first heavy request."""
+        if self.workers > 0:
+            loop = asyncio.get_running_loop()
+            try:
+                await asyncio.gather(*(loop.run_in_executor(self._pool(), _warm_up) for _ in range(self.workers)))
+            except Exception as e:
+                # Not fatal: the next offloaded task starts a fresh pool
+                print(f"⚠️ Analysis pool warm-up failed: {e}")
+                self.shutdown()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., Any], *args, size: int) -> Any:
+        """`fn(*args)` in a worker process when `size` items warrant it, else inline."""
+        if self.workers <= 0 or size < self.min_items:
+            self.inline += 1
+            return fn(*args)
+
+        loop = asyncio.get_running_loop()
+        try:
+            give_up = loop.time() + deadline_timeout(self.timeout)
+        except DeadlineExceeded:
+            self.timeouts += 1
+            raise AnalysisTimeout("request deadline spent before territory analysis started")
+        try:
+            await asyncio.wait_for(self._slots.acquire(), max(0.0, give_up - loop.time()))
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise AnalysisTimeout(f"no analysis slot within {self.timeout:g}s ({self.pending} tasks pending)")
+
+        started = time.perf_counter()
+        self.pending += 1
+        try:
+            future = loop.run_in_executor(self._pool(), fn, *args)
+        except BaseException as e:
+            self.pending -= 1
+            self._slots.release()
+            if isinstance(e, BrokenProcessPool):
+                self._broken()
+                raise AnalysisUnavailable("analysis worker pool is broken") from e
+            raise
+
+        def done(_):
+            elapsed = time.perf_counter() - started
+            self.pending -= 1
+            self.task_seconds_total += elapsed
+            self.task_seconds_max = max(self.task_seconds_max, elapsed)
+            self._slots.release()
+        future.add_done_callback(done)
+
+        self.offloaded += 1
+        try:
+            # shield: a timed-out task keeps its slot until the process finishes it
+            return await asyncio.wait_for(asyncio.shield(future), max(0.0, give_up - loop.time()))
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise AnalysisTimeout(f"territory analysis took longer than {self.timeout:g}s")
+        except BrokenProcessPool as e:
+            self._broken()
+            raise AnalysisUnavailable("analysis worker process died") from e
+
+    def _broken(self):
+        # A worker died (e.g. OOM-killed); start a fresh pool for the next task
+        self.broken += 1
+        self.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.offloaded - self.pending
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "offload_min_items": self.min_items,
+            "pending": self.pending,
+            "inline": self.inline,
+            "offloaded": self.offloaded,
+            "timeouts": self.timeouts,
+            "broken_pools": self.broken,
+            "avg_task_ms": round(self.task_seconds_total / finished * 1000, 1) if finished > 0 else 0.0,
+            "max_task_ms": round(self.task_seconds_max * 1000, 1),
+        }
+
+ANALYSIS_POOL = AnalysisPool()
@@ -0,0 +1,114 @@
+"""
+Territory analysis process pool benchmark
+
+Runs territory_content_summary (with text analysis, i.e. the backfill
+case) for a large synthetic territory inline on the event loop and through
+AnalysisPool, while a ticker coroutine measures how long the loop is
+blocked. Light "other user" requests measure how much a heavy territory
+delays everyone else. Also checks that a task over its timeout fails with
+AnalysisTimeout instead of hanging.
+
+Usage (from backend/):
+    python devtools/bench_analysis_pool.py [--posts 30000] [--workers 2]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ai_sentiment_analyzer import territory_content_inputs, territory_content_summary  # noqa: E402
+from analysis_pool import AnalysisPool, AnalysisTimeout  # noqa: E402
+from devtools.bench_news_classifier import FILLER  # noqa: E402
+
+
+def make_territory(posts: int, rng: random.Random):
+    now = datetime.now(timezone.utc)
+
+    def created():
+        return (now - timedelta(days=rng.uniform(0, 90))).isoformat()
+
+    def text():
+        return " ".join(rng.choice(FILLER) for _ in range(rng.randint(8, 40)))
+
+    return (
+        [{"text": text(), "createdAt": created()} for _ in range(posts)],
+        [{"title": text()[:60], "createdAt": created()} for _ in range(posts // 10)],
+        [{"type": [rng.choice(["shop", "office", "job"])]} for _ in range(posts // 20)],
+        [{"id": str(i)} for i in range(10)],
+        [{"id": str(i), "members": list(range(rng.randint(0, 50)))} for i in range(20)],
+    )
+
+
+async def measure(label: str, work):
+    """Run `work` alongside a 5 ms ticker and 20 light requests; report loop stalls."""
+    lags, light = [], []
+
+    async def ticker(stop: asyncio.Event):
+        while not stop.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - before - 0.005)
+
+    async def light_request(delay: float):
+        # How late a request due at `delay` gets to run
+        due = time.perf_counter() + delay
+        await asyncio.sleep(delay)
+        light.append(time.perf_counter() - due)
+
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(stop))
+    others = [asyncio.create_task(light_request(i * 0.02)) for i in range(20)]
+    await asyncio.sleep(0.01)  # let the ticker start
+    start = time.perf_counter()
+    try:
+        await work()
+        outcome = "ok"
+    except AnalysisTimeout as e:
+        outcome = f"AnalysisTimeout ({e})"
+    elapsed = time.perf_counter() - start
+    await asyncio.gather(*others)
+    stop.set()
+    await tick
+    print(f"  {label:<16} {elapsed * 1000:>8.0f} ms   max loop stall {max(lags, default=0) * 1000:>7.1f} ms"
+          f"   light request max delay {max(light) * 1000:>7.1f} ms   {outcome}")
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    posts, events, pins, projects, communities = make_territory(args.posts, rng)
+    inputs = territory_content_inputs(posts, events, pins, projects, communities)
+    size = len(posts) + len(events) + len(pins)
+    print(f"territory_content_summary, {len(posts)} posts, {len(events)} events, {len(pins)} pins")
+
+    pool = AnalysisPool(workers=args.workers, min_items=0, timeout=60)
+    await pool.start()
+    tight = AnalysisPool(workers=1, min_items=0, timeout=0.05)
+    await tight.start()
+    try:
+        async def inline():
+            territory_content_summary(*inputs)
+
+        await measure("inline", inline)
+        await measure("process pool", lambda: pool.run(territory_content_summary, *inputs, size=size))
+        await measure("pool, 50 ms cap", lambda: tight.run(territory_content_summary, *inputs, size=size))
+        print(f"  stats {pool.stats()}")
+    finally:
+        pool.shutdown()
+        tight.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=30000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
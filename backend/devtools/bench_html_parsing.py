@@ -0,0 +1,106 @@
+"""
+News HTML parsing benchmark
+
+Parses the saved listing/article fixtures in devtools/fixtures with the
+old full-tree html.parser code, the SoupStrainer path and the lxml fast
+path, checks that all three extract the same data and reports time and
+peak traced memory per page (tracemalloc sees Python allocations only,
+so libxml2's own buffers are not included in the lxml figure).
+
+Usage (from backend/):
+    python devtools/bench_html_parsing.py [--iterations 200]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import news_scraper  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def legacy_listing(html: str):
+    """The pre-strainer implementation, kept here for comparison only."""
+    soup = BeautifulSoup(html, "html.parser")
+    headlines = []
+    for a_tag in soup.find_all("a", class_="theme-link list-news-title"):
+        title = a_tag.get("title", "").strip()
+        link = a_tag.get("href", "").strip()
+        if not link.startswith("http"):
+            link = news_scraper.BASE_URL + link
+        if title:
+            headlines.append({"title": title, "link": link})
+    return headlines
+
+
+def legacy_article(html: str):
+    soup = BeautifulSoup(html, "html.parser")
+    content = []
+    for p in soup.find_all("p"):
+        text = p.get_text(strip=True)
+        if text and "advertisement" not in " ".join(p.get("class", [])).lower():
+            content.append(text)
+    article_text = " ".join(content).strip()
+    return article_text if article_text else None
+
+
+def measure(fn, html: str, iterations: int):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(html)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run(label: str, html: str, parsers, iterations: int):
+    results = {name: fn(html) for name, fn in parsers}
+    reference = results[parsers[0][0]]
+    mismatched = [name for name, result in results.items() if result != reference]
+
+    print(f"{label} ({len(html) / 1024:.1f} KB)")
+    baseline = None
+    for name, fn in parsers:
+        elapsed, peak = measure(fn, html, iterations)
+        baseline = baseline or elapsed
+        print(f"  {name:<22} {elapsed * 1000:>8.2f} ms/page  ({baseline / elapsed:>4.1f}x)"
+              f"  peak {peak / 1024:>8.1f} KB")
+    if mismatched:
+        print(f"  ⚠️ output differs from legacy: {', '.join(mismatched)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    listing = (FIXTURES / "listing_page.html").read_text(encoding="utf-8")
+    article = (FIXTURES / "article_page.html").read_text(encoding="utf-8")
+
+    listing_parsers = [("legacy html.parser", legacy_listing),
+                       ("SoupStrainer", news_scraper.parse_listing_page_soup)]
+    article_parsers = [("legacy html.parser", legacy_article),
+                       ("SoupStrainer", news_scraper.parse_article_content_soup)]
+    if news_scraper.lxml is not None:
+        listing_parsers.append(("lxml", news_scraper.parse_listing_page_lxml))
+        article_parsers.append(("lxml", news_scraper.parse_article_content_lxml))
+    else:
+        print("lxml not installed; skipping the lxml fast path")
+
+    print(f"auto-selected parser: {'lxml' if news_scraper.USE_LXML else 'SoupStrainer'}")
+    run("listing page", listing, listing_parsers, args.iterations)
+    run("article page", article, article_parsers, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Territory keyword benchmark
+
+Compares the per-request keyword path (extract_keywords re-tokenizing a
+territory's whole post/event history) with the incremental index (term
+counts maintained per write, TF-IDF top-k read with heapq), for growing
+history sizes. Also reports the per-write tokenizing cost of a new text.
+
+Usage (from backend/):
+    python devtools/bench_keywords.py [--sizes 100,1000,10000] [--reads 50]
+"""
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ai_sentiment_analyzer import (  # noqa: E402
+    extract_keywords, keyword_counts, texts_document_frequencies, top_keywords_tfidf,
+)
+from devtools.bench_news_classifier import FILLER  # noqa: E402
+
+
+def make_texts(count: int, rng: random.Random):
+    return [" ".join(rng.choice(FILLER) for _ in range(rng.randint(6, 30))).capitalize() for _ in range(count)]
+
+
+def run(size: int, reads: int, rng: random.Random):
+    texts = make_texts(size, rng)
+
+    start = time.perf_counter()
+    for _ in range(reads):
+        extract_keywords(texts, top_n=8)
+    full = (time.perf_counter() - start) / reads
+
+    start = time.perf_counter()
+    for text in texts:
+        texts_document_frequencies((text,))
+        keyword_counts(text)
+    per_write = (time.perf_counter() - start) / size
+
+    # What the index holds after those writes: territory term counts and city-wide df
+    terms, df = Counter(), Counter()
+    for text in texts:
+        counts = keyword_counts(text)
+        terms.update(counts)
+        df.update(counts.keys())
+    terms, df = dict(terms), dict(df)
+
+    start = time.perf_counter()
+    for _ in range(reads):
+        top_keywords_tfidf(terms, df, size, top_n=8)
+    indexed = (time.perf_counter() - start) / reads
+
+    print(f"  {size:>7} texts  re-tokenize {full * 1000:>9.2f} ms/read   index top-k {indexed * 1000:>7.3f} ms/read"
+          f"  ({full / indexed:>6.0f}x)   write {per_write * 1e6:>5.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--reads", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print("top 8 territory keywords")
+    for size in (int(s) for s in args.sizes.split(",")):
+        run(size, args.reads, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+ChatGPT insight cache benchmark and regression check
+
+Points generate_chatgpt_insight at devtools/openai_stub.py
+(OPENAI_BASE_URL) with the LLM cache backed by an in-memory Mongo
+stand-in, and reports latency and stub completions for:
+
+- cold:        first request for a territory state (one paid round trip)
+- memory hit:  the same state again
+- store hit:   the same state after the in-process LRU is cleared
+               (a restarted worker reading the Mongo tier)
+- concurrent:  N simultaneous requests for a new state (single-flight)
+- changed:     a different territory state
+
+Exits non-zero if any of them reaches the stub more often than expected.
+
+Usage (from backend/):
+    python devtools/bench_llm_cache.py [--latency 2000] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from devtools.memory_db import MemoryDatabase  # noqa: E402
+from devtools.news_stub import StubConfig  # noqa: E402
+from devtools.openai_stub import start_openai_stub  # noqa: E402
+
+TERRITORY = {
+    "overall_sentiment": "Positive",
+    "dominant_activity_type": "Events",
+    "engagement_metrics": {"engagement_score": 6.5},
+    "crime_rate_score": 3.2,
+    "investment_activity_score": 7.1,
+    "job_market_score": 5.4,
+    "property_market_score": 6.0,
+    "livability_index": 7.8,
+}
+
+
+async def run(args, config) -> bool:
+    from ai_sentiment_analyzer import generate_chatgpt_insight
+    from llm_cache import LLM_CACHE
+
+    await LLM_CACHE.attach(MemoryDatabase().llm_cache)
+    failures = []
+
+    async def step(label: str, expected_completions: int, territories):
+        before = config.completions
+        start = time.perf_counter()
+        insights = await asyncio.gather(*(generate_chatgpt_insight(t, "sk-stub") for t in territories))
+        elapsed = time.perf_counter() - start
+        made = config.completions - before
+        ok = made == expected_completions and all(i.startswith("Stub insight") for i in insights)
+        print(f"  {'ok ' if ok else 'FAIL'} {label:<22} {elapsed * 1000:>9.1f} ms  "
+              f"{len(territories):>3} request(s)  {made} completion(s)")
+        if not ok:
+            failures.append(label)
+        return insights
+
+    print(f"ChatGPT insights through the LLM cache, stub latency {args.latency:.0f} ms")
+    first = await step("cold", 1, [TERRITORY])
+    again = await step("memory hit", 0, [TERRITORY])
+    LLM_CACHE.clear_memory()
+    stored = await step("store hit", 0, [TERRITORY])
+    if not first == again == stored:
+        failures.append("cached insight differs from the original")
+    busy = {**TERRITORY, "overall_sentiment": "Negative"}
+    await step("concurrent", 1, [busy] * args.concurrency)
+    await step("changed", 1, [{**TERRITORY, "livability_index": 6.9}])
+
+    print(f"  stats {LLM_CACHE.stats()}")
+    print(f"{'FAILED' if failures else 'passed'}: {len(failures)} failing check(s)")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=2000.0, help="stub completion latency in ms")
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency)
+    server, base_url = start_openai_stub(config)
+    # OPENAI_BASE_URL is read at import time
+    os.environ["OPENAI_BASE_URL"] = base_url
+    try:
+        ok = asyncio.run(run(args, config))
+    finally:
+        server.shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+LLM rate limiter benchmark
+
+Fires a burst of comment-moderation completions, all on one API key, at
+devtools/openai_stub.py, which enforces --rpm with 429s like the real API.
+Three scenarios run:
+
+- unlimited:   direct calls, as before the limiter (429s become fallbacks)
+- limited:     through LLMLimiter with the key's real limit
+- overcommit:  through LLMLimiter configured at twice the real limit, so
+               429s happen and are retried with jittered backoff
+
+For each it reports successes, failures, 429s seen by the stub, wall time,
+and queue wait percentiles.
+
+Usage (from backend/):
+    python devtools/bench_llm_limiter.py [--rpm 300] [--calls 340] [--latency 200]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from openai import AsyncOpenAI  # noqa: E402
+
+from devtools.news_stub import StubConfig  # noqa: E402
+from devtools.openai_stub import start_openai_stub  # noqa: E402
+from llm_limiter import LLMLimiter  # noqa: E402
+
+API_KEY = "sk-bench"
+
+
+def messages(i: int):
+    return [{"role": "system", "content": "Moderate this comment. Respond with JSON."},
+            {"role": "user", "content": f"Comment: Nice clean park number {i}"}]
+
+
+async def burst(label: str, args, limiter=None):
+    # A fresh stub per scenario starts with a full rate limit bucket
+    config = StubConfig(args.latency)
+    server, base_url = start_openai_stub(config, rpm=args.rpm)
+    client = AsyncOpenAI(api_key=API_KEY, base_url=base_url, max_retries=0)
+
+    async def one(i: int):
+        kwargs = dict(model="gpt-4o-mini", messages=messages(i), response_format={"type": "json_object"})
+        try:
+            if limiter is None:
+                await asyncio.wait_for(client.chat.completions.create(**kwargs), 30)
+            else:
+                await limiter.call(API_KEY, client.chat.completions.create, timeout=30,
+                                   queue_timeout=args.queue_timeout, **kwargs)
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(args.calls)))
+    elapsed = time.perf_counter() - start
+    await client.close()
+    server.shutdown()
+
+    ok = sum(results)
+    print(f"  {label:<11} {ok:>5} ok {len(results) - ok:>5} failed {config.rate_limited:>5} x 429"
+          f"  {elapsed:>6.1f} s")
+    if limiter is not None:
+        stats = limiter.stats()["keys"][0]
+        print(f"              wait ms {stats['wait_ms']}  retries {stats['retries']}"
+              f"  queue timeouts {stats['queue_timeouts']}")
+
+
+async def run(args):
+    print(f"{args.calls} completions on one key, stub limit {args.rpm} rpm, latency {args.latency:.0f} ms")
+    limits = dict(max_in_flight=args.in_flight, tpm=10 ** 9)
+    await burst("unlimited", args)
+    await burst("limited", args, LLMLimiter(rpm=args.rpm, **limits))
+    await burst("overcommit", args, LLMLimiter(rpm=args.rpm * 2, **limits))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpm", type=int, default=300)
+    parser.add_argument("--calls", type=int, default=340)
+    parser.add_argument("--latency", type=float, default=200.0, help="stub completion latency in ms")
+    parser.add_argument("--in-flight", type=int, default=16, help="limiter max in-flight calls")
+    parser.add_argument("--queue-timeout", type=float, default=60.0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
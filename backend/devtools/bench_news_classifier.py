@@ -0,0 +1,87 @@
+"""
+News keyword classifier benchmark
+
+Compares the old per-keyword substring scans (extract_tags + five
+any(...) category checks per title) with the compiled single-pass
+NewsClassifier, on synthetic headline and article-body sets.
+
+Usage (from backend/):
+    python devtools/bench_news_classifier.py [--headlines 20000] [--bodies 2000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from news_scraper import CATEGORY_KEYWORDS, KEYWORD_TAGS, NEWS_CLASSIFIER  # noqa: E402
+
+FILLER = (
+    "city officials said the ward committee met on tuesday to review the plan for "
+    "the riverfront area where residents raised concerns about water supply and "
+    "the new bus route while traders asked for more parking near the old market "
+    "ahmedabad municipal corporation standing chairman announced that work on the "
+    "drainage line along sg highway would finish before monsoon according to sources "
+    "in gandhinagar the state cabinet discussed tourism heritage walk lake bridge "
+    "vastrapur bopal naranpura maninagar chandkheda gota thaltej prahladnagar"
+).split()
+# Roughly one keyword every ~30 words, like real news copy
+KEYWORD_DENSITY = 0.03
+
+
+def legacy_classify(text: str):
+    """The pre-compiled-matcher implementation, kept here for comparison only."""
+    text_lower = text.lower()
+    tags = sorted({tag for tag in KEYWORD_TAGS if tag.lower() in text_lower})
+    categories = [c for c, keywords in CATEGORY_KEYWORDS.items() if any(kw in text_lower for kw in keywords)]
+    return {"tags": tags, "categories": categories}
+
+
+def make_texts(count: int, words: int, rng: random.Random, density: float = KEYWORD_DENSITY):
+    keywords = [k.lower() for k in KEYWORD_TAGS]
+    texts = []
+    for _ in range(count):
+        tokens = [rng.choice(keywords) if rng.random() < density else rng.choice(FILLER) for _ in range(words)]
+        texts.append(" ".join(tokens).capitalize() + ".")
+    return texts
+
+
+def run(label: str, texts):
+    start = time.perf_counter()
+    for text in texts:
+        legacy_classify(text)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in texts:
+        NEWS_CLASSIFIER.classify(text)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    NEWS_CLASSIFIER.classify_many(texts)
+    batch = time.perf_counter() - start
+
+    n = len(texts)
+    print(f"{label} ({n} texts)")
+    print(f"  legacy substring scan   {n / legacy:>12,.0f} texts/s")
+    print(f"  compiled, per text      {n / single:>12,.0f} texts/s  ({legacy / single:.1f}x)")
+    print(f"  compiled, batch         {n / batch:>12,.0f} texts/s  ({legacy / batch:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--headlines", type=int, default=20000)
+    parser.add_argument("--bodies", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Headlines are short and keyword-heavy
+    run("headlines", make_texts(args.headlines, 12, rng, density=0.1))
+    run("article bodies", make_texts(args.bodies, 600, rng))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Offline news scraper benchmark
+
+Points the scraper at devtools/news_stub.py (NEWS_BASE_URL) and measures
+end-to-end analyze_news_metrics time, listing pages/sec and memory for:
+
+- sync:             the analyze_news_metrics() wrapper (own event loop and client per call)
+- async:            analyze_news_metrics_async() on one loop with one pooled client
+- async sequential: the same with NEWS_SCRAPE_CONCURRENCY=1
+
+The regression checks against the same stub live in tests/test_news_scraper.py.
+
+Usage (from backend/):
+    python devtools/bench_news_scraper.py --pages 5 --iterations 10 --latency 40
+"""
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from devtools.news_stub import StubConfig, start_stub_server  # noqa: E402
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(label: str, run_batch, pages: int, iterations: int):
+    """run_batch(n) performs n analyze runs back to back."""
+    run_batch(1)  # warm up imports and the parser
+    start = time.perf_counter()
+    run_batch(iterations)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    run_batch(1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<18} {elapsed * 1000:>9.1f} ms/run  {pages / elapsed:>8.1f} pages/s"
+          f"  peak {peak / 1024:>8.1f} KB")
+
+
+def benchmark(args, news_scraper):
+    async def run_async(iterations: int, concurrency: int):
+        news_scraper.NEWS_SCRAPE_CONCURRENCY = concurrency
+        async with news_scraper.new_http_client() as client:
+            for _ in range(iterations):
+                await news_scraper.analyze_news_metrics_async(args.pages, client)
+
+    concurrency = news_scraper.NEWS_SCRAPE_CONCURRENCY
+    print(f"analyze_news_metrics, {args.pages} pages, {args.latency:.0f} ms latency, "
+          f"{args.iterations} iterations")
+    measure("sync", lambda n: [news_scraper.analyze_news_metrics(args.pages) for _ in range(n)],
+            args.pages, args.iterations)
+    measure("async", lambda n: asyncio.run(run_async(n, concurrency)), args.pages, args.iterations)
+    measure("async sequential", lambda n: asyncio.run(run_async(n, 1)), args.pages, args.iterations)
+    news_scraper.NEWS_SCRAPE_CONCURRENCY = concurrency
+    print(f"  max RSS {max_rss_mb():.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=40.0, help="stub response latency in ms")
+    parser.add_argument("--jitter", type=float, default=10.0, help="stub latency jitter in ms")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of stub requests answered with 503")
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency, args.jitter, args.fail_rate, seed=7)
+    server, base_url = start_stub_server(config)
+    # BASE_URL is read at import time
+    os.environ["NEWS_BASE_URL"] = base_url
+    import news_scraper
+
+    try:
+        benchmark(args, news_scraper)
+        print(f"  stub: {config.requests} requests, {config.failures} injected failures")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Sentiment scorer benchmark
+
+Scores a synthetic corpus of post/event texts with the original
+per-text substring scan and with SentimentScorer (token and substring
+modes, per text and batched), checks that substring mode reproduces the
+original results exactly and reports texts/sec.
+
+Usage (from backend/):
+    python devtools/bench_sentiment.py [--texts 20000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ai_sentiment_analyzer import NEGATIVE_KEYWORDS, POSITIVE_KEYWORDS, SentimentScorer  # noqa: E402
+
+FILLER = (
+    "the park near our society had a meeting about parking and water supply this week "
+    "residents from the block shared photos of the street and asked the ward office to "
+    "renewal of the lease for shops along the main road is planned before diwali"
+).split()
+
+
+def legacy_sentiment(text: str):
+    """The pre-scorer implementation, kept here for comparison only."""
+    if not text:
+        return {"sentiment": "neutral", "score": 0.0}
+    text_lower = text.lower()
+    positive_count = sum(1 for word in POSITIVE_KEYWORDS if word in text_lower)
+    negative_count = sum(1 for word in NEGATIVE_KEYWORDS if word in text_lower)
+    total = positive_count + negative_count
+    if total == 0:
+        return {"sentiment": "neutral", "score": 0.0}
+    sentiment_score = (positive_count - negative_count) / total
+    if sentiment_score > 0.2:
+        sentiment = "positive"
+    elif sentiment_score < -0.2:
+        sentiment = "negative"
+    else:
+        sentiment = "neutral"
+    return {"sentiment": sentiment, "score": round(sentiment_score, 2),
+            "positive_keywords": positive_count, "negative_keywords": negative_count}
+
+
+def make_texts(count: int, rng: random.Random):
+    vocabulary = FILLER * 3 + POSITIVE_KEYWORDS + NEGATIVE_KEYWORDS
+    return [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(5, 60))).capitalize() + "."
+            for _ in range(count)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts, random.Random(args.seed))
+    token = SentimentScorer(mode="token")
+    substring = SentimentScorer(mode="substring")
+
+    legacy, legacy_s = timed(lambda: [legacy_sentiment(t) for t in texts])
+    legacy_mean = round(sum(r["score"] for r in legacy) / len(legacy), 2)
+    runs = [
+        ("substring, per text", lambda: [substring.analyze(t) for t in texts]),
+        ("substring, batch", lambda: substring.score_many(texts)),
+        ("token, per text", lambda: [token.analyze(t) for t in texts]),
+        ("token, batch", lambda: token.score_many(texts)),
+    ]
+
+    n = len(texts)
+    print(f"{n} texts")
+    print(f"  {'legacy substring scan':<24} {n / legacy_s:>10,.0f} texts/s  mean score {legacy_mean}")
+    for label, fn in runs:
+        result, elapsed = timed(fn)
+        mean = round(result.mean_score() if hasattr(result, "mean_score")
+                     else sum(r["score"] for r in result) / n, 2)
+        print(f"  {label:<24} {n / elapsed:>10,.0f} texts/s  ({legacy_s / elapsed:.1f}x)  mean score {mean}")
+
+    batch = substring.score_many(texts)
+    mismatches = sum(1 for i, expected in enumerate(legacy) if batch.result(i) != expected)
+    print(f"substring mode vs legacy: {mismatches} mismatching results")
+    changed = sum(1 for i in range(n) if token.score_many([texts[i]]).result(0) != legacy[i]) if n <= 5000 else None
+    if changed is not None:
+        print(f"token mode changes {changed} of {n} results (whole-word matching)")
+
+
+if __name__ == "__main__":
+    main()
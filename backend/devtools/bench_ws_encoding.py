@@ -0,0 +1,156 @@
+"""
+WebSocket frame encoding benchmark
+
+Compares JSON text frames with MessagePack binary frames for typical
+territory and pin events, and shows the cost of encoding once per frame
+(EncodedFrame) versus once per subscriber.
+
+Usage (from backend/):
+    python devtools/bench_ws_encoding.py [--iterations 2000] [--subscribers 500]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'bench')
+
+import msgpack  # noqa: E402
+from server import EncodedFrame  # noqa: E402
+
+
+def territory_event() -> dict:
+    return {
+        "type": "territory_updated",
+        "seq": 1,
+        "data": {
+            "id": str(uuid.uuid4()),
+            "name": "Satellite",
+            "city": "Ahmedabad",
+            "zone": "Zone 380",
+            "pincode": "380015",
+            "center": {"lat": 23.0113, "lng": 72.586},
+            "radius": 2500,
+            "metrics": {
+                "investments": 7.5, "buildings": 120, "populationDensity": 8.1,
+                "qualityOfProject": 6.9, "govtInfra": 7.2, "livabilityIndex": 7.8,
+                "airPollutionIndex": 5.4, "roads": 6.6, "crimeRate": 3.1,
+            },
+            "restrictions": {"rentFamilyOnly": False, "pgAllowed": True},
+            "aiInsights": {
+                "appreciationPercent": 1.82, "demandPressure": 4.2, "confidenceScore": 76.6,
+                "aiSuggestions": [
+                    "Strong livability - good for families",
+                    "Infrastructure needs development",
+                ],
+            },
+            "rating": {
+                "totalScore": 412,
+                "pinTypeScores": {t: 9 * i for i, t in enumerate([
+                    "job", "supplier", "vendor", "shop", "office", "warehouse",
+                    "service_center", "event_venue", "project_site", "residential_area",
+                    "parking_logistics", "landmark"])},
+                "pinTypeCounts": {t: i for i, t in enumerate([
+                    "job", "supplier", "vendor", "shop", "office", "warehouse",
+                    "service_center", "event_venue", "project_site", "residential_area",
+                    "parking_logistics", "landmark"])},
+                "topContributors": [
+                    {"type": "Project Site", "score": 100, "percentage": 24.27, "count": 10},
+                    {"type": "Office", "score": 81, "percentage": 19.66, "count": 9},
+                    {"type": "Residential Area", "score": 72, "percentage": 17.48, "count": 8},
+                ],
+            },
+            "liveAnalytics": {
+                "ai_insight": (
+                    "This territory shows strong promise with a livability index of 7.4/10. "
+                    "Community sentiment is positive, driven primarily by events activity. "
+                    "Safety metrics are excellent (score: 8.0/10), making it ideal for families "
+                    "and long-term investments. Recommended actions: expand community programs."
+                ),
+                "top_keywords": ["metro", "park", "school", "market", "traffic", "water", "road", "mall"],
+            },
+            "createdBy": str(uuid.uuid4()),
+            "updatedAt": "2026-10-19T10:15:00.000000+00:00",
+        },
+    }
+
+
+def pin_event() -> dict:
+    return {
+        "type": "pin_created",
+        "seq": 2,
+        "data": {
+            "id": str(uuid.uuid4()),
+            "location": {"lat": 23.0225, "lng": 72.5714},
+            "type": ["shop", "vendor"],
+            "label": "Kirana store",
+            "description": "Corner grocery near the bus stop",
+            "address": None,
+            "hasGeofence": False,
+            "geofenceRadius": 1000,
+            "territoryId": str(uuid.uuid4()),
+            "projectId": None,
+            "eventId": None,
+            "generateAIInsights": False,
+            "createdBy": str(uuid.uuid4()),
+            "userName": "Field Agent",
+            "createdAt": "2026-10-19T10:15:00.000000+00:00",
+        },
+    }
+
+
+def time_per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--subscribers", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'event':<20}{'format':<10}{'bytes':>8}{'encode µs':>12}")
+    for name, event in (("territory_updated", territory_event()), ("pin_created", pin_event())):
+        text = json.dumps(event)
+        binary = msgpack.packb(event, use_bin_type=True, default=str)
+        json_us = time_per_call(lambda: json.dumps(event), args.iterations) * 1e6
+        msgpack_us = time_per_call(lambda: msgpack.packb(event, use_bin_type=True, default=str), args.iterations) * 1e6
+        print(f"{name:<20}{'json':<10}{len(text.encode()):>8}{json_us:>12.1f}")
+        print(f"{name:<20}{'msgpack':<10}{len(binary):>8}{msgpack_us:>12.1f}")
+
+    # Fan-out: half the subscribers on each format
+    event = territory_event()
+    half = args.subscribers // 2
+    rounds = max(1, args.iterations // 100)
+
+    def per_subscriber():
+        for _ in range(half):
+            json.dumps(event)
+        for _ in range(args.subscribers - half):
+            msgpack.packb(event, use_bin_type=True, default=str)
+
+    def shared():
+        frame = EncodedFrame(1, event)
+        for _ in range(half):
+            frame.text
+        for _ in range(args.subscribers - half):
+            frame.binary
+
+    naive_ms = time_per_call(per_subscriber, rounds) * 1e3
+    shared_ms = time_per_call(shared, rounds) * 1e3
+    print()
+    print(f"fan-out to {args.subscribers} subscribers (territory_updated, mixed formats)")
+    print(f"  encode per subscriber: {naive_ms:8.3f} ms/frame")
+    print(f"  shared EncodedFrame:   {shared_ms:8.3f} ms/frame")
+
+
+if __name__ == "__main__":
+    main()
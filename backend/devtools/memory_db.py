@@ -0,0 +1,323 @@
+"""
+In-memory stand-in for the Motor database used by server.py
+
+Implements the subset of the AsyncIOMotorDatabase / Collection API the
+backend uses (find/find_one/insert/update/bulk_write/delete/count with the common
+query and update operators) so load harnesses and benchmarks can run the
+real app fully offline. Not a general MongoDB emulator.
+"""
+import copy
+import re
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+_MISSING = object()
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split('.'):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    return value
+
+
+def _set_path(doc: Dict[str, Any], path: str, value: Any):
+    parts = path.split('.')
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _unset_path(doc: Dict[str, Any], path: str):
+    parts = path.split('.')
+    for part in parts[:-1]:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    if op == '$exists':
+        return (value is not _MISSING) == bool(operand)
+    if op == '$in':
+        if isinstance(value, list):
+            return any(v in operand for v in value)
+        return value in operand
+    if op == '$nin':
+        return not _compare(value, '$in', operand)
+    if op == '$ne':
+        return value != operand
+    if op == '$eq':
+        return _matches_value(value, operand)
+    if op == '$regex':
+        return isinstance(value, str) and re.search(operand, value) is not None
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if op == '$gt':
+            return value > operand
+        if op == '$gte':
+            return value >= operand
+        if op == '$lt':
+            return value < operand
+        if op == '$lte':
+            return value <= operand
+    except TypeError:
+        return False
+    raise NotImplementedError(f"memory_db does not support query operator {op}")
+
+
+def _matches_value(value: Any, expected: Any) -> bool:
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    if value is _MISSING:
+        return expected is None
+    return value == expected
+
+
+def _matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, condition in query.items():
+        if key == '$or':
+            if not any(_matches(doc, q) for q in condition):
+                return False
+            continue
+        if key == '$and':
+            if not all(_matches(doc, q) for q in condition):
+                return False
+            continue
+        value = _get_path(doc, key)
+        if isinstance(condition, dict) and condition and all(k.startswith('$') for k in condition):
+            if not all(_compare(value, op, operand) for op, operand in condition.items() if op != '$options'):
+                return False
+        elif not _matches_value(value, condition):
+            return False
+    return True
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    include = {k for k, v in projection.items() if v and k != '_id'}
+    if include:
+        result = {}
+        for path in include:
+            value = _get_path(doc, path)
+            if value is not _MISSING:
+                _set_path(result, path, value)
+        if projection.get('_id', 1) and '_id' in doc:
+            result['_id'] = doc['_id']
+        return result
+    for path, flag in projection.items():
+        if not flag:
+            _unset_path(doc, path)
+    return doc
+
+
+def _sort_key(value: Any):
+    # Missing/None sort first, like MongoDB
+    return (value is not _MISSING and value is not None, value if value is not _MISSING else None)
+
+
+class MemoryCursor:
+    def __init__(self, docs: List[Dict[str, Any]], projection: Optional[Dict[str, Any]] = None):
+        self._docs = docs
+        self._projection = projection
+        self._sort: List[tuple] = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction: int = 1):
+        if isinstance(key, list):
+            self._sort.extend(key)
+        else:
+            self._sort.append((key, direction))
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def _results(self) -> List[Dict[str, Any]]:
+        docs = list(self._docs)
+        for key, direction in reversed(self._sort):
+            docs.sort(key=lambda d: _sort_key(_get_path(d, key)), reverse=direction < 0)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(d, self._projection) for d in docs]
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        results = self._results()
+        return results if length is None else results[:length]
+
+    def __aiter__(self):
+        self._iter = iter(self._results())
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class MemoryCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.docs: List[Dict[str, Any]] = []
+        self._ids: set = set()
+
+    def find(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None) -> MemoryCursor:
+        return MemoryCursor([d for d in self.docs if _matches(d, query or {})], projection)
+
+    async def find_one(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None,
+                       sort: Optional[List[tuple]] = None) -> Optional[Dict[str, Any]]:
+        cursor = self.find(query, projection)
+        if sort:
+            cursor.sort(sort)
+        results = await cursor.limit(1).to_list(1)
+        return results[0] if results else None
+
+    def _claim_id(self, doc_id: Any):
+        # The one unique index every collection has
+        if doc_id in self._ids:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} _id: {doc_id!r}")
+        self._ids.add(doc_id)
+
+    async def insert_one(self, doc: Dict[str, Any]):
+        doc.setdefault('_id', ObjectId())
+        self._claim_id(doc['_id'])
+        self.docs.append(copy.deepcopy(doc))
+        return SimpleNamespace(inserted_id=doc['_id'], acknowledged=True)
+
+    async def insert_many(self, docs: List[Dict[str, Any]], ordered: bool = True):
+        ids = [(await self.insert_one(doc)).inserted_id for doc in docs]
+        return SimpleNamespace(inserted_ids=ids, acknowledged=True)
+
+    def _apply_update(self, doc: Dict[str, Any], update: Dict[str, Any], inserting: bool):
+        for op, fields in update.items():
+            for path, value in fields.items():
+                if op == '$set':
+                    _set_path(doc, path, copy.deepcopy(value))
+                elif op == '$setOnInsert':
+                    if inserting:
+                        _set_path(doc, path, copy.deepcopy(value))
+                elif op == '$unset':
+                    _unset_path(doc, path)
+                elif op == '$inc':
+                    current = _get_path(doc, path)
+                    _set_path(doc, path, (0 if current is _MISSING else current) + value)
+                elif op == '$max':
+                    current = _get_path(doc, path)
+                    if current is _MISSING or value > current:
+                        _set_path(doc, path, value)
+                elif op in ('$push', '$addToSet'):
+                    current = _get_path(doc, path)
+                    if current is _MISSING:
+                        current = []
+                        _set_path(doc, path, current)
+                    values = value['$each'] if isinstance(value, dict) and '$each' in value else [value]
+                    for v in values:
+                        if op == '$push' or v not in current:
+                            current.append(copy.deepcopy(v))
+                else:
+                    raise NotImplementedError(f"memory_db does not support update operator {op}")
+
+    def _upsert_doc(self, query: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+        doc = {k: copy.deepcopy(v) for k, v in query.items()
+               if not k.startswith('$') and not (isinstance(v, dict) and any(x.startswith('$') for x in v))}
+        doc['_id'] = doc.get('_id', ObjectId())
+        self._claim_id(doc['_id'])
+        self._apply_update(doc, update, inserting=True)
+        self.docs.append(doc)
+        return doc
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False):
+        for doc in self.docs:
+            if _matches(doc, query):
+                self._apply_update(doc, update, inserting=False)
+                return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            doc = self._upsert_doc(query, update)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc['_id'])
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def update_many(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False):
+        matched = [d for d in self.docs if _matches(d, query)]
+        for doc in matched:
+            self._apply_update(doc, update, inserting=False)
+        if not matched and upsert:
+            doc = self._upsert_doc(query, update)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc['_id'])
+        return SimpleNamespace(matched_count=len(matched), modified_count=len(matched), upserted_id=None)
+
+    async def find_one_and_update(self, query: Dict[str, Any], update: Dict[str, Any], projection=None,
+                                  upsert: bool = False, return_document: bool = False, **kwargs):
+        for doc in self.docs:
+            if _matches(doc, query):
+                before = _project(doc, projection)
+                self._apply_update(doc, update, inserting=False)
+                return _project(doc, projection) if return_document else before
+        if upsert:
+            doc = self._upsert_doc(query, update)
+            return _project(doc, projection) if return_document else None
+        return None
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True):
+        # pymongo UpdateOne requests only
+        for request in requests:
+            await self.update_one(request._filter, request._doc, upsert=bool(request._upsert))
+        return SimpleNamespace(acknowledged=True)
+
+    async def delete_one(self, query: Dict[str, Any]):
+        for i, doc in enumerate(self.docs):
+            if _matches(doc, query):
+                self._ids.discard(doc.get('_id'))
+                del self.docs[i]
+                return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    async def delete_many(self, query: Dict[str, Any]):
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if not _matches(d, query)]
+        self._ids = {d.get('_id') for d in self.docs}
+        return SimpleNamespace(deleted_count=before - len(self.docs))
+
+    async def count_documents(self, query: Dict[str, Any]) -> int:
+        return sum(1 for d in self.docs if _matches(d, query))
+
+    async def create_index(self, keys, **kwargs) -> str:
+        return str(keys)
+
+
+class MemoryDatabase:
+    def __init__(self):
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(name)
+        return self._collections[name]
+
+    async def list_collection_names(self) -> List[str]:
+        return list(self._collections)
+
+    async def create_collection(self, name: str, **kwargs) -> MemoryCollection:
+        return self[name]
@@ -0,0 +1,143 @@
+"""
+Local Gujarat Samachar stand-in
+
+Serves the saved fixtures from devtools/fixtures over HTTP so the scraper
+can be exercised offline:
+
+- /city/all/<page>  listing_page.html, with article links made unique per
+                    page and pointed back at this server
+- anything else     article_page.html
+
+Responses carry an ETag and honour If-None-Match (304). Latency, jitter
+and failures (503s or hung requests) can be injected.
+
+Usage (from backend/):
+    python devtools/news_stub.py --port 8765 --latency 50 --fail-rate 0.1
+    NEWS_BASE_URL=http://127.0.0.1:8765 python -c "import news_scraper; print(news_scraper.analyze_news_metrics(2))"
+"""
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Tuple
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+LIVE_BASE_URL = "https://english.gujaratsamachar.com"
+
+
+class StubConfig:
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, fail_rate: float = 0.0,
+                 hang_rate: float = 0.0, hang_seconds: float = 30.0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.not_modified = 0
+
+    def roll(self) -> Tuple[float, str]:
+        """(delay seconds, outcome) for one request: outcome is ok, fail or hang."""
+        with self.lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            r = self.rng.random()
+            if r < self.fail_rate:
+                self.failures += 1
+                return delay, "fail"
+            if r < self.fail_rate + self.hang_rate:
+                return self.hang_seconds, "hang"
+            return delay, "ok"
+
+
+def make_handler(config: StubConfig, base_url_holder: dict):
+    listing = (FIXTURES / "listing_page.html").read_text(encoding="utf-8")
+    article = (FIXTURES / "article_page.html").read_text(encoding="utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            delay, outcome = config.roll()
+            time.sleep(delay)
+            if outcome == "hang":
+                # The client gives up first; just drop the connection
+                self.close_connection = True
+                return
+            if outcome == "fail":
+                self.respond(503, b"Service Unavailable")
+                return
+
+            if self.path.startswith("/city/all/"):
+                page = self.path.rstrip("/").rsplit("/", 1)[-1]
+                body = (listing
+                        .replace(LIVE_BASE_URL, base_url_holder["url"])
+                        .replace('href="/news/', f'href="/news/p{page}/'))
+            else:
+                body = article
+            payload = body.encode("utf-8")
+            etag = '"' + hashlib.sha1(payload).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                with config.lock:
+                    config.not_modified += 1
+                self.respond(304, b"", etag)
+                return
+            self.respond(200, payload, etag)
+
+        def respond(self, status: int, payload: bytes, etag: Optional[str] = None):
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            if payload:
+                self.wfile.write(payload)
+
+    return Handler
+
+
+def start_stub_server(config: Optional[StubConfig] = None, host: str = "127.0.0.1",
+                      port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the stub in a daemon thread; returns (server, base_url). Call server.shutdown() to stop."""
+    config = config or StubConfig()
+    holder = {"url": ""}
+    server = ThreadingHTTPServer((host, port), make_handler(config, holder))
+    server.daemon_threads = True
+    holder["url"] = f"http://{host}:{server.server_address[1]}"
+    server.config = config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, holder["url"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="response latency in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- latency jitter in ms")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction of requests that never answer")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency, args.jitter, args.fail_rate, args.hang_rate, seed=args.seed)
+    server, base_url = start_stub_server(config, args.host, args.port)
+    print(f"News stub serving fixtures at {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
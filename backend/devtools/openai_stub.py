@@ -0,0 +1,180 @@
+"""
+Local OpenAI chat completions stand-in
+
+Answers POST <base>/chat/completions (base_url is .../v1) with a
+deterministic completion derived from the prompt, so the insight cache and
+the AI integrations can be exercised offline without an API key or cost.
+JSON-mode requests (response_format json_object) get comment moderation
+verdicts: one object for "Comment: ..." prompts, {"results": [...]} for
+numbered "[n] ..." batches. Latency, jitter and 503 failures can be
+injected, and --rpm answers requests over a per-minute limit with 429 and
+Retry-After like the real API (a bucket of `rpm` requests refilled
+continuously). Every completion served is counted in
+config.completions, every 429 in config.rate_limited.
+
+Usage (from backend/):
+    python devtools/openai_stub.py --port 8766 --latency 2000
+    OPENAI_BASE_URL=http://127.0.0.1:8766/v1 uvicorn server:app
+"""
+import argparse
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from devtools.news_stub import StubConfig  # noqa: E402
+
+FLAGGED_WORDS = {"scam", "fraud", "idiot", "abuse"}
+POSITIVE_WORDS = {"good", "great", "nice", "clean", "safe", "love"}
+NEGATIVE_WORDS = {"bad", "terrible", "dirty", "unsafe", "traffic", "garbage"}
+NUMBERED_LINE = re.compile(r"^\[(\d+)\]\s*(.*)$", re.MULTILINE)
+
+
+def verdict(text: str) -> dict:
+    words = set(re.findall(r"[a-z]+", text.lower()))
+    flagged = sorted(words & FLAGGED_WORDS)
+    positive, negative = len(words & POSITIVE_WORDS), len(words & NEGATIVE_WORDS)
+    return {
+        "valid": not flagged,
+        "reason": f"Flagged terms: {', '.join(flagged)}" if flagged else "Constructive comment",
+        "sentiment": "positive" if positive > negative else "negative" if negative > positive else "neutral",
+    }
+
+
+def moderation_reply(prompt: str) -> dict:
+    numbered = NUMBERED_LINE.findall(prompt)
+    if numbered:
+        return {"results": [{"id": int(n), **verdict(text)} for n, text in numbered]}
+    return verdict(prompt.split("Comment:", 1)[-1])
+
+
+def make_handler(config: StubConfig, rpm: Optional[int]):
+    bucket = {"level": float(rpm or 0), "updated": time.monotonic()}
+
+    def over_limit() -> Optional[float]:
+        """Seconds until the next request would be admitted, or None when under the limit."""
+        if not rpm:
+            return None
+        with config.lock:
+            now = time.monotonic()
+            bucket["level"] = min(rpm, bucket["level"] + (now - bucket["updated"]) * rpm / 60)
+            bucket["updated"] = now
+            if bucket["level"] < 1:
+                config.rate_limited += 1
+                return (1 - bucket["level"]) * 60 / rpm
+            bucket["level"] -= 1
+        return None
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.respond(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+            retry_after = over_limit()
+            if retry_after is not None:
+                self.respond(429, {"error": {"message": "Rate limit reached for requests", "type": "requests"}},
+                             {"Retry-After": f"{retry_after:.2f}"})
+                return
+            delay, outcome = config.roll()
+            time.sleep(delay)
+            if outcome == "hang":
+                self.close_connection = True
+                return
+            if outcome == "fail":
+                self.respond(503, {"error": {"message": "The server is overloaded"}})
+                return
+            try:
+                request = json.loads(body)
+                prompt = "\n".join(m.get("content", "") for m in request["messages"])
+            except (ValueError, KeyError, TypeError):
+                self.respond(400, {"error": {"message": "Invalid request body"}})
+                return
+
+            digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+            if (request.get("response_format") or {}).get("type") == "json_object":
+                content = json.dumps(moderation_reply(prompt))
+            else:
+                content = f"Stub insight {digest[:12]}: {len(prompt)} prompt chars."
+            with config.lock:
+                config.completions += 1
+            self.respond(200, {
+                "id": f"chatcmpl-{digest[:24]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "gpt-3.5-turbo"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 12,
+                          "total_tokens": len(prompt) // 4 + 12},
+            })
+
+        def respond(self, status: int, payload: dict, headers: Optional[dict] = None):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open hundreds of connections at once; the default backlog of 5 refuses them
+    request_queue_size = 512
+
+
+def start_openai_stub(config: Optional[StubConfig] = None, host: str = "127.0.0.1",
+                      port: int = 0, rpm: Optional[int] = None) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the stub in a daemon thread; returns (server, base_url ending in /v1)."""
+    config = config or StubConfig()
+    config.completions = 0
+    config.rate_limited = 0
+    server = StubServer((host, port), make_handler(config, rpm))
+    server.config = config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="response latency in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- latency jitter in ms")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--rpm", type=int, default=None, help="requests per minute before answering 429")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency, args.jitter, args.fail_rate, seed=args.seed)
+    server, base_url = start_openai_stub(config, args.host, args.port, args.rpm)
+    print(f"OpenAI stub serving completions at {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
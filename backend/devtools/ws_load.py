@@ -0,0 +1,278 @@
+"""
+WebSocket scale harness
+
+Starts the backend in a subprocess, opens N local /ws clients, drives pin
+and territory writes through the REST API at a fixed rate and reports:
+
+- server RSS per connected client
+- broadcast fan-out time per frame (from /api/ws/stats)
+- end-to-end delivery latency percentiles (REST call start -> client receive)
+
+Runs fully offline, either against a local MongoDB or the in-memory
+stand-in from devtools/memory_db.py.
+
+Usage (from backend/):
+    python devtools/ws_load.py --clients 2000 --rate 20 --duration 30 --memory-db
+    python devtools/ws_load.py --clients 5000 --mongo-url mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def read_rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+# ==========================================
+# SERVER SUBPROCESS
+# ==========================================
+def serve(args):
+    raise_fd_limit()
+    os.environ.setdefault('MONGO_URL', args.mongo_url)
+    os.environ.setdefault('DB_NAME', args.db_name)
+    # Keep the run offline and focused on WebSocket traffic
+    os.environ.setdefault('NEWS_INGEST_ENABLED', 'false')
+    import uvicorn
+    import server
+    if args.memory_db:
+        from devtools.memory_db import MemoryDatabase
+        server.db = MemoryDatabase()
+    uvicorn.run(server.app, host="127.0.0.1", port=args.port, log_level="warning", ws_max_size=16 * 1024 * 1024)
+
+
+# ==========================================
+# LOAD DRIVER
+# ==========================================
+class LoadRun:
+    def __init__(self, args, base_url: str):
+        self.args = args
+        self.base_url = base_url
+        self.ws_url = base_url.replace("http://", "ws://") + "/ws"
+        self.sent_at: Dict[str, float] = {}
+        self.latencies: List[float] = []
+        self.connected = 0
+        self.stop = asyncio.Event()
+
+    def record(self, message: str) -> Dict:
+        received = time.perf_counter()
+        frame = json.loads(message)
+        events = frame["batch"] if "batch" in frame else [frame]
+        for event in events:
+            data = event.get("data") or {}
+            marker = data.get("label") or data.get("name")
+            sent = self.sent_at.get(marker)
+            if sent is not None:
+                self.latencies.append(received - sent)
+        return frame
+
+    async def client(self, ready: asyncio.Semaphore):
+        import websockets
+        try:
+            async with websockets.connect(self.ws_url, max_size=None, ping_interval=None, open_timeout=30) as ws:
+                self.connected += 1
+                ready.release()
+                while not self.stop.is_set():
+                    try:
+                        message = await asyncio.wait_for(ws.recv(), timeout=0.5)
+                    except asyncio.TimeoutError:
+                        continue
+                    # Answer the app-level heartbeat like the frontend does, or the server reaps us
+                    if self.record(message).get("type") == "ping":
+                        await ws.send(json.dumps({"type": "pong"}))
+        except Exception as e:
+            ready.release()
+            if not self.stop.is_set():
+                print(f"⚠️ client error: {e}")
+
+    async def write(self, http, token: str, territory_id: str, i: int):
+        marker = f"ws-load-{i}"
+        headers = {"Authorization": f"Bearer {token}"}
+        self.sent_at[marker] = time.perf_counter()
+        if i % 2 == 0:
+            await http.post("/api/pins", headers=headers, json={
+                "location": {"lat": 23.03, "lng": 72.58},
+                "type": ["shop"],
+                "label": marker,
+                "territoryId": territory_id,
+            })
+        else:
+            await http.put(f"/api/territories/{territory_id}", headers=headers, json={"name": marker})
+
+    async def run(self, server_pid: int) -> Dict:
+        import httpx
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=60) as http:
+            email = f"ws-load-{uuid.uuid4().hex[:8]}@example.com"
+            resp = await http.post("/api/auth/signup", json={
+                "email": email, "password": "ws-load", "name": "WS Load", "role": "admin"})
+            resp.raise_for_status()
+            token = resp.json()["token"]
+            resp = await http.post("/api/territories", headers={"Authorization": f"Bearer {token}"}, json={
+                "name": "ws-load-territory", "city": "Ahmedabad", "pincode": "380001"})
+            resp.raise_for_status()
+            territory_id = resp.json()["id"]
+
+            rss_before = read_rss_kb(server_pid)
+            ready = asyncio.Semaphore(0)
+            clients = []
+            connect_started = time.perf_counter()
+            for start in range(0, self.args.clients, self.args.connect_batch):
+                batch = min(self.args.connect_batch, self.args.clients - start)
+                clients.extend(asyncio.create_task(self.client(ready)) for _ in range(batch))
+                for _ in range(batch):
+                    await ready.acquire()
+            connect_seconds = time.perf_counter() - connect_started
+            await asyncio.sleep(1)
+            rss_after = read_rss_kb(server_pid)
+
+            headers = {"Authorization": f"Bearer {token}"}
+            stats_before = (await http.get("/api/ws/stats", headers=headers)).json()
+
+            total_writes = int(self.args.rate * self.args.duration)
+            writes = []
+            started = time.perf_counter()
+            for i in range(total_writes):
+                delay = started + i / self.args.rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                writes.append(asyncio.create_task(self.write(http, token, territory_id, i)))
+            await asyncio.gather(*writes)
+
+            expected = total_writes * self.connected
+            deadline = time.perf_counter() + self.args.drain_timeout
+            while len(self.latencies) < expected and time.perf_counter() < deadline:
+                await asyncio.sleep(0.1)
+
+            stats_after = (await http.get("/api/ws/stats", headers=headers)).json()
+            self.stop.set()
+            await asyncio.gather(*clients, return_exceptions=True)
+
+        frames = stats_after["frames_sent"] - stats_before["frames_sent"]
+        fanout_total = stats_after["fanout_seconds_total"] - stats_before["fanout_seconds_total"]
+        return {
+            "clients_requested": self.args.clients,
+            "clients_connected": self.connected,
+            "connect_seconds": connect_seconds,
+            "rss_before_kb": rss_before,
+            "rss_after_kb": rss_after,
+            "writes": total_writes,
+            "frames": frames,
+            "fanout_ms_avg": fanout_total / frames * 1000 if frames else 0.0,
+            "fanout_ms_max": stats_after["fanout_ms_max"],
+            "deliveries_expected": expected,
+            "deliveries": len(self.latencies),
+            "latencies": self.latencies,
+        }
+
+
+def report(result: Dict):
+    lat_ms = [x * 1000 for x in result["latencies"]]
+    connected = max(result["clients_connected"], 1)
+    rss_delta = result["rss_after_kb"] - result["rss_before_kb"]
+    print()
+    print("WebSocket load report")
+    print("=" * 60)
+    print(f"clients connected      {result['clients_connected']}/{result['clients_requested']}"
+          f" in {result['connect_seconds']:.1f}s")
+    print(f"server RSS             {result['rss_before_kb'] / 1024:.1f} MB -> {result['rss_after_kb'] / 1024:.1f} MB"
+          f" ({rss_delta / connected:.1f} KB/connection)")
+    print(f"writes / frames        {result['writes']} / {result['frames']}")
+    print(f"fan-out per frame      avg {result['fanout_ms_avg']:.2f} ms, max {result['fanout_ms_max']:.2f} ms")
+    print(f"deliveries             {result['deliveries']}/{result['deliveries_expected']}")
+    if lat_ms:
+        print(f"delivery latency (ms)  p50 {percentile(lat_ms, 50):.1f}  p90 {percentile(lat_ms, 90):.1f}"
+              f"  p99 {percentile(lat_ms, 99):.1f}  max {max(lat_ms):.1f}  mean {statistics.mean(lat_ms):.1f}")
+
+
+def drive(args):
+    raise_fd_limit()
+    port = args.port or free_port()
+    cmd = [sys.executable, str(Path(__file__).resolve()), "serve", "--port", str(port),
+           "--mongo-url", args.mongo_url, "--db-name", args.db_name]
+    if args.memory_db:
+        cmd.append("--memory-db")
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR)}
+    proc = subprocess.Popen(cmd, cwd=str(BACKEND_DIR), env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for_server(base_url, proc)
+        result = asyncio.run(LoadRun(args, base_url).run(proc.pid))
+        report(result)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def wait_for_server(base_url: str, proc: subprocess.Popen, timeout: float = 30):
+    import httpx
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("server process exited during startup")
+        try:
+            if httpx.get(base_url + "/").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start in time")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", nargs="?", default="run", choices=["run", "serve"])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=10.0, help="writes per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of write traffic")
+    parser.add_argument("--connect-batch", type=int, default=200)
+    parser.add_argument("--drain-timeout", type=float, default=15.0)
+    parser.add_argument("--memory-db", action="store_true", help="use the in-memory MongoDB stand-in")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default=f"ws_load_{uuid.uuid4().hex[:8]}")
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.mode == "serve":
+        serve(args)
+    else:
+        drive(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+LLM Response Cache
+Two-tier cache for chat completions keyed by a SHA-256 of the model,
+messages and sampling parameters: an in-process LRU in front of an
+optional Mongo collection whose documents expire through a TTL index.
+Concurrent requests for the same key share one completion (single-flight).
+Only successful completions are stored; callers keep their own fallbacks.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Completions kept in process memory, and seconds a stored completion stays valid
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', '1000'))
+LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', '86400'))
+
+def completion_key(model: str, messages: List[Dict[str, str]], **params) -> str:
+    """Stable key for one completion request; equal inputs hash equal regardless of dict order."""
+    payload = json.dumps({"model": model, "messages": messages, "params": params},
+                         sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl: int = LLM_CACHE_TTL, name: str = "llm"):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.name = name
+        self.collection = None
+        # key -> (value, expires_at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.completions = 0
+        self.store_errors = 0
+
+    async def attach(self, collection):
+        """Back the cache with a Mongo collection (TTL-indexed on expiresAt)."""
+        self.collection = collection
+        # TTL indexes need BSON dates, so expiresAt is stored as a datetime, not an isoformat string
+        await collection.create_index("expiresAt", expireAfterSeconds=0)
+        await collection.create_index("key", unique=True)
+
+    def _remember(self, key: str, value: str, expires_at: datetime):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        now = datetime.now(timezone.utc)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] > now:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            del self._entries[key]
+        if self.collection is not None:
+            try:
+                # Mongo's TTL monitor only runs every minute; check expiry here as well
+                doc = await self.collection.find_one({"key": key}, {"_id": 0, "value": 1, "expiresAt": 1})
+            except Exception as e:
+                self.store_errors += 1
+                print(f"⚠️ LLM cache read failed: {e}")
+                doc = None
+            if doc is not None:
+                expires_at = doc["expiresAt"]
+                if expires_at.tzinfo is None:
+                    expires_at = expires_at.replace(tzinfo=timezone.utc)
+                if expires_at > now:
+                    self._remember(key, doc["value"], expires_at)
+                    self.store_hits += 1
+                    return doc["value"]
+        return None
+
+    async def set(self, key: str, value: str, model: Optional[str] = None):
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self.ttl)
+        self._remember(key, value, expires_at)
+        if self.collection is not None:
+            try:
+                await self.collection.update_one(
+                    {"key": key},
+                    {"$set": {"key": key, "value": value, "model": model, "createdAt": now, "expiresAt": expires_at}},
+                    upsert=True
+                )
+            except Exception as e:
+                self.store_errors += 1
+                print(f"⚠️ LLM cache write failed: {e}")
+
+    async def get_or_create(self, key: str, create: Callable[[], Awaitable[str]], model: Optional[str] = None) -> str:
+        """Cached completion for `key`, else `create()` once however many callers are waiting on it."""
+        value = await self.get(key)
+        if value is not None:
+            return value
+        self.misses += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.completions += 1
+            task = asyncio.create_task(self._create(key, create, model))
+            # Failures reach the waiting callers; don't also report them as unretrieved
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _create(self, key: str, create: Callable[[], Awaitable[str]], model: Optional[str]) -> str:
+        try:
+            value = await create()
+            await self.set(key, value, model)
+        finally:
+            # Dropped only once stored, so no caller can slip in between and call again
+            self._inflight.pop(key, None)
+        return value
+
+    def clear_memory(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.store_hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "persistent": self.collection is not None,
+            "memory_hits": self.memory_hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.store_hits) / lookups, 3) if lookups else 0.0,
+            "completions": self.completions,
+            "completions_in_flight": len(self._inflight),
+            "store_errors": self.store_errors,
+        }
+
+LLM_CACHE = LLMResponseCache()
@@ -0,0 +1,248 @@
+"""
+Outbound LLM Rate Limiter
+Shared limiter for OpenAI calls, keyed by API key: token buckets for
+requests and tokens per minute, a cap on in-flight calls, and a FIFO
+queue in which a call waits at most LLM_QUEUE_TIMEOUT seconds (or what is
+left of the request deadline) before failing with RateLimitTimeout.
+Calls answered with HTTP 429 are retried with jittered exponential
+backoff, honouring Retry-After when the API sends one.
+"""
+import asyncio
+import hashlib
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from resilience import CircuitBreaker, deadline_timeout
+
+# Per API key: requests and tokens per minute, and calls in flight at once
+LLM_RPM = float(os.environ.get('LLM_RPM', '60'))
+LLM_TPM = float(os.environ.get('LLM_TPM', '40000'))
+LLM_MAX_IN_FLIGHT = int(os.environ.get('LLM_MAX_IN_FLIGHT', '4'))
+# Seconds a call may wait for its turn before giving up
+LLM_QUEUE_TIMEOUT = float(os.environ.get('LLM_QUEUE_TIMEOUT', '10'))
+# Retries after a 429, and the backoff base / cap in seconds
+LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', '3'))
+LLM_RETRY_BASE = float(os.environ.get('LLM_RETRY_BASE', '0.5'))
+LLM_RETRY_MAX = float(os.environ.get('LLM_RETRY_MAX', '8'))
+# Recent queue waits kept per key for the percentiles in stats()
+WAIT_SAMPLES = 500
+
+class RateLimitTimeout(Exception):
+    """Raised when a call could not get a slot before its queue deadline."""
+
+def estimate_tokens(messages: Optional[List[Dict[str, Any]]], max_tokens: Optional[int] = None) -> int:
+    """Rough prompt + completion token count (~4 characters per token), enough for budgeting."""
+    prompt_chars = sum(len(str(m.get("content", ""))) for m in messages or [])
+    return prompt_chars // 4 + (max_tokens or 256)
+
+def is_rate_limited(error: BaseException) -> bool:
+    """HTTP 429 from either the openai SDK or a raw httpx call."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def _total_tokens(result: Any) -> Optional[int]:
+    usage = result.get("usage") if isinstance(result, dict) else getattr(result, "usage", None)
+    if usage is None:
+        return None
+    return usage.get("total_tokens") if isinstance(usage, dict) else getattr(usage, "total_tokens", None)
+
+class TokenBucket:
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (requests larger than the bucket wait for a full one)."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate) if self.rate > 0 else 0.0
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        self.level = min(self.capacity, self.level + amount)
+
+class _Throttled:
+    """A 429 passed through the breaker as a value, so throttling never opens it."""
+    def __init__(self, error: BaseException):
+        self.error = error
+
+class KeyLimiter:
+    def __init__(self, key_id: str, rpm: float = LLM_RPM, tpm: float = LLM_TPM,
+                 max_in_flight: int = LLM_MAX_IN_FLIGHT):
+        self.key_id = key_id
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.slots = asyncio.Semaphore(max_in_flight)
+        # asyncio.Lock wakes waiters in FIFO order, so the bucket queue is fair
+        self.queue = asyncio.Lock()
+        self.waiting = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.timeouts = 0
+        self.throttled = 0
+        self.retries = 0
+        self.wait_seconds_total = 0.0
+        self.waits: deque = deque(maxlen=WAIT_SAMPLES)
+
+    async def acquire(self, tokens: int, timeout: float):
+        """Wait for an in-flight slot and bucket capacity; RateLimitTimeout after `timeout` seconds."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        give_up = started + timeout
+        self.waiting += 1
+        try:
+            try:
+                await asyncio.wait_for(self.slots.acquire(), max(0.0, give_up - loop.time()))
+            except asyncio.TimeoutError:
+                raise RateLimitTimeout(f"no LLM slot for key {self.key_id} within {timeout:.1f}s")
+            try:
+                try:
+                    await asyncio.wait_for(self.queue.acquire(), max(0.0, give_up - loop.time()))
+                except asyncio.TimeoutError:
+                    raise RateLimitTimeout(f"LLM queue for key {self.key_id} did not move within {timeout:.1f}s")
+                try:
+                    while True:
+                        wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                        if wait <= 0:
+                            break
+                        if loop.time() + wait > give_up:
+                            raise RateLimitTimeout(f"LLM rate limit for key {self.key_id} needs {wait:.1f}s more")
+                        await asyncio.sleep(wait)
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                finally:
+                    self.queue.release()
+            except BaseException:
+                self.slots.release()
+                raise
+        except RateLimitTimeout:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+        waited = loop.time() - started
+        self.wait_seconds_total += waited
+        self.waits.append(waited)
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self.slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+        accepted = len(self.waits)
+        return {
+            "key": self.key_id,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "queue_timeouts": self.timeouts,
+            "rate_limited": self.throttled,
+            "retries": self.retries,
+            "requests_available": round(self.requests.level, 1),
+            "tokens_available": round(self.tokens.level),
+            "wait_ms": {
+                "avg": round(self.wait_seconds_total / self.calls * 1000, 1) if self.calls else 0.0,
+                "p50": round(waits[accepted // 2] * 1000, 1) if waits else 0.0,
+                "p95": round(waits[min(accepted - 1, int(accepted * 0.95))] * 1000, 1) if waits else 0.0,
+                "max": round(waits[-1] * 1000, 1) if waits else 0.0,
+            },
+        }
+
+class LLMLimiter:
+    def __init__(self, **limits):
+        self.limits = limits
+        self._keys: Dict[str, KeyLimiter] = {}
+
+    def for_key(self, api_key: str) -> KeyLimiter:
+        # Keys are tracked (and reported) by a short hash, never in the clear
+        key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+        limiter = self._keys.get(key_id)
+        if limiter is None:
+            limiter = self._keys[key_id] = KeyLimiter(key_id, **self.limits)
+        return limiter
+
+    async def call(self, api_key: str, fn: Callable[..., Awaitable[Any]], *args,
+                   breaker: Optional[CircuitBreaker] = None, timeout: Optional[float] = None,
+                   tokens: Optional[int] = None, queue_timeout: float = LLM_QUEUE_TIMEOUT, **kwargs) -> Any:
+        """
+        Run `fn(*args, **kwargs)` once the key's limits allow it, through
+        `breaker` when given. `tokens` defaults to an estimate from the
+        `messages` / `max_tokens` kwargs; the bucket is corrected from the
+        response's reported usage.
+        """
+        limiter = self.for_key(api_key)
+        if tokens is None:
+            tokens = estimate_tokens(kwargs.get("messages"), kwargs.get("max_tokens"))
+
+        async def attempt():
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if is_rate_limited(e):
+                    return _Throttled(e)
+                raise
+
+        for retry in range(LLM_MAX_RETRIES + 1):
+            await limiter.acquire(tokens, deadline_timeout(queue_timeout))
+            limiter.calls += 1
+            try:
+                if breaker is not None:
+                    result = await breaker.call(attempt, timeout=timeout)
+                elif timeout is not None:
+                    result = await asyncio.wait_for(attempt(), deadline_timeout(timeout))
+                else:
+                    result = await attempt()
+            finally:
+                limiter.release()
+
+            if not isinstance(result, _Throttled):
+                used = _total_tokens(result)
+                if used is not None and used < tokens:
+                    limiter.tokens.give_back(tokens - used)
+                return result
+
+            limiter.throttled += 1
+            if retry == LLM_MAX_RETRIES:
+                raise result.error
+            limiter.retries += 1
+            # Full jitter keeps a burst of throttled callers from retrying in lockstep
+            backoff = _retry_after(result.error) or random.uniform(0, min(LLM_RETRY_MAX, LLM_RETRY_BASE * 2 ** retry))
+            await asyncio.sleep(deadline_timeout(backoff))
+
+    def stats(self) -> Dict[str, Any]:
+        keys = [limiter.stats() for limiter in self._keys.values()]
+        return {
+            "limits": {
+                "rpm": self.limits.get("rpm", LLM_RPM),
+                "tpm": self.limits.get("tpm", LLM_TPM),
+                "max_in_flight": self.limits.get("max_in_flight", LLM_MAX_IN_FLIGHT),
+                "queue_timeout": LLM_QUEUE_TIMEOUT,
+            },
+            "keys": keys,
+        }
+
+LLM_LIMITER = LLMLimiter()
@@ -0,0 +1,381 @@
+"""
+Background News Ingestion
+Periodically scrapes Gujarat Samachar, stores tagged articles in the
+`articles` collection (deduplicated by link) and precomputes
+analyze_news_metrics outputs into `news_metrics` snapshot documents, so
+request paths read one indexed snapshot instead of scraping live.
+
+Scraping is incremental: listing pages are fetched with conditional GETs
+using the ETag/Last-Modified stored per page in `news_sources`, only
+headlines whose link hash has not been seen are classified, and
+snapshots are rescored from the stored per-article classifications.
+
+New articles then go through a body stage: their pages are fetched
+concurrently (per-host limit, retries, time budget), and title + full
+text are reclassified, so scores cover every headline on the scraped
+pages rather than the first five titles.
+
+Articles also carry a `localities` multikey field (locality names,
+territory names and pincodes mentioned in the text). Its index is the
+inverted index behind territory-specific news metrics: one indexed
+lookup per territory instead of scoring the whole city feed.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Any, Optional, Set, Tuple
+
+from news_scraper import (
+    NEWS_CLASSIFIER, NEWS_SCRAPE_CONCURRENCY, KeywordMatcher,
+    fetch_listing_page_async, fetch_article_bodies, listing_url, score_articles, scrape_news_metrics_async,
+)
+
+NEWS_INGEST_ENABLED = os.environ.get('NEWS_INGEST_ENABLED', 'true').lower() == 'true'
+# Seconds between ingestion runs
+NEWS_INGEST_INTERVAL = int(os.environ.get('NEWS_INGEST_INTERVAL', '900'))
+# Listing pages scraped per run; snapshots are kept for 1..NEWS_INGEST_PAGES
+NEWS_INGEST_PAGES = int(os.environ.get('NEWS_INGEST_PAGES', '5'))
+# Failed body fetches per article before it is scored from its headline only
+NEWS_ARTICLE_MAX_ATTEMPTS = int(os.environ.get('NEWS_ARTICLE_MAX_ATTEMPTS', '3'))
+
+# Territory news: lookback window (days) and matching articles needed before
+# territory-specific scores replace the city-wide ones
+NEWS_LOCALITY_WINDOW_DAYS = int(os.environ.get('NEWS_LOCALITY_WINDOW_DAYS', '30'))
+NEWS_LOCALITY_MIN_ARTICLES = int(os.environ.get('NEWS_LOCALITY_MIN_ARTICLES', '3'))
+
+# Ahmedabad areas indexed even before a territory is created for them
+# (ambiguous names such as "Satellite" are left to territory names)
+AHMEDABAD_LOCALITIES = [
+    "Ambawadi", "Bapunagar", "Bodakdev", "Bopal", "Chandkheda", "Chandlodia", "Ellisbridge",
+    "Ghatlodia", "Ghodasar", "Gomtipur", "Isanpur", "Jodhpur", "Juhapura", "Kalupur", "Khokhra",
+    "Maninagar", "Memnagar", "Motera", "Naranpura", "Naroda", "Navrangpura", "Nikol", "Odhav",
+    "Paldi", "Prahladnagar", "Ranip", "Sabarmati", "Sarkhej", "Science City", "Shahibaug",
+    "Shela", "SG Highway", "Thaltej", "Vastral", "Vastrapur", "Vatva", "Vejalpur",
+]
+PINCODE_PATTERN = re.compile(r"\b3[6-9]\d{4}\b")
+
+# Link hashes of articles already classified in the database (per process)
+SEEN_LINK_HASHES: Set[str] = set()
+_MAX_SEEN_LINK_HASHES = 100_000
+
+def link_hash(link: str) -> str:
+    return hashlib.sha1(link.encode("utf-8")).hexdigest()
+
+async def ensure_news_indexes(db):
+    await db.articles.create_index("link", unique=True)
+    await db.articles.create_index("linkHash")
+    await db.articles.create_index("localities")
+    await db.news_metrics.create_index("pages", unique=True)
+    await db.news_sources.create_index("page", unique=True)
+
+async def _unseen_link_hashes(db, hashes: Set[str]) -> Set[str]:
+    """Hashes with no classified article yet; known ones are cached in SEEN_LINK_HASHES."""
+    unknown = hashes - SEEN_LINK_HASHES
+    if not unknown:
+        return unknown
+    if len(SEEN_LINK_HASHES) > _MAX_SEEN_LINK_HASHES:
+        SEEN_LINK_HASHES.clear()
+    known = await db.articles.find(
+        {"linkHash": {"$in": list(unknown)}, "categories": {"$exists": True}}, {"_id": 0, "linkHash": 1}
+    ).to_list(None)
+    SEEN_LINK_HASHES.update(doc['linkHash'] for doc in known)
+    return unknown - SEEN_LINK_HASHES
+
+async def store_articles(db, page_headlines: Dict[int, List[Dict]], now: str) -> Tuple[int, int]:
+    """
+    Upsert scraped headlines into `articles`.
+    Only headlines with an unseen link hash are classified; returns
+    (articles inserted, articles classified).
+    """
+    hashes = {link_hash(h['link']) for headlines in page_headlines.values() for h in headlines}
+    unseen = await _unseen_link_hashes(db, hashes)
+    to_classify = {}
+    for headlines in page_headlines.values():
+        for headline in headlines:
+            h = link_hash(headline['link'])
+            if h in unseen:
+                to_classify.setdefault(h, headline['title'])
+    classifications = dict(zip(to_classify, NEWS_CLASSIFIER.classify_many(to_classify.values())))
+
+    updates = []
+    for page_num, headlines in page_headlines.items():
+        for position, headline in enumerate(headlines):
+            h = link_hash(headline['link'])
+            fields = {"page": page_num, "position": position, "lastSeenAt": now}
+            if h in classifications:
+                fields.update(title=headline['title'], linkHash=h, **classifications[h])
+            updates.append(db.articles.update_one(
+                {"link": headline['link']},
+                {
+                    "$set": fields,
+                    "$setOnInsert": {
+                        "id": str(uuid.uuid4()),
+                        "link": headline['link'],
+                        "firstSeenAt": now,
+                    },
+                },
+                upsert=True,
+            ))
+    results = await asyncio.gather(*updates)
+    SEEN_LINK_HASHES.update(classifications)
+    return sum(1 for r in results if r.upserted_id is not None), len(classifications)
+
+async def fetch_listing_pages(db, pages: int) -> Dict[int, Optional[Dict]]:
+    """Conditionally fetch listing pages 1..pages; None marks a failed page."""
+    sources = await db.news_sources.find({"page": {"$lte": pages}}, {"_id": 0}).to_list(None)
+    validators = {s['page']: s for s in sources}
+    semaphore = asyncio.Semaphore(NEWS_SCRAPE_CONCURRENCY)
+
+    async def fetch(page_num: int) -> Optional[Dict]:
+        source = validators.get(page_num, {})
+        async with semaphore:
+            return await fetch_listing_page_async(page_num, etag=source.get('etag'),
+                                                  last_modified=source.get('lastModified'))
+
+    results = await asyncio.gather(*(fetch(page) for page in range(1, pages + 1)))
+    return dict(zip(range(1, pages + 1), results))
+
+async def rescore_snapshots(db, pages: int, now: str) -> int:
+    """Recompute news_metrics snapshots for 1..pages from stored classifications."""
+    sources = await db.news_sources.find({"page": {"$lte": pages}}, {"_id": 0, "page": 1, "linkHashes": 1}).to_list(None)
+    page_hashes = {s['page']: s.get('linkHashes', []) for s in sources}
+    wanted = {h for hashes in page_hashes.values() for h in hashes}
+    if not wanted:
+        return 0
+    docs = await db.articles.find(
+        {"linkHash": {"$in": list(wanted)}}, {"_id": 0, "linkHash": 1, "title": 1, "tags": 1, "categories": 1}
+    ).to_list(None)
+    by_hash = {doc['linkHash']: doc for doc in docs}
+
+    articles: List[Dict] = []
+    for n in range(1, pages + 1):
+        articles.extend(by_hash[h] for h in page_hashes.get(n, []) if h in by_hash)
+        await db.news_metrics.update_one(
+            {"pages": n},
+            {"$set": {"pages": n, "metrics": score_articles(articles), "computedAt": now, "checkedAt": now}},
+            upsert=True,
+        )
+    return pages
+
+async def fetch_pending_bodies(db, pages: int, now: str) -> Dict[str, int]:
+    """
+    Fetch, classify and store bodies of listed articles that don't have one
+    yet. Only real failures use up an article's bodyAttempts; skipped fetches
+    (breaker open, deadline, budget) are retried next run.
+    """
+    sources = await db.news_sources.find({"page": {"$lte": pages}}, {"_id": 0, "linkHashes": 1}).to_list(None)
+    listed = list({h for s in sources for h in s.get('linkHashes', [])})
+    pending = await db.articles.find(
+        {
+            "linkHash": {"$in": listed},
+            "contentFetchedAt": {"$exists": False},
+            "$or": [{"bodyAttempts": {"$exists": False}}, {"bodyAttempts": {"$lt": NEWS_ARTICLE_MAX_ATTEMPTS}}],
+        },
+        {"_id": 0, "link": 1, "title": 1},
+    ).to_list(None)
+    if not pending:
+        return {"bodies_fetched": 0, "bodies_failed": 0, "bodies_skipped": 0}
+
+    bodies = await fetch_article_bodies(a['link'] for a in pending)
+    fetched = [a for a in pending if bodies.get(a['link'])]
+    failed = [a for a in pending if a['link'] in bodies and not bodies[a['link']]]
+    classifications = NEWS_CLASSIFIER.classify_many(f"{a['title']}\n{bodies[a['link']]}" for a in fetched)
+
+    updates = [
+        db.articles.update_one(
+            {"link": a['link']},
+            # Dropping localityVersion gets the body locality-indexed in this run
+            {"$set": {"content": bodies[a['link']], "contentFetchedAt": now, **classification},
+             "$unset": {"localityVersion": ""}},
+        )
+        for a, classification in zip(fetched, classifications)
+    ]
+    updates.extend(db.articles.update_one({"link": a['link']}, {"$inc": {"bodyAttempts": 1}}) for a in failed)
+    await asyncio.gather(*updates)
+    skipped = len(pending) - len(fetched) - len(failed)
+    return {"bodies_fetched": len(fetched), "bodies_failed": len(failed), "bodies_skipped": skipped}
+
+def normalize_locality(name: str) -> str:
+    return " ".join(name.lower().split())
+
+def territory_locality_terms(territory: Dict) -> List[str]:
+    """Index terms that identify a territory in news text."""
+    terms = [normalize_locality(territory.get('name') or '')]
+    if territory.get('pincode'):
+        terms.append(str(territory['pincode']).strip())
+    return [t for t in terms if t]
+
+class LocalityIndexer:
+    """Extracts the locality terms of an article; `version` changes with the vocabulary."""
+    def __init__(self, names: List[str]):
+        vocabulary = sorted({normalize_locality(n) for n in names if n and n.strip()})
+        self.version = hashlib.sha1("\n".join(vocabulary).encode("utf-8")).hexdigest()[:12]
+        self.matcher = KeywordMatcher(vocabulary)
+
+    def localities(self, text: str) -> List[str]:
+        return sorted(self.matcher.find(text) | set(PINCODE_PATTERN.findall(text or "")))
+
+async def build_locality_indexer(db) -> LocalityIndexer:
+    territories = await db.territories.find({}, {"_id": 0, "name": 1}).to_list(None)
+    return LocalityIndexer(AHMEDABAD_LOCALITIES + [t.get('name', '') for t in territories])
+
+async def index_article_localities(db, now: str) -> int:
+    """
+    (Re)build `localities` for articles in the lookback window not indexed
+    with the current vocabulary: new articles, newly fetched bodies, and
+    everything once a territory is created or renamed.
+    """
+    indexer = await build_locality_indexer(db)
+    cutoff = (datetime.fromisoformat(now) - timedelta(days=NEWS_LOCALITY_WINDOW_DAYS)).isoformat()
+    stale = await db.articles.find(
+        {"lastSeenAt": {"$gte": cutoff}, "localityVersion": {"$ne": indexer.version}},
+        {"_id": 0, "link": 1, "title": 1, "content": 1},
+    ).to_list(None)
+    await asyncio.gather(*(
+        db.articles.update_one(
+            {"link": a['link']},
+            {"$set": {
+                "localities": indexer.localities(f"{a.get('title', '')}\n{a.get('content') or ''}"),
+                "localityVersion": indexer.version,
+            }},
+        )
+        for a in stale
+    ))
+    return len(stale)
+
+async def get_territory_news_metrics(db, territory: Dict) -> Optional[Dict[str, Any]]:
+    """
+    News metrics scored from the articles mentioning this territory within
+    the lookback window, or None when too few match to be meaningful.
+    """
+    return (await get_territories_news_metrics(db, [territory]))[territory['id']]
+
+async def get_territories_news_metrics(db, territories: List[Dict]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    get_territory_news_metrics for many territories from a single articles
+    query, partitioned in memory by locality term.
+    """
+    terms = {t['id']: territory_locality_terms(t) for t in territories}
+    wanted = sorted({term for ts in terms.values() for term in ts})
+    if not wanted:
+        return {territory_id: None for territory_id in terms}
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=NEWS_LOCALITY_WINDOW_DAYS)).isoformat()
+    articles = await db.articles.find(
+        {"localities": {"$in": wanted}, "lastSeenAt": {"$gte": cutoff}},
+        {"_id": 0, "title": 1, "tags": 1, "categories": 1, "localities": 1},
+    ).sort("lastSeenAt", -1).to_list(None)
+    articles = [a for a in articles if 'categories' in a]
+
+    metrics = {}
+    for territory_id, territory_terms in terms.items():
+        matching = [a for a in articles if not set(territory_terms).isdisjoint(a.get('localities', ()))]
+        if not territory_terms or len(matching) < NEWS_LOCALITY_MIN_ARTICLES:
+            metrics[territory_id] = None
+        else:
+            metrics[territory_id] = {**score_articles(matching), "scope": "territory", "localities": territory_terms}
+    return metrics
+
+async def ingest_news(db, pages: int = NEWS_INGEST_PAGES) -> Dict[str, Any]:
+    """Conditionally scrape, store new articles and their bodies, and rescore the snapshots if anything changed."""
+    fetched = await fetch_listing_pages(db, pages)
+    now = datetime.now(timezone.utc).isoformat()
+
+    # A 200 without headlines (layout change) is treated like a failed page
+    changed = {page: r for page, r in fetched.items() if r is not None and r['headlines']}
+    not_modified = sum(1 for r in fetched.values() if r is not None and r['not_modified'])
+    page_headlines = {page: r['headlines'] for page, r in changed.items()}
+    stats = {
+        "articles_seen": sum(len(h) for h in page_headlines.values()),
+        "articles_new": 0,
+        "articles_classified": 0,
+        "pages_not_modified": not_modified,
+        "bodies_fetched": 0,
+        "bodies_failed": 0,
+        "bodies_skipped": 0,
+        "articles_localized": 0,
+        "snapshots": 0,
+    }
+
+    if not changed and not not_modified:
+        # Site down or layout changed - keep serving the last good snapshots
+        print("⚠️ News ingestion scraped no headlines; keeping previous snapshots")
+        return stats
+
+    if changed:
+        stats["articles_new"], stats["articles_classified"] = await store_articles(db, page_headlines, now)
+        for page, result in changed.items():
+            await db.news_sources.update_one(
+                {"page": page},
+                {"$set": {
+                    "page": page,
+                    "url": listing_url(page),
+                    "etag": result['etag'],
+                    "lastModified": result['last_modified'],
+                    "linkHashes": [link_hash(h['link']) for h in result['headlines']],
+                    "fetchedAt": now,
+                }},
+                upsert=True,
+            )
+
+    # Also picks up bodies a previous run ran out of budget for
+    stats.update(await fetch_pending_bodies(db, pages, now))
+    stats["articles_localized"] = await index_article_localities(db, now)
+
+    snapshots_complete = await db.news_metrics.count_documents({"pages": {"$lte": pages}}) == pages
+    if not changed and not stats["bodies_fetched"] and snapshots_complete:
+        # Nothing changed upstream; just record that the snapshots were rechecked
+        await db.news_metrics.update_many({"pages": {"$lte": pages}}, {"$set": {"checkedAt": now}})
+        return stats
+
+    stats["snapshots"] = await rescore_snapshots(db, pages, now)
+    return stats
+
+async def get_news_metrics_snapshot(db, pages: int) -> Optional[Dict[str, Any]]:
+    """Latest precomputed metrics for `pages` listing pages, or None."""
+    doc = await db.news_metrics.find_one({"pages": pages}, {"_id": 0})
+    if not doc:
+        return None
+    return {**doc['metrics'], "computedAt": doc['computedAt']}
+
+async def load_news_metrics(db, pages: int) -> Dict[str, Any]:
+    """
+    Serve the snapshot; scrape live only before the first ingestion run.
+    A live scrape that got nothing raises NewsUnavailable, so caches keep
+    their last good value instead of neutral zero-article scores.
+    """
+    snapshot = await get_news_metrics_snapshot(db, pages)
+    if snapshot is not None:
+        return snapshot
+    return await scrape_news_metrics_async(pages=pages)
+
+async def snapshot_age_seconds(db) -> Optional[float]:
+    """Seconds since the snapshots were last computed or confirmed unchanged."""
+    doc = await db.news_metrics.find_one({"pages": 1}, {"computedAt": 1, "checkedAt": 1})
+    if not doc:
+        return None
+    checked = datetime.fromisoformat(doc.get('checkedAt') or doc['computedAt'])
+    return (datetime.now(timezone.utc) - checked).total_seconds()
+
+async def run_ingestion_loop(db, interval: int = NEWS_INGEST_INTERVAL, pages: int = NEWS_INGEST_PAGES,
+                             lock: Optional[Callable[[str, float], Awaitable[bool]]] = None):
+    """
+    Ingest forever; every worker runs this, so skip runs another worker just
+    did. `lock(name, seconds)`, a lock shared by the workers, keeps two
+    workers from ingesting at the same time.
+    """
+    await ensure_news_indexes(db)
+    while True:
+        try:
+            age = await snapshot_age_seconds(db)
+            if (age is None or age >= interval / 2) and (lock is None or await lock("news_ingestion", interval / 2)):
+                result = await ingest_news(db, pages)
+                print(f"📰 News ingestion: {result['articles_new']} new of {result['articles_seen']} articles, "
+                      f"{result['bodies_fetched']} bodies fetched, {result['pages_not_modified']} pages not modified")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"News ingestion error: {e}")
+        await asyncio.sleep(interval)
@@ -1,8 +1,36 @@
-import requests
-from bs4 import BeautifulSoup
-import time
-import json
-from typing import Dict, List, Any
+import asyncio
+import os
+import random
+import re
+import string
+import httpx
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import Dict, List, Any, Optional, Iterable, Set, Tuple
+from urllib.parse import urlsplit
+
+from resilience import CircuitOpenError, DeadlineExceeded, deadline_timeout, get_breaker
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:  # optional fast path; falls back to SoupStrainer parsing
+    lxml = None
+
+# Overridable so scrapes can run against devtools/news_stub.py
+BASE_URL = os.environ.get('NEWS_BASE_URL', 'https://english.gujaratsamachar.com').rstrip('/')
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+REQUEST_TIMEOUT = 10.0
+# Maximum listing/article pages fetched at once
+NEWS_SCRAPE_CONCURRENCY = int(os.environ.get('NEWS_SCRAPE_CONCURRENCY', '4'))
+# Article body fetching: concurrent requests per host, retries per article and
+# the wall-time budget (seconds) for one batch; unfinished bodies wait for the next run
+NEWS_ARTICLE_HOST_CONCURRENCY = int(os.environ.get('NEWS_ARTICLE_HOST_CONCURRENCY', '4'))
+NEWS_ARTICLE_RETRIES = int(os.environ.get('NEWS_ARTICLE_RETRIES', '2'))
+NEWS_ARTICLE_BUDGET = float(os.environ.get('NEWS_ARTICLE_BUDGET', '10'))
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Open while the news site keeps failing; scrapes then return nothing at once
+NEWS_SITE_BREAKER = get_breaker("news_site")
 
 # Keyword Tags for Classification
 KEYWORD_TAGS = [
@@ -21,110 +49,335 @@ KEYWORD_TAGS = [
     "property", "real estate", "housing", "apartment", "rent", "lease"
 ]
 
+# Keywords counted towards each news metric
+CATEGORY_KEYWORDS = {
+    'crime': ['crime', 'criminal', 'police', 'arrest', 'theft', 'robbery'],
+    'investment': ['investment', 'invest', 'business', 'startup', 'entrepreneur'],
+    'job': ['job', 'employment', 'hiring', 'recruitment'],
+    'property': ['property', 'real estate', 'housing', 'apartment', 'rent'],
+    'infrastructure': ['infrastructure', 'construction', 'development', 'project'],
+}
+
+# Punctuation and digits become word separators when tokenizing
+_TOKEN_SEPARATORS = str.maketrans({c: " " for c in string.punctuation + string.digits})
+# Simple inflections a keyword may carry ("arrest" -> "arrested")
+_INFLECTIONS = ("s", "es", "ed", "ing")
+
+class NewsUnavailable(Exception):
+    """Raised when a live scrape got no headlines (site down, breaker open or layout change)."""
+
+class KeywordMatcher:
+    """
+    Matches a fixed keyword set in one pass over a text.
+    The text is tokenized once and every inflected keyword form is looked up
+    in a precompiled frozenset; multi-word keywords go through one compiled
+    regex, only when their first word occurs. Matches are whole words, so
+    "arrested" hits "arrest" but "said" no longer hits "AI".
+    """
+    def __init__(self, keywords: Iterable[str]):
+        terms = {kw.lower() for kw in keywords}
+        words = sorted(t for t in terms if " " not in t)
+        # Exact keywords first, then inflections. A form that is both a keyword and
+        # another keyword's inflection ("crimes") maps to both, so the result never
+        # depends on set iteration (hash seed) order
+        base_forms: Dict[str, List[str]] = {term: [term] for term in words}
+        for term in words:
+            for suffix in _INFLECTIONS:
+                bases = base_forms.setdefault(term + suffix, [])
+                if term not in bases:
+                    bases.append(term)
+        self.base_forms: Dict[str, Tuple[str, ...]] = {form: tuple(bases) for form, bases in base_forms.items()}
+        self.forms = frozenset(self.base_forms)
+        phrases = sorted((t for t in terms if " " in t), key=len, reverse=True)
+        self.phrase_first_words = frozenset(p.split()[0] for p in phrases)
+        self.phrase_regex = re.compile(
+            r"\b(" + "|".join(r"\s+".join(map(re.escape, p.split())) for p in phrases) + r")(?:s|es|ed|ing)?\b"
+        ) if phrases else None
+
+    def find(self, text: str) -> Set[str]:
+        """Lowercased keywords present in text."""
+        if not text:
+            return set()
+        normalized = text.lower().translate(_TOKEN_SEPARATORS)
+        tokens = normalized.split()
+        base_forms = self.base_forms
+        found = {base for t in self.forms.intersection(tokens) for base in base_forms[t]}
+        if self.phrase_regex is not None and not self.phrase_first_words.isdisjoint(tokens):
+            found.update(" ".join(m.split()) for m in self.phrase_regex.findall(normalized))
+        return found
+
+    def find_many(self, texts: Iterable[str]) -> List[Set[str]]:
+        """Keywords per text, for large batches of headlines or article bodies."""
+        find = self.find
+        return [find(text) for text in texts]
+
+class NewsClassifier:
+    """Tags and metric categories for headlines/articles from one compiled matcher."""
+    def __init__(self, tags: List[str] = KEYWORD_TAGS, categories: Dict[str, List[str]] = CATEGORY_KEYWORDS):
+        self.tag_for: Dict[str, str] = {tag.lower(): tag for tag in tags}
+        self.categories_for: Dict[str, List[str]] = {}
+        for category, keywords in categories.items():
+            for kw in keywords:
+                self.categories_for.setdefault(kw.lower(), []).append(category)
+        self.matcher = KeywordMatcher(list(self.tag_for) + list(self.categories_for))
+
+    def _result(self, terms: Set[str]) -> Dict[str, List[str]]:
+        tags = {self.tag_for[t] for t in terms if t in self.tag_for}
+        categories = {c for t in terms for c in self.categories_for.get(t, ())}
+        return {"tags": sorted(tags), "categories": sorted(categories)}
+
+    def classify(self, text: str) -> Dict[str, List[str]]:
+        return self._result(self.matcher.find(text))
+
+    def classify_many(self, texts: Iterable[str]) -> List[Dict[str, List[str]]]:
+        return [self._result(terms) for terms in self.matcher.find_many(texts)]
+
+NEWS_CLASSIFIER = NewsClassifier()
+
 def extract_tags(text: str) -> List[str]:
     """Extract matching tags from title or content."""
     if not text:
         return []
-    
-    text_lower = text.lower()
-    found_tags = []
-    
-    for tag in KEYWORD_TAGS:
-        if tag.lower() in text_lower:
-            found_tags.append(tag)
-    
-    return sorted(list(set(found_tags)))
+    return NEWS_CLASSIFIER.classify(text)["tags"]
 
-def scrape_gujarat_samachar_page(page_num: int) -> List[Dict]:
-    """Scrape headlines from a single Gujarat Samachar city page."""
-    url = f"https://english.gujaratsamachar.com/city/all/{page_num}"
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+# ==========================================
+# HTML PARSING
+# ==========================================
+# "auto" uses lxml when installed, "soup" forces BeautifulSoup + SoupStrainer
+NEWS_HTML_PARSER = os.environ.get('NEWS_HTML_PARSER', 'auto')
+USE_LXML = lxml is not None and NEWS_HTML_PARSER != 'soup'
 
+LISTING_LINK_CLASS = "theme-link list-news-title"
+_LISTING_STRAINER = SoupStrainer("a", class_=LISTING_LINK_CLASS)
+_ARTICLE_STRAINER = SoupStrainer("p")
+
+def _listing_headline(title: Optional[str], link: Optional[str]) -> Optional[Dict]:
+    title = (title or "").strip()
+    link = (link or "").strip()
+    if not link.startswith("http"):
+        link = BASE_URL + link
+    return {"title": title, "link": link} if title else None
+
+def _article_text(paragraphs) -> Optional[str]:
+    article_text = " ".join(p for p in paragraphs if p).strip()
+    return article_text if article_text else None
+
+def parse_listing_page_soup(html: str) -> List[Dict]:
+    # Only the headline anchors are built into the tree
+    soup = BeautifulSoup(html, "html.parser", parse_only=_LISTING_STRAINER)
+    headlines = (_listing_headline(a.get("title"), a.get("href")) for a in soup.find_all("a"))
+    return [h for h in headlines if h]
+
+def _lxml_root(html: str):
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"⚠️ Error loading page {page_num}: {e}")
-        return []
+        return lxml.html.document_fromstring(html)
+    except (lxml.etree.ParserError, ValueError):  # empty document / encoding declaration
+        return None
+
+def parse_listing_page_lxml(html: str) -> List[Dict]:
+    root = _lxml_root(html)
+    if root is None:
+        return parse_listing_page_soup(html)
+    anchors = root.xpath("//a[@class=$cls]", cls=LISTING_LINK_CLASS)
+    headlines = (_listing_headline(a.get("title"), a.get("href")) for a in anchors)
+    return [h for h in headlines if h]
+
+def parse_article_content_soup(html: str) -> Optional[str]:
+    soup = BeautifulSoup(html, "html.parser", parse_only=_ARTICLE_STRAINER)
+    return _article_text(
+        p.get_text(strip=True) for p in soup.find_all("p")
+        if "advertisement" not in " ".join(p.get("class", [])).lower()
+    )
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    headlines = []
+def parse_article_content_lxml(html: str) -> Optional[str]:
+    root = _lxml_root(html)
+    if root is None:
+        return parse_article_content_soup(html)
+    # Same text as get_text(strip=True): stripped text pieces joined without separators
+    return _article_text(
+        "".join(piece.strip() for piece in p.itertext())
+        for p in root.iter("p")
+        if "advertisement" not in (p.get("class") or "").lower()
+    )
 
-    for a_tag in soup.find_all("a", class_="theme-link list-news-title"):
-        title = a_tag.get("title", "").strip()
-        link = a_tag.get("href", "").strip()
+def parse_listing_page(html: str) -> List[Dict]:
+    """Extract headline titles and links from a listing page."""
+    return parse_listing_page_lxml(html) if USE_LXML else parse_listing_page_soup(html)
 
-        if not link.startswith("http"):
-            link = "https://english.gujaratsamachar.com" + link
+def parse_article_content(html: str) -> Optional[str]:
+    """Extract article text from an article page."""
+    return parse_article_content_lxml(html) if USE_LXML else parse_article_content_soup(html)
 
-        if title:
-            headlines.append({"title": title, "link": link})
+# ==========================================
+# ASYNC SCRAPING
+# ==========================================
+_http_client: Optional[httpx.AsyncClient] = None
 
-    return headlines
+def get_http_client() -> httpx.AsyncClient:
+    """Shared connection-pooled client for the server's event loop."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = new_http_client()
+    return _http_client
+
+def new_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        headers=HEADERS,
+        timeout=REQUEST_TIMEOUT,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=NEWS_SCRAPE_CONCURRENCY * 2,
+                            max_keepalive_connections=NEWS_SCRAPE_CONCURRENCY),
+    )
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def listing_url(page_num: int) -> str:
+    return f"{BASE_URL}/city/all/{page_num}"
+
+async def _site_get(client: httpx.AsyncClient, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    """GET through the news-site circuit breaker; 429/5xx answers count as failures."""
+    async def get() -> httpx.Response:
+        response = await client.get(url, headers=headers)
+        if response.status_code in RETRY_STATUSES:
+            raise httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request, response=response)
+        return response
+    return await NEWS_SITE_BREAKER.call(get, timeout=REQUEST_TIMEOUT)
+
+async def fetch_listing_page_async(page_num: int, client: Optional[httpx.AsyncClient] = None,
+                                   etag: Optional[str] = None, last_modified: Optional[str] = None) -> Optional[Dict]:
+    """
+    Conditional GET of one listing page.
+    Returns {"not_modified", "headlines", "etag", "last_modified"}; headlines
+    are only parsed on a 200. None when the request fails.
+    """
+    client = client or get_http_client()
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
 
-def scrape_article_content(url: str) -> str:
-    """Extract full article text from a news URL."""
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"⚠️ Error fetching {url}: {e}")
+        response = await _site_get(client, listing_url(page_num), headers)
+        if response.status_code != 304:
+            response.raise_for_status()
+    except CircuitOpenError:
+        return None
+    except (httpx.HTTPError, asyncio.TimeoutError) as e:
+        print(f"⚠️ Error loading page {page_num}: {e!r}")
         return None
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    if response.status_code == 304:
+        return {"not_modified": True, "headlines": None, "etag": etag, "last_modified": last_modified}
+    return {
+        "not_modified": False,
+        # Parsing is CPU-bound; keep it off the event loop
+        "headlines": await asyncio.to_thread(parse_listing_page, response.text),
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+    }
 
-    paragraphs = soup.find_all("p")
-    content = []
-    for p in paragraphs:
-        text = p.get_text(strip=True)
-        if text and "advertisement" not in " ".join(p.get("class", [])).lower():
-            content.append(text)
+async def scrape_gujarat_samachar_page_async(page_num: int, client: Optional[httpx.AsyncClient] = None) -> List[Dict]:
+    """Scrape headlines from a single Gujarat Samachar city page."""
+    result = await fetch_listing_page_async(page_num, client)
+    return result["headlines"] if result else []
 
-    article_text = " ".join(content).strip()
-    return article_text if article_text else None
+async def _get_with_retries(client: httpx.AsyncClient, url: str, retries: int) -> Optional[httpx.Response]:
+    """
+    GET with exponential backoff and jitter on transport errors, 429 and 5xx.
+    None when the site answered with an error or every attempt failed.
+    CircuitOpenError / DeadlineExceeded propagate: the site was not (fully)
+    tried, so callers must not count that as a failed fetch.
+    """
+    error: Any = None
+    for attempt in range(retries + 1):
+        try:
+            if attempt:
+                await asyncio.sleep(deadline_timeout(RETRY_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)))
+            response = await _site_get(client, url)
+        except (CircuitOpenError, DeadlineExceeded):
+            # No point retrying until the breaker probes again / past the deadline
+            raise
+        except (httpx.TransportError, httpx.HTTPStatusError, asyncio.TimeoutError) as e:
+            error = e
+            continue
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            error = e
+            break
+        return response
+    print(f"⚠️ Error fetching {url}: {error!r}")
+    return None
 
-def analyze_news_metrics(pages: int = 2) -> Dict[str, Any]:
-    """Scrape and analyze news for territory metrics."""
-    crime_count = 0
-    investment_count = 0
-    job_count = 0
-    property_count = 0
-    infrastructure_count = 0
-    total_articles = 0
-    
-    all_articles = []
+async def scrape_article_content_async(url: str, client: Optional[httpx.AsyncClient] = None,
+                                       retries: int = 0) -> Optional[str]:
+    """Extract full article text from a news URL; raises CircuitOpenError / DeadlineExceeded when skipped."""
+    response = await _get_with_retries(client or get_http_client(), url, retries)
+    if response is None:
+        return None
+    return await asyncio.to_thread(parse_article_content, response.text)
+
+async def fetch_article_bodies(urls: Iterable[str], client: Optional[httpx.AsyncClient] = None,
+                               budget: float = NEWS_ARTICLE_BUDGET) -> Dict[str, Optional[str]]:
+    """
+    Fetch article bodies concurrently, at most NEWS_ARTICLE_HOST_CONCURRENCY
+    per host, with retries. Returns {url: text or None if it failed}. Skipped
+    URLs are left out: those still in flight when the budget runs out, and
+    those not requested because the breaker is open or the deadline passed.
+    """
+    client = client or get_http_client()
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def fetch(url: str) -> Optional[str]:
+        host = urlsplit(url).netloc
+        limit = host_limits.setdefault(host, asyncio.Semaphore(NEWS_ARTICLE_HOST_CONCURRENCY))
+        async with limit:
+            return await scrape_article_content_async(url, client, retries=NEWS_ARTICLE_RETRIES)
+
+    tasks = {url: asyncio.create_task(fetch(url)) for url in dict.fromkeys(urls)}
+    if not tasks:
+        return {}
+    done, pending = await asyncio.wait(tasks.values(), timeout=budget)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    return {url: task.result() for url, task in tasks.items() if task in done and task.exception() is None}
+
+async def scrape_pages(pages: int, client: Optional[httpx.AsyncClient] = None) -> List[List[Dict]]:
+    """Fetch listing pages 1..pages concurrently, at most NEWS_SCRAPE_CONCURRENCY at a time."""
+    client = client or get_http_client()
+    semaphore = asyncio.Semaphore(NEWS_SCRAPE_CONCURRENCY)
+
+    async def fetch(page_num: int) -> List[Dict]:
+        async with semaphore:
+            return await scrape_gujarat_samachar_page_async(page_num, client)
+
+    return await asyncio.gather(*(fetch(page) for page in range(1, pages + 1)))
+
+def compute_news_metrics(pages_headlines: List[List[Dict]]) -> Dict[str, Any]:
+    """Score scraped headlines (one list per listing page) into territory metrics."""
+    headlines = [h for page in pages_headlines for h in page]
+    classifications = NEWS_CLASSIFIER.classify_many(h['title'] for h in headlines)
+    return score_articles([{'title': h['title'], **c} for h, c in zip(headlines, classifications)])
+
+def score_articles(articles: List[Dict]) -> Dict[str, Any]:
+    """Turn classified articles ({title, tags, categories}) into 0-10 metric scores."""
+    counts = {category: 0 for category in CATEGORY_KEYWORDS}
+    for article in articles:
+        for category in article['categories']:
+            counts[category] += 1
     
-    try:
-        for page in range(1, pages + 1):
-            headlines = scrape_gujarat_samachar_page(page)
-            
-            for headline in headlines[:5]:  # Limit to 5 per page for speed
-                total_articles += 1
-                title = headline['title'].lower()
-                
-                # Extract tags
-                tags = extract_tags(headline['title'])
-                
-                # Count keywords
-                if any(kw in title for kw in ['crime', 'criminal', 'police', 'arrest', 'theft', 'robbery']):
-                    crime_count += 1
-                if any(kw in title for kw in ['investment', 'invest', 'business', 'startup', 'entrepreneur']):
-                    investment_count += 1
-                if any(kw in title for kw in ['job', 'employment', 'hiring', 'recruitment']):
-                    job_count += 1
-                if any(kw in title for kw in ['property', 'real estate', 'housing', 'apartment', 'rent']):
-                    property_count += 1
-                if any(kw in title for kw in ['infrastructure', 'construction', 'development', 'project']):
-                    infrastructure_count += 1
-                
-                all_articles.append({
-                    'title': headline['title'],
-                    'tags': tags
-                })
-                
-    except Exception as e:
-        print(f"News scraping error: {e}")
+    total_articles = len(articles)
+    crime_count = counts['crime']
+    investment_count = counts['investment']
+    job_count = counts['job']
+    property_count = counts['property']
+    infrastructure_count = counts['infrastructure']
     
     # Calculate scores (0-10 scale)
     if total_articles > 0:
@@ -171,5 +424,42 @@ def analyze_news_metrics(pages: int = 2) -> Dict[str, Any]:
         'job_mentions': job_count,
         'property_mentions': property_count,
         'infrastructure_mentions': infrastructure_count,
-        'articles': all_articles
+        'articles': [{'title': a['title'], 'tags': a['tags']} for a in articles]
     }
+
+async def scrape_news_metrics_async(pages: int = 2, client: Optional[httpx.AsyncClient] = None) -> Dict[str, Any]:
+    """Scrape and analyze news for territory metrics; NewsUnavailable rather than scoring zero articles."""
+    pages_headlines = await scrape_pages(pages, client)
+    if not any(pages_headlines):
+        raise NewsUnavailable(f"no headlines from {pages} listing page(s)")
+    return compute_news_metrics(pages_headlines)
+
+async def analyze_news_metrics_async(pages: int = 2, client: Optional[httpx.AsyncClient] = None) -> Dict[str, Any]:
+    """Scrape and analyze news for territory metrics (neutral scores when nothing could be scraped)."""
+    try:
+        return await scrape_news_metrics_async(pages, client)
+    except Exception as e:
+        print(f"News scraping error: {e}")
+    return compute_news_metrics([])
+
+# ==========================================
+# SYNC WRAPPERS (scripts only - never call from the server's event loop)
+# ==========================================
+async def _with_client(coro_fn, *args):
+    async with new_http_client() as client:
+        return await coro_fn(*args, client=client)
+
+def scrape_gujarat_samachar_page(page_num: int) -> List[Dict]:
+    """Scrape headlines from a single Gujarat Samachar city page."""
+    return asyncio.run(_with_client(scrape_gujarat_samachar_page_async, page_num))
+
+def scrape_article_content(url: str) -> Optional[str]:
+    """Extract full article text from a news URL."""
+    try:
+        return asyncio.run(_with_client(scrape_article_content_async, url))
+    except (CircuitOpenError, DeadlineExceeded):
+        return None
+
+def analyze_news_metrics(pages: int = 2) -> Dict[str, Any]:
+    """Scrape and analyze news for territory metrics."""
+    return asyncio.run(_with_client(analyze_news_metrics_async, pages))
@@ -0,0 +1,154 @@
+"""
+Outbound Call Resilience
+Circuit breakers for external integrations (news site, pincode API,
+OpenAI) and a per-request deadline that caps the timeout of every
+outbound call made while handling one request.
+
+A breaker opens after `failure_threshold` consecutive failures; while
+open, calls fail immediately with CircuitOpenError so callers can serve
+their last known snapshot. After `reset_timeout` seconds one probe call
+is let through (half-open): success closes the breaker, failure reopens
+it.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Consecutive failures before a breaker opens, and seconds until it probes again
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_RESET_TIMEOUT = float(os.environ.get('BREAKER_RESET_TIMEOUT', '30'))
+# Seconds one API request may spend on outbound calls in total
+REQUEST_DEADLINE = float(os.environ.get('REQUEST_DEADLINE', '15'))
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an integration whose breaker is open."""
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when the current request's outbound time budget is spent."""
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+@contextmanager
+def request_deadline(seconds: float = REQUEST_DEADLINE):
+    """Outbound calls inside this block share a budget of `seconds` (nested deadlines only shrink it)."""
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def deadline_timeout(timeout: Optional[float]) -> Optional[float]:
+    """`timeout` capped to what is left of the current request deadline; None if neither is set."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return remaining if timeout is None else min(timeout, remaining)
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.rejected_total = 0
+        self.failures_total = 0
+        self.opened_total = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only one probe at a time."""
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected_total += 1
+        return False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.failures_total += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state == self.HALF_OPEN:
+                print(f"⚠️ Circuit '{self.name}' probe failed; staying open")
+            elif self.state == self.CLOSED:
+                self.opened_total += 1
+                print(f"⚠️ Circuit '{self.name}' opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run `fn` through the breaker, bounded by `timeout` and the request
+        deadline. Exceptions and timeouts count as failures, except a
+        timeout caused by the request deadline (raised as DeadlineExceeded).
+        """
+        # Checked first so an expired deadline never uses up the half-open probe
+        limit = deadline_timeout(timeout)
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            if limit is None:
+                result = await fn(*args, **kwargs)
+            else:
+                result = await asyncio.wait_for(fn(*args, **kwargs), limit)
+        except asyncio.CancelledError:
+            self._probing = False
+            raise
+        except asyncio.TimeoutError:
+            self._probing = False
+            if limit is not None and (timeout is None or limit < timeout):
+                # Our request ran out of time; that says nothing about the integration
+                raise DeadlineExceeded("request deadline exceeded")
+            self.record_failure()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "failures_total": self.failures_total,
+            "opened_total": self.opened_total,
+            "rejected_total": self.rejected_total,
+        }
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Process-wide breaker for one integration, created on first use."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name, **kwargs)
+    return breaker
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
@@ -1,9 +1,15 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, Query
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 import os
+import asyncio
+import time
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
@@ -16,10 +22,29 @@ import re
 import numpy as np
 from openai import AsyncOpenAI
 import json
+import hashlib
 import secrets
-from collections import defaultdict
+from collections import defaultdict, deque
+from urllib.parse import urlsplit
 import httpx
-from ai_sentiment_analyzer import analyze_territory_intelligence
+try:
+    import msgpack
+except ImportError:  # MessagePack frames are optional
+    msgpack = None
+from ai_sentiment_analyzer import (
+    OPENAI_BASE_URL, SENTIMENT_MATCH_MODE, analyze_territory_intelligence, keyword_counts, sentiment_increment,
+    territory_content_inputs, territory_content_summary, texts_document_frequencies, texts_keyword_counts,
+    texts_sentiment_summary, top_keyword_candidates, top_keywords_tfidf,
+)
+from news_scraper import NewsUnavailable, close_http_client, score_articles
+from news_ingestion import (
+    NEWS_INGEST_ENABLED, run_ingestion_loop, load_news_metrics, get_territory_news_metrics, get_territories_news_metrics,
+)
+from swr_cache import StaleWhileRevalidateCache
+from llm_cache import LLM_CACHE
+from llm_limiter import LLM_LIMITER
+from analysis_pool import ANALYSIS_POOL, AnalysisUnavailable
+from resilience import REQUEST_DEADLINE, CircuitOpenError, DeadlineExceeded, breaker_stats, get_breaker, request_deadline
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -35,23 +60,317 @@ JWT_ALGORITHM = 'HS256'
 app = FastAPI(title="R Territory - Ahmedabad")
 api_router = APIRouter(prefix="/api")
 
+logger = logging.getLogger(__name__)
+
+# Coalescing window for WebSocket broadcasts (0 = send every event immediately)
+WS_COALESCE_MS = int(os.environ.get('WS_COALESCE_MS', '0'))
+# Number of recent frames kept in memory for ?since= replay
+WS_REPLAY_BUFFER = int(os.environ.get('WS_REPLAY_BUFFER', '1000'))
+# Also keep frames in a capped collection so replay survives restarts
+WS_REPLAY_PERSIST = os.environ.get('WS_REPLAY_PERSIST', 'false').lower() == 'true'
+WS_REPLAY_COLLECTION_BYTES = int(os.environ.get('WS_REPLAY_COLLECTION_BYTES', str(16 * 1024 * 1024)))
+# Heartbeat: ping every interval, drop clients silent for longer than the idle timeout
+WS_PING_INTERVAL = float(os.environ.get('WS_PING_INTERVAL', '25'))
+WS_IDLE_TIMEOUT = float(os.environ.get('WS_IDLE_TIMEOUT', '75'))
+# Per-worker connection cap (0 = unlimited)
+WS_MAX_CONNECTIONS = int(os.environ.get('WS_MAX_CONNECTIONS', '10000'))
+
+# WebSocket subprotocols; clients that offer neither get JSON text frames
+WS_SUBPROTOCOL_MSGPACK = "msgpack"
+WS_SUBPROTOCOL_JSON = "json"
+
+class EncodedFrame:
+    """A broadcast frame, encoded at most once per wire format and shared by all subscribers"""
+    __slots__ = ("seq", "frame", "_text", "_binary")
+    def __init__(self, seq: int, frame: Dict[str, Any], text: Optional[str] = None):
+        self.seq = seq
+        self.frame = frame
+        self._text = text
+        self._binary = None
+    @classmethod
+    def from_text(cls, seq: int, text: str) -> "EncodedFrame":
+        return cls(seq, json.loads(text), text=text)
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = json.dumps(self.frame)
+        return self._text
+    @property
+    def binary(self) -> bytes:
+        if self._binary is None:
+            self._binary = msgpack.packb(self.frame, use_bin_type=True, default=str)
+        return self._binary
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+    def __init__(self, coalesce_ms: int = 0, replay_size: int = 1000, max_connections: int = 0):
+        # Connected clients mapped to their last frame in either direction: one
+        # received from them, or an event delivered to them (pings don't count)
+        self.active_connections: Dict[WebSocket, float] = {}
+        self.max_connections = max_connections
+        # Clients that negotiated MessagePack frames
+        self.binary_clients: set = set()
+        self.coalesce_ms = coalesce_ms
+        # Events waiting for the current coalescing window, keyed by event type
+        # and territory, in the order each key first arrived
+        self.pending: Dict[tuple, List[Dict[str, Any]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        # Every frame is stamped with a sequence number and kept for replay. Numbers
+        # are only comparable within one epoch: each worker process counts on its
+        # own unless a shared counter is attached (init_replay_store)
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self.replay_buffer: deque = deque(maxlen=replay_size)
+        self.replay_collection = None
+        self.seq_counters = None
+        # Keeps frames numbered by the shared counter in order on this worker's sockets
+        self._emit_lock = asyncio.Lock()
+        # Live frames held back from clients that are still receiving a replay
+        self.replaying: Dict[WebSocket, List[EncodedFrame]] = {}
+        # Fan-out timings, exposed via /api/ws/stats
+        self.frames_sent = 0
+        self.fanout_seconds_total = 0.0
+        self.fanout_seconds_max = 0.0
+        self.peak_clients = 0
+        self.rejected_total = 0
+        self.reaped_total = 0
+        self._heartbeat_task: Optional[asyncio.Task] = None
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected_clients": len(self.active_connections),
+            "peak_clients": self.peak_clients,
+            "max_connections": self.max_connections,
+            "rejected_total": self.rejected_total,
+            "reaped_total": self.reaped_total,
+            "binary_clients": len(self.binary_clients),
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "frames_sent": self.frames_sent,
+            "fanout_ms_avg": round(self.fanout_seconds_total / self.frames_sent * 1000, 3) if self.frames_sent else 0.0,
+            "fanout_ms_max": round(self.fanout_seconds_max * 1000, 3),
+            "fanout_seconds_total": self.fanout_seconds_total,
+        }
+    async def init_replay_store(self, collection, counters):
+        """
+        Share one sequence (a Mongo counter) and one replay log (a capped
+        collection) between all workers, so a client can resume on any worker
+        and after a restart
+        """
+        counter = await counters.find_one_and_update(
+            {"_id": "ws_seq"},
+            {"$setOnInsert": {"epoch": self.epoch}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self.epoch = counter["epoch"]
+        self.seq = counter.get("seq", 0)
+        self.seq_counters = counters
+        self.replay_collection = collection
+    async def next_seq(self) -> int:
+        if self.seq_counters is None:
+            self.seq += 1
+        else:
+            counter = await self.seq_counters.find_one_and_update(
+                {"_id": "ws_seq"}, {"$inc": {"seq": 1}}, return_document=ReturnDocument.AFTER
+            )
+            self.seq = counter["seq"]
+        return self.seq
+    @staticmethod
+    def negotiate_subprotocol(websocket: WebSocket) -> Optional[str]:
+        offered = websocket.scope.get("subprotocols") or []
+        if WS_SUBPROTOCOL_MSGPACK in offered and msgpack is not None:
+            return WS_SUBPROTOCOL_MSGPACK
+        if WS_SUBPROTOCOL_JSON in offered:
+            return WS_SUBPROTOCOL_JSON
+        return None
+    async def connect(self, websocket: WebSocket, since: Optional[int] = None, epoch: Optional[str] = None) -> bool:
+        """Accept a client and replay what it missed; False if the worker is full"""
+        subprotocol = self.negotiate_subprotocol(websocket)
+        await websocket.accept(subprotocol=subprotocol)
+        if self.max_connections and len(self.active_connections) >= self.max_connections:
+            self.rejected_total += 1
+            # 1013 = try again later; the client backs off and reconnects
+            await websocket.close(code=1013, reason="Server at capacity")
+            return False
+        if subprotocol == WS_SUBPROTOCOL_MSGPACK:
+            self.binary_clients.add(websocket)
+        self.active_connections[websocket] = time.monotonic()
+        self.peak_clients = max(self.peak_clients, len(self.active_connections))
+        if since is None:
+            return True
+        self.replaying[websocket] = []
+        try:
+            await self.replay(websocket, since, epoch)
+            # Flush anything broadcast while the replay was being sent
+            while self.replaying[websocket]:
+                await self.send_frame(websocket, self.replaying[websocket].pop(0))
+        finally:
+            self.replaying.pop(websocket, None)
+        return True
     def disconnect(self, websocket: WebSocket):
+        self.active_connections.pop(websocket, None)
+        self.binary_clients.discard(websocket)
+        self.replaying.pop(websocket, None)
+    def touch(self, websocket: WebSocket):
         if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
+            self.active_connections[websocket] = time.monotonic()
+    def start_heartbeat(self, interval: float, idle_timeout: float):
+        if self._heartbeat_task is None and interval > 0:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat(interval, idle_timeout))
+    async def stop_heartbeat(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+    async def _heartbeat(self, interval: float, idle_timeout: float):
+        ping = EncodedFrame(0, {"type": "ping"})
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            connections = list(self.active_connections.items())
+            idle = [c for c, last_seen in connections if now - last_seen > idle_timeout]
+            # Clients busy receiving events don't need a ping to prove they're there
+            quiet = [c for c, last_seen in connections if interval <= now - last_seen <= idle_timeout]
+            # Concurrently and each under its own timeout, so one slow client can't delay everyone's ping
+            results = await asyncio.gather(
+                *(asyncio.wait_for(self.send_frame(c, ping), timeout=interval) for c in quiet),
+                return_exceptions=True
+            )
+            idle += [c for c, result in zip(quiet, results) if isinstance(result, Exception)]
+            await asyncio.gather(*(self.reap(c, interval) for c in idle))
+    async def reap(self, websocket: WebSocket, timeout: float):
+        """Drop a client that went quiet in both directions (half-open TCP, dead mobile link)"""
+        self.disconnect(websocket)
+        self.reaped_total += 1
+        try:
+            await asyncio.wait_for(websocket.close(code=1001, reason="Idle timeout"), timeout=timeout)
+        except Exception:
+            pass
+    async def replay(self, websocket: WebSocket, since: int, epoch: Optional[str] = None):
+        """Send the frames a reconnecting client missed, or ask it to resync"""
+        frames = None
+        if epoch == self.epoch:
+            if self.seq_counters is not None:
+                frames = await self.shared_frames_since(since)
+            else:
+                frames = self.buffered_frames_since(since)
+        if frames is None:
+            # Another worker's numbering, or a gap older than what we keep
+            upto = self.seq if self.seq_counters is None else await self.current_seq()
+            frames = [EncodedFrame(upto, {"type": "resync_required", "seq": upto, "epoch": self.epoch})]
+        for frame in frames:
+            await self.send_frame(websocket, frame)
+    def buffered_frames_since(self, since: int) -> Optional[List[EncodedFrame]]:
+        if since > self.seq:
+            return None
+        oldest = self.replay_buffer[0].seq if self.replay_buffer else self.seq + 1
+        if since + 1 < oldest:
+            return None
+        return [f for f in list(self.replay_buffer) if f.seq > since]
+    async def shared_frames_since(self, since: int) -> Optional[List[EncodedFrame]]:
+        # Every worker logs its frames here; the local buffer only holds this worker's
+        upto = await self.current_seq()
+        if since > upto:
+            return None
+        docs = await self.replay_collection.find(
+            {"epoch": self.epoch, "seq": {"$gt": since, "$lte": upto}}
+        ).sort("seq", 1).to_list(length=None)
+        # Evicted, or still being written by another worker: only a complete run will do
+        if [d["seq"] for d in docs] != list(range(since + 1, upto + 1)):
+            return None
+        return [EncodedFrame.from_text(d["seq"], d["message"]) for d in docs]
+    async def current_seq(self) -> int:
+        counter = await self.seq_counters.find_one({"_id": "ws_seq"})
+        return (counter or {}).get("seq", 0)
+    async def broadcast(self, event: Dict[str, Any]):
+        """Send an event to every client, or queue it for the coalescing window"""
+        if self.coalesce_ms <= 0:
+            await self.emit(event)
+            return
+        territory_id = (event.get("data") or {}).get("territoryId")
+        self.pending.setdefault((event["type"], territory_id), []).append(event)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after(self.coalesce_ms / 1000))
+    async def _flush_after(self, delay: float):
+        await asyncio.sleep(delay)
+        pending, self.pending = self.pending, {}
+        self._flush_task = None
+        for (event_type, territory_id), events in pending.items():
+            if len(events) == 1:
+                # A lone event keeps its original shape
+                await self.emit(events[0])
+            else:
+                payloads = [{k: v for k, v in e.items() if k != "type"} for e in events]
+                batch = {"type": event_type, "batch": payloads, "count": len(payloads)}
+                if territory_id is not None:
+                    batch["territoryId"] = territory_id
+                await self.emit(batch)
+    async def emit(self, event: Dict[str, Any]):
+        """Stamp an event with the next sequence number, record it and send it"""
+        if self.seq_counters is None:
+            await self._emit(event)
+            return
+        async with self._emit_lock:
             try:
-                await connection.send_text(message)
-            except:
-                pass
+                await self._emit(event)
+            except Exception as e:
+                logger.warning(f"Failed to number WebSocket frame: {e}")
+    async def _emit(self, event: Dict[str, Any]):
+        seq = await self.next_seq()
+        frame = EncodedFrame(seq, {**event, "seq": seq, "epoch": self.epoch})
+        self.replay_buffer.append(frame)
+        await self.send_all(frame)
+        if self.replay_collection is not None:
+            try:
+                await self.replay_collection.insert_one({"epoch": self.epoch, "seq": frame.seq, "message": frame.text})
+            except Exception as e:
+                logger.warning(f"Failed to persist WebSocket frame {frame.seq}: {e}")
+    async def send_frame(self, websocket: WebSocket, frame: EncodedFrame):
+        if websocket in self.binary_clients:
+            await websocket.send_bytes(frame.binary)
+        else:
+            await websocket.send_text(frame.text)
+    async def send_all(self, frame: EncodedFrame):
+        started = time.perf_counter()
+        for connection in list(self.active_connections):
+            if connection in self.replaying:
+                self.replaying[connection].append(frame)
+                continue
+            try:
+                await self.send_frame(connection, frame)
+            except Exception:
+                self.disconnect(connection)
+                continue
+            self.touch(connection)
+        elapsed = time.perf_counter() - started
+        self.frames_sent += 1
+        self.fanout_seconds_total += elapsed
+        self.fanout_seconds_max = max(self.fanout_seconds_max, elapsed)
+
+manager = ConnectionManager(coalesce_ms=WS_COALESCE_MS, replay_size=WS_REPLAY_BUFFER, max_connections=WS_MAX_CONNECTIONS)
+
+# News metrics are served from memory; stale entries are refreshed in the background
+NEWS_CACHE_TTL = float(os.environ.get('NEWS_CACHE_TTL', '60'))
+NEWS_CACHE_MAX_STALE = float(os.environ.get('NEWS_CACHE_MAX_STALE', '3600'))
+news_cache = StaleWhileRevalidateCache(
+    lambda pages: load_news_metrics(db, pages),
+    ttl=NEWS_CACHE_TTL,
+    max_stale=NEWS_CACHE_MAX_STALE,
+    name="news_metrics",
+)
 
-manager = ConnectionManager()
+async def city_news_metrics(pages: int) -> Dict[str, Any]:
+    """
+    news_cache value for `pages`. When a reload finds nothing (site down or
+    breaker open), the last good value regardless of age, else neutral
+    scores; neither is cached.
+    """
+    try:
+        return await news_cache.get(pages)
+    except NewsUnavailable as e:
+        last = news_cache.peek(pages)
+        if last is not None:
+            return last
+        logger.warning(f"News metrics unavailable, serving neutral scores: {e}")
+        return score_articles([])
 
 class UserRole:
     ADMIN = "admin"
@@ -209,6 +528,10 @@ class Comment(BaseModel):
     sentiment: Optional[str] = None
     createdAt: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class CommentReview(BaseModel):
+    approved: bool
+    reason: Optional[str] = None
+
 class CommunityCreate(BaseModel):
     name: str
     description: Optional[str] = None
@@ -373,6 +696,9 @@ class APIKeyConfig(BaseModel):
 class PincodeBoundaryRequest(BaseModel):
     pincode: str
 
+class TerritoryInsightsBatch(BaseModel):
+    territoryIds: List[str]
+
 # Gujarat / Ahmedabad Fixed Pincode Boundaries (Sample Data for Testing)
 GUJARAT_PINCODE_BOUNDARIES = {
     "380001": {"boundary": [[23.0340, 72.5840], [23.0380, 72.5900], [23.0370, 72.5960], [23.0320, 72.5930], [23.0340, 72.5840]], "center": {"lat": 23.0350, "lng": 72.5910}},
@@ -439,10 +765,17 @@ def validate_comment_regex(text: str) -> tuple:
         return False, "Comment too long"
     return True, "Valid"
 
+OPENAI_BREAKER = get_breaker("openai")
+
 async def validate_comment_ai(text: str, api_key: str) -> tuple:
     try:
-        client = AsyncOpenAI(api_key=api_key)
-        response = await client.chat.completions.create(
+        # Retries on 429 are left to the limiter
+        client = AsyncOpenAI(api_key=api_key, base_url=OPENAI_BASE_URL, max_retries=0)
+        response = await LLM_LIMITER.call(
+            api_key,
+            client.chat.completions.create,
+            breaker=OPENAI_BREAKER,
+            timeout=30.0,
             model="gpt-4o-mini",
             messages=[{
                 "role": "system",
@@ -458,6 +791,38 @@ async def validate_comment_ai(text: str, api_key: str) -> tuple:
     except Exception as e:
         return True, f"AI validation failed: {str(e)}", "neutral"
 
+async def moderate_comments_ai(texts: List[str], api_key: str) -> List[tuple]:
+    """validate_comment_ai for several comments in one completion; same (valid, reason, sentiment) per text"""
+    numbered = "\n".join(f"[{i}] {' '.join(text.split())}" for i, text in enumerate(texts, 1))
+    try:
+        client = AsyncOpenAI(api_key=api_key, base_url=OPENAI_BASE_URL, max_retries=0)
+        response = await LLM_LIMITER.call(
+            api_key,
+            client.chat.completions.create,
+            breaker=OPENAI_BREAKER,
+            timeout=30.0,
+            model="gpt-4o-mini",
+            messages=[{
+                "role": "system",
+                "content": "You are a content moderation assistant for a real estate territory platform. For each numbered comment, analyze if it is appropriate, spam-free, and constructive. Respond with JSON: {\"results\": [{\"id\": <number>, \"valid\": true/false, \"reason\": \"explanation\", \"sentiment\": \"positive/negative/neutral\"}]}"
+            }, {
+                "role": "user",
+                "content": f"Comments:\n{numbered}"
+            }],
+            response_format={"type": "json_object"}
+        )
+        verdicts = {r.get('id'): r for r in json.loads(response.choices[0].message.content).get('results', [])}
+    except Exception as e:
+        return [(True, f"AI validation failed: {str(e)}", "neutral")] * len(texts)
+    results = []
+    for i in range(1, len(texts) + 1):
+        verdict = verdicts.get(i)
+        if verdict is None:
+            results.append((True, "AI validation returned no verdict", "neutral"))
+        else:
+            results.append((bool(verdict.get('valid', True)), verdict.get('reason', ''), verdict.get('sentiment', 'neutral')))
+    return results
+
 # Pin type weightages for territory rating
 PIN_TYPE_WEIGHTAGES = {
     'job': 9,
@@ -625,6 +990,53 @@ async def config_api_key(config: APIKeyConfig, user: User = Depends(get_current_
     await db.users.update_one({"id": user.id}, {"$set": update_data})
     return {"message": "API configuration updated successfully"}
 
+async def fetch_pincode_data(user: User, pincode: str) -> Dict[str, Any]:
+    """Query the configured Pincode API through its circuit breaker, falling back to the last good answer"""
+    api_url = user.pincode_api_url
+    # Users configure their own providers: one breaker per host, so a broken one only trips itself
+    breaker = get_breaker(f"pincode_api:{urlsplit(api_url).netloc}")
+
+    async def lookup() -> httpx.Response:
+        async with httpx.AsyncClient() as client:
+            headers = {}
+            if user.pincode_api_key:
+                headers['Authorization'] = f'Bearer {user.pincode_api_key}'
+            response = await client.get(
+                api_url,
+                params={'pincode': pincode},
+                headers=headers,
+                timeout=10.0
+            )
+            # Only 5xx counts against the breaker; a 4xx (e.g. unknown pincode) is an answer
+            if response.status_code >= 500:
+                response.raise_for_status()
+            return response
+
+    try:
+        response = await breaker.call(lookup, timeout=10.0)
+    except Exception as e:
+        cached = await db.pincode_lookups.find_one({"pincode": pincode, "apiUrl": api_url}, {"_id": 0})
+        if cached:
+            return cached['data']
+        if isinstance(e, CircuitOpenError):
+            raise HTTPException(status_code=503, detail="Pincode API temporarily unavailable")
+        raise HTTPException(status_code=500, detail=f"Pincode API error: {str(e)}")
+    if response.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Pincode {pincode} not found by the Pincode API")
+    if response.is_error:
+        raise HTTPException(status_code=400, detail=f"Pincode API rejected the request (HTTP {response.status_code})")
+    try:
+        data = response.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid response from Pincode API")
+
+    await db.pincode_lookups.update_one(
+        {"pincode": pincode, "apiUrl": api_url},
+        {"$set": {"pincode": pincode, "apiUrl": api_url, "data": data, "fetchedAt": datetime.now(timezone.utc).isoformat()}},
+        upsert=True
+    )
+    return data
+
 @api_router.post("/pincode/boundary")
 async def get_pincode_boundary(request: PincodeBoundaryRequest, user: User = Depends(get_current_user)):
     # First check if we have fixed boundary data for Gujarat pincodes
@@ -639,25 +1051,10 @@ async def get_pincode_boundary(request: PincodeBoundaryRequest, user: User = Dep
             detail=f"Pincode {request.pincode} not found in local database. Please configure Pincode API in Settings for other pincodes."
         )
     
-    try:
-        async with httpx.AsyncClient() as client:
-            headers = {}
-            if user.pincode_api_key:
-                headers['Authorization'] = f'Bearer {user.pincode_api_key}'
-            response = await client.get(
-                user.pincode_api_url,
-                params={'pincode': request.pincode},
-                headers=headers,
-                timeout=10.0
-            )
-            response.raise_for_status()
-            data = response.json()
-            if 'boundary' in data:
-                return {"boundary": data['boundary'], "center": data.get('center'), "source": "external_api"}
-            else:
-                raise HTTPException(status_code=400, detail="Invalid response from Pincode API")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Pincode API error: {str(e)}")
+    data = await fetch_pincode_data(user, request.pincode)
+    if 'boundary' in data:
+        return {"boundary": data['boundary'], "center": data.get('center'), "source": "external_api"}
+    raise HTTPException(status_code=400, detail="Invalid response from Pincode API")
 
 @api_router.post("/territories")
 async def create_territory(territory: TerritoryCreate, user: User = Depends(check_role([UserRole.ADMIN, UserRole.MANAGER, UserRole.PARTNER]))):
@@ -675,25 +1072,11 @@ async def create_territory(territory: TerritoryCreate, user: User = Depends(chec
                     detail=f"Pincode {territory.pincode} not found in local database. Please configure Pincode API in Settings or provide center coordinates."
                 )
             
-            try:
-                async with httpx.AsyncClient() as client:
-                    headers = {}
-                    if user.pincode_api_key:
-                        headers['Authorization'] = f'Bearer {user.pincode_api_key}'
-                    response = await client.get(
-                        user.pincode_api_url,
-                        params={'pincode': territory.pincode},
-                        headers=headers,
-                        timeout=10.0
-                    )
-                    response.raise_for_status()
-                    data = response.json()
-                    if 'center' in data:
-                        center = data['center']
-                    else:
-                        raise HTTPException(status_code=400, detail="Invalid response from Pincode API - no center coordinates")
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Pincode API error: {str(e)}")
+            data = await fetch_pincode_data(user, territory.pincode)
+            if 'center' in data:
+                center = data['center']
+            else:
+                raise HTTPException(status_code=400, detail="Invalid response from Pincode API - no center coordinates")
     
     # Auto-generate zone if not provided
     zone = territory.zone
@@ -715,7 +1098,7 @@ async def create_territory(territory: TerritoryCreate, user: User = Depends(chec
     await db.territories.insert_one(territory_doc)
     # Remove MongoDB ObjectId before broadcasting
     broadcast_data = {k: v for k, v in territory_doc.items() if k != '_id'}
-    await manager.broadcast(json.dumps({"type": "territory_created", "data": broadcast_data}))
+    await manager.broadcast({"type": "territory_created", "data": broadcast_data})
     return Territory(**territory_doc)
 
 @api_router.get("/territories", response_model=List[Territory])
@@ -765,10 +1148,12 @@ async def update_territory(territory_id: str, territory_update: TerritoryUpdate,
     if 'metrics' in update_data:
         update_data['aiInsights'] = calculate_ai_insights(TerritoryMetrics(**update_data['metrics'])).model_dump()
     await db.territories.update_one({"id": territory_id}, {"$set": update_data})
+    # Name, pincode and rating feed the intelligence snapshot
+    await bump_territory_version(territory_id)
     updated = await db.territories.find_one({"id": territory_id})
     # Remove MongoDB ObjectId before broadcasting
     broadcast_data = {k: v for k, v in updated.items() if k != '_id'}
-    await manager.broadcast(json.dumps({"type": "territory_updated", "data": broadcast_data}))
+    await manager.broadcast({"type": "territory_updated", "data": broadcast_data})
     return Territory(**updated)
 
 @api_router.post("/territories/{territory_id}/calculate-rating")
@@ -791,9 +1176,11 @@ async def calculate_territory_rating_endpoint(territory_id: str, user: User = De
         {"id": territory_id},
         {"$set": {"rating": rating.model_dump(), "updatedAt": datetime.now(timezone.utc).isoformat()}}
     )
+    await bump_territory_version(territory_id)
     
     updated = await db.territories.find_one({"id": territory_id})
-    await manager.broadcast(json.dumps({"type": "territory_updated", "data": updated}))
+    broadcast_data = {k: v for k, v in updated.items() if k != '_id'}
+    await manager.broadcast({"type": "territory_updated", "data": broadcast_data})
     
     return {"rating": rating, "message": "Rating calculated successfully"}
 
@@ -802,7 +1189,12 @@ async def delete_territory(territory_id: str, user: User = Depends(check_role([U
     result = await db.territories.delete_one({"id": territory_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Territory not found")
-    await manager.broadcast(json.dumps({"type": "territory_deleted", "id": territory_id}))
+    await asyncio.gather(
+        db.territory_intelligence.delete_one({"territoryId": territory_id}),
+        db.territory_stats.delete_one({"territoryId": territory_id}),
+        db.territory_keywords.delete_many({"territoryId": territory_id}),
+    )
+    await manager.broadcast({"type": "territory_deleted", "id": territory_id})
     return {"message": "Territory deleted"}
 
 @api_router.post("/pins")
@@ -816,8 +1208,12 @@ async def create_pin(pin: PinCreate, user: User = Depends(check_role([UserRole.A
     }
     if pin.generateAIInsights and user.openai_api_key:
         try:
-            client = AsyncOpenAI(api_key=user.openai_api_key)
-            response = await client.chat.completions.create(
+            client = AsyncOpenAI(api_key=user.openai_api_key, base_url=OPENAI_BASE_URL, max_retries=0)
+            response = await LLM_LIMITER.call(
+                user.openai_api_key,
+                client.chat.completions.create,
+                breaker=OPENAI_BREAKER,
+                timeout=30.0,
                 model="gpt-4o-mini",
                 messages=[{
                     "role": "system",
@@ -832,9 +1228,10 @@ async def create_pin(pin: PinCreate, user: User = Depends(check_role([UserRole.A
         except:
             pin_doc['aiInsights'] = None
     await db.pins.insert_one(pin_doc)
+    await bump_territory_version(pin_doc.get('territoryId'))
     # Remove MongoDB ObjectId before broadcasting
     broadcast_data = {k: v for k, v in pin_doc.items() if k != '_id'}
-    await manager.broadcast(json.dumps({"type": "pin_created", "data": broadcast_data}))
+    await manager.broadcast({"type": "pin_created", "data": broadcast_data})
     return Pin(**pin_doc)
 
 @api_router.get("/pins", response_model=List[Pin])
@@ -862,9 +1259,10 @@ async def update_pin(pin_id: str, pin_update: PinUpdate, user: User = Depends(ch
     update_data = {k: v for k, v in pin_update.model_dump(exclude_unset=True).items() if v is not None}
     await db.pins.update_one({"id": pin_id}, {"$set": update_data})
     updated = await db.pins.find_one({"id": pin_id})
+    await bump_territory_version(existing.get('territoryId'), updated.get('territoryId'))
     # Remove MongoDB ObjectId before broadcasting
     broadcast_data = {k: v for k, v in updated.items() if k != '_id'}
-    await manager.broadcast(json.dumps({"type": "pin_updated", "data": broadcast_data}))
+    await manager.broadcast({"type": "pin_updated", "data": broadcast_data})
     return Pin(**updated)
 
 @api_router.delete("/pins/{pin_id}")
@@ -875,18 +1273,337 @@ async def delete_pin(pin_id: str, user: User = Depends(check_role([UserRole.ADMI
     if existing['createdBy'] != user.id and user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Can only delete your own pins")
     result = await db.pins.delete_one({"id": pin_id})
-    await manager.broadcast(json.dumps({"type": "pin_deleted", "id": pin_id}))
+    await bump_territory_version(existing.get('territoryId'))
+    await manager.broadcast({"type": "pin_deleted", "id": pin_id})
     return {"message": "Pin deleted"}
 
+# ==========================================
+# TERRITORY SENTIMENT AGGREGATES
+# ==========================================
+async def record_territory_sentiment(territory_id: Optional[str], text: Optional[str]):
+    """Score a newly written text once and fold it into the territory's running sentiment totals"""
+    if not territory_id or not text:
+        return
+    await db.territory_stats.update_one(
+        {"territoryId": territory_id},
+        {"$inc": sentiment_increment(text), "$setOnInsert": {"territoryId": territory_id}},
+        upsert=True
+    )
+
+def sentiment_totals_current(stats: Optional[Dict[str, Any]]) -> bool:
+    """
+    Whether a territory's stored sentiment totals were counted in this
+    SENTIMENT_MATCH_MODE; totals from another mode (or from before the mode
+    was recorded) are recounted on their next read
+    """
+    return bool(stats and stats.get("sentimentInitialized") and stats.get("sentimentMode") == SENTIMENT_MATCH_MODE)
+
+async def get_territory_sentiment(territory_id: str, posts: List[Dict], events: List[Dict],
+                                  stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Running sentiment totals for a territory; the first read (in each match mode) backfills them from existing content"""
+    if stats is None:
+        stats = await db.territory_stats.find_one({"territoryId": territory_id}, {"_id": 0})
+    if sentiment_totals_current(stats):
+        return stats.get("sentiment", {})
+    
+    # Increments recorded before the backfill are superseded by the full recount
+    comments = await db.comments.find(
+        {"territoryId": territory_id, "validationStatus": "approved"}, {"_id": 0, "text": 1}
+    ).to_list(length=None)
+    texts = [p['text'] for p in posts if p.get('text')]
+    texts += [e['title'] for e in events if e.get('title')]
+    texts += [c['text'] for c in comments if c.get('text')]
+    summary = await ANALYSIS_POOL.run(texts_sentiment_summary, tuple(texts), size=len(texts))
+    await db.territory_stats.update_one(
+        {"territoryId": territory_id},
+        {"$set": {"territoryId": territory_id, "sentiment": summary, "sentimentInitialized": True,
+                  "sentimentMode": SENTIMENT_MATCH_MODE}},
+        upsert=True
+    )
+    return summary
+
+# Keyword index: one document per term, in keyword_df (city-wide document
+# frequency, keyed by term) and territory_keywords ({territoryId, term, count}),
+# so no document grows with the vocabulary and a ranking reads only its terms.
+# Seconds the city-wide document count is cached
+KEYWORD_DF_TTL = float(os.environ.get('KEYWORD_DF_TTL', '300'))
+# A territory's most frequent terms considered for its TF-IDF top keywords
+KEYWORD_RANK_CANDIDATES = int(os.environ.get('KEYWORD_RANK_CANDIDATES', '200'))
+
+async def write_territory_keywords(territory_id: str, term_counts: Dict[str, int], op: str = "$inc"):
+    if term_counts:
+        await db.territory_keywords.bulk_write([
+            UpdateOne({"territoryId": territory_id, "term": term}, {op: {"count": n}}, upsert=True)
+            for term, n in term_counts.items()
+        ], ordered=False)
+
+async def write_keyword_df(df: Dict[str, int], op: str = "$inc"):
+    if df:
+        await db.keyword_df.bulk_write([
+            UpdateOne({"_id": term}, {op: {"df": n}}, upsert=True) for term, n in df.items()
+        ], ordered=False)
+
+async def record_territory_keywords(territory_id: Optional[str], text: Optional[str]):
+    """Fold a new post/event text into the territory's term counts and the city-wide document frequencies"""
+    # Counted like the backfill: every non-empty text is a city document, with or without a territory
+    documents, df = texts_document_frequencies((text,))
+    if not documents:
+        return
+    writes = [
+        write_keyword_df(df),
+        db.keyword_stats.update_one({"scope": "city"}, {"$inc": {"documents": documents}}, upsert=True),
+    ]
+    if territory_id:
+        writes.append(write_territory_keywords(territory_id, keyword_counts(text)))
+    await asyncio.gather(*writes)
+
+async def load_keyword_df(_key=None) -> Dict[str, Any]:
+    """City-wide {documents}; the first load backfills the document count and keyword_df from all posts and events"""
+    stats = await db.keyword_stats.find_one({"scope": "city"}, {"_id": 0, "documents": 1, "termsInitialized": 1})
+    if stats and stats.get("termsInitialized"):
+        return {"documents": stats.get("documents", 0)}
+    
+    # Increments recorded before the backfill are superseded by the full recount
+    posts = await db.posts.find({}, {"_id": 0, "text": 1}).to_list(length=None)
+    events = await db.events.find({}, {"_id": 0, "title": 1}).to_list(length=None)
+    texts = tuple(p.get("text") for p in posts) + tuple(e.get("title") for e in events)
+    documents, df = await ANALYSIS_POOL.run(texts_document_frequencies, texts, size=len(texts))
+    await write_keyword_df(df, "$set")
+    await db.keyword_stats.update_one(
+        {"scope": "city"},
+        # df/initialized: the earlier single-document table
+        {"$set": {"scope": "city", "documents": documents, "termsInitialized": True},
+         "$unset": {"df": "", "initialized": ""}},
+        upsert=True
+    )
+    return {"documents": documents}
+
+# The document count drifts slowly; a few minutes of staleness doesn't change rankings
+keyword_df_cache = StaleWhileRevalidateCache(load_keyword_df, ttl=KEYWORD_DF_TTL, name="keyword_df")
+
+async def get_territory_keywords(territory_id: str, posts: List[Dict], events: List[Dict], top_n: int = 8,
+                                 stats: Optional[Dict[str, Any]] = None) -> List[str]:
+    """TF-IDF ranked keywords among the territory's most frequent terms; the first read backfills its term counts"""
+    if stats is None:
+        stats = await db.territory_stats.find_one({"territoryId": territory_id}, {"_id": 0, "keywordTermsInitialized": 1})
+    if stats and stats.get("keywordTermsInitialized"):
+        rows = await db.territory_keywords.find(
+            {"territoryId": territory_id}, {"_id": 0, "term": 1, "count": 1}
+        ).sort([("count", -1), ("term", 1)]).limit(KEYWORD_RANK_CANDIDATES).to_list(length=None)
+        candidates = {row["term"]: row["count"] for row in rows}
+    else:
+        texts = tuple(p['text'] for p in posts if p.get('text')) + tuple(e['title'] for e in events if e.get('title'))
+        term_counts = await ANALYSIS_POOL.run(texts_keyword_counts, texts, size=len(texts))
+        await write_territory_keywords(territory_id, term_counts, "$set")
+        await db.territory_stats.update_one(
+            {"territoryId": territory_id},
+            # keywords/keywordsInitialized: the earlier per-territory map
+            {"$set": {"territoryId": territory_id, "keywordTermsInitialized": True},
+             "$unset": {"keywords": "", "keywordsInitialized": ""}},
+            upsert=True
+        )
+        candidates = top_keyword_candidates(term_counts, KEYWORD_RANK_CANDIDATES)
+    city, df_rows = await asyncio.gather(
+        keyword_df_cache.get("city"),
+        db.keyword_df.find({"_id": {"$in": list(candidates)}}).to_list(length=None),
+    )
+    df = {row["_id"]: row["df"] for row in df_rows}
+    return top_keywords_tfidf(candidates, df, city["documents"], top_n)
+
+# ==========================================
+# WORKER LOCKS
+# ==========================================
+# This worker process's name on the locks and pending comments it holds
+WORKER_ID = uuid.uuid4().hex
+
+async def acquire_lock(name: str, seconds: float) -> bool:
+    """
+    Take a named lock shared by all workers for `seconds`, or extend it if
+    this worker already holds it; False while another worker holds it
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        await db.locks.find_one_and_update(
+            {"_id": name, "$or": [{"expiresAt": {"$lt": now.isoformat()}}, {"owner": WORKER_ID}]},
+            {"$set": {"owner": WORKER_ID, "expiresAt": (now + timedelta(seconds=seconds)).isoformat()}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The lock exists, hasn't expired and is another worker's: the upsert collided with it
+        return False
+    return True
+
+async def release_lock(name: str):
+    """Give up a lock this worker holds before it expires"""
+    await db.locks.delete_one({"_id": name, "owner": WORKER_ID})
+
+# ==========================================
+# AI COMMENT MODERATION QUEUE
+# ==========================================
+# queue: AI-moderated comments are stored as pending and moderated in batches;
+# inline: the request waits for a per-comment AI verdict
+COMMENT_MODERATION_MODE = os.environ.get('COMMENT_MODERATION_MODE', 'queue').lower()
+# Comments per moderation completion, seconds to wait for a batch to fill,
+# and moderation completions in flight at once
+COMMENT_MODERATION_BATCH = int(os.environ.get('COMMENT_MODERATION_BATCH', '10'))
+COMMENT_MODERATION_WAIT = float(os.environ.get('COMMENT_MODERATION_WAIT', '1'))
+COMMENT_MODERATION_CONCURRENCY = int(os.environ.get('COMMENT_MODERATION_CONCURRENCY', '2'))
+
+# Seconds a worker's claim on a pending comment lasts unless renewed; the
+# comments of a worker that died are claimed by another one after this
+COMMENT_MODERATION_LEASE = float(os.environ.get('COMMENT_MODERATION_LEASE', '300'))
+
+# (comment id, text, api key); keys are kept in memory only, never stored on the comment
+moderation_queue: asyncio.Queue = asyncio.Queue()
+moderation_stats = {"queued": 0, "moderated": 0, "batches": 0, "ai_failures": 0, "claimed": 0, "flagged": 0}
+
+def moderation_lease() -> Dict[str, str]:
+    """Fields that claim a pending comment for this worker for COMMENT_MODERATION_LEASE seconds"""
+    return {
+        "moderationOwner": WORKER_ID,
+        "moderationLeaseUntil": (datetime.now(timezone.utc) + timedelta(seconds=COMMENT_MODERATION_LEASE)).isoformat()
+    }
+
+async def apply_moderation(comment_id: str, is_valid: bool, reason: str, sentiment: str):
+    """Settle a pending comment and broadcast the verdict"""
+    comment = await db.comments.find_one_and_update(
+        {"id": comment_id, "validationStatus": "pending"},
+        {"$set": {
+            "validationStatus": "approved" if is_valid else "rejected",
+            "validationReason": reason,
+            "sentiment": sentiment,
+            "moderatedAt": datetime.now(timezone.utc).isoformat()
+        }, "$unset": {"moderationKeyId": "", "moderationOwner": "", "moderationLeaseUntil": "", "needsReview": ""}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if comment is None:
+        return
+    moderation_stats["moderated"] += 1
+    if is_valid:
+        await record_territory_sentiment(comment["territoryId"], comment["text"])
+        await bump_territory_version(comment["territoryId"])
+    await manager.broadcast({"type": "comment_moderated", "data": {
+        k: comment.get(k) for k in ("id", "territoryId", "validationStatus", "validationReason", "sentiment", "moderatedAt")
+    }})
+
+async def moderate_batch(batch: List[tuple]):
+    """One moderation completion per API key in the batch"""
+    by_key: Dict[str, List[tuple]] = defaultdict(list)
+    for comment_id, text, api_key in batch:
+        by_key[api_key].append((comment_id, text))
+    for api_key, items in by_key.items():
+        moderation_stats["batches"] += 1
+        verdicts = await moderate_comments_ai([text for _, text in items], api_key)
+        for (comment_id, _), (is_valid, reason, sentiment) in zip(items, verdicts):
+            if reason.startswith("AI validation failed"):
+                moderation_stats["ai_failures"] += 1
+            await apply_moderation(comment_id, is_valid, reason, sentiment)
+
+async def run_moderation_worker():
+    """Drain the moderation queue in batches of up to COMMENT_MODERATION_BATCH comments"""
+    slots = asyncio.Semaphore(COMMENT_MODERATION_CONCURRENCY)
+    loop = asyncio.get_running_loop()
+    
+    async def run(batch):
+        try:
+            await moderate_batch(batch)
+        except Exception as e:
+            logger.error(f"Comment moderation error: {e}")
+        finally:
+            slots.release()
+    
+    # The loop only keeps weak references to tasks; hold them until they finish
+    running: set = set()
+    
+    while True:
+        batch = [await moderation_queue.get()]
+        fill_until = loop.time() + COMMENT_MODERATION_WAIT
+        while len(batch) < COMMENT_MODERATION_BATCH:
+            remaining = fill_until - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(moderation_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        # Back-pressure: stop collecting while all completion slots are busy
+        await slots.acquire()
+        task = asyncio.create_task(run(batch))
+        running.add(task)
+        task.add_done_callback(running.discard)
+
+def moderation_key_id(api_key: str) -> str:
+    """Short hash stored on a pending comment to recognise its API key later, never the key itself"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+async def renew_moderation_leases():
+    """Extend this worker's claims on the comments still in its queue"""
+    await db.comments.update_many(
+        {"validationStatus": "pending", "moderationOwner": WORKER_ID}, {"$set": moderation_lease()}
+    )
+
+async def claim_expired_comments() -> int:
+    """
+    Claim and queue pending comments whose worker's lease ran out (a restart
+    or a crash), one find_one_and_update each, so every comment is claimed by
+    exactly one worker. Only the key a comment was submitted with is used:
+    the author's stored key if it still matches, never the system key. A
+    comment whose key is gone stays pending, flagged for manual review.
+    """
+    claimed = 0
+    while True:
+        now = datetime.now(timezone.utc).isoformat()
+        comment = await db.comments.find_one_and_update(
+            {"validationStatus": "pending", "needsReview": {"$ne": True},
+             # No lease: left pending before leases were recorded
+             "$or": [{"moderationLeaseUntil": {"$lt": now}}, {"moderationLeaseUntil": {"$exists": False}}]},
+            {"$set": moderation_lease()},
+            projection={"_id": 0, "id": 1, "text": 1, "userId": 1, "moderationKeyId": 1}
+        )
+        if comment is None:
+            return claimed
+        claimed += 1
+        moderation_stats["claimed"] += 1
+        author = await db.users.find_one({"id": comment["userId"]}, {"_id": 0, "openai_api_key": 1})
+        api_key = (author or {}).get("openai_api_key")
+        if api_key and moderation_key_id(api_key) == comment.get("moderationKeyId"):
+            moderation_queue.put_nowait((comment["id"], comment["text"], api_key))
+            moderation_stats["queued"] += 1
+        else:
+            await db.comments.update_one(
+                {"id": comment["id"], "validationStatus": "pending"},
+                {"$set": {"needsReview": True, "validationReason": "Awaiting manual review"},
+                 "$unset": {"moderationKeyId": "", "moderationOwner": "", "moderationLeaseUntil": ""}}
+            )
+            moderation_stats["flagged"] += 1
+
+async def run_moderation_leases():
+    """Every third of a lease: renew this worker's claims, then claim the expired ones"""
+    while True:
+        try:
+            await renew_moderation_leases()
+            await claim_expired_comments()
+        except Exception as e:
+            logger.error(f"Comment moderation lease error: {e}")
+        await asyncio.sleep(COMMENT_MODERATION_LEASE / 3)
+
 @api_router.post("/comments")
 async def create_comment(comment: CommentCreate, user: User = Depends(get_current_user)):
     is_valid, reason = validate_comment_regex(comment.text)
     sentiment = "neutral"
+    validation_status = "approved" if is_valid else "rejected"
+    api_key = None
     if comment.useAI:
         api_key = comment.apiKey or user.openai_api_key
         if not api_key:
             raise HTTPException(status_code=400, detail="OpenAI API key required for AI validation")
-        is_valid, reason, sentiment = await validate_comment_ai(comment.text, api_key)
+        if COMMENT_MODERATION_MODE != "queue":
+            is_valid, reason, sentiment = await validate_comment_ai(comment.text, api_key)
+            validation_status = "approved" if is_valid else "rejected"
+        elif is_valid:
+            # Cheap pre-check passed; the AI verdict follows as a comment_moderated broadcast
+            validation_status, reason = "pending", "Awaiting AI moderation"
     comment_doc = {
         "id": str(uuid.uuid4()),
         "territoryId": comment.territoryId,
@@ -895,17 +1612,46 @@ async def create_comment(comment: CommentCreate, user: User = Depends(get_curren
         "text": comment.text,
         "zone": comment.zone,
         "photo": comment.photo,
-        "validationStatus": "approved" if is_valid else "rejected",
+        "validationStatus": validation_status,
         "validationReason": reason,
         "sentiment": sentiment,
         "createdAt": datetime.now(timezone.utc).isoformat()
     }
+    if validation_status == "pending":
+        comment_doc["moderationKeyId"] = moderation_key_id(api_key)
+        comment_doc.update(moderation_lease())
     await db.comments.insert_one(comment_doc)
-    # Remove MongoDB ObjectId before broadcasting
-    broadcast_data = {k: v for k, v in comment_doc.items() if k != '_id'}
-    await manager.broadcast(json.dumps({"type": "comment_created", "data": broadcast_data}))
+    if validation_status == "pending":
+        moderation_queue.put_nowait((comment_doc["id"], comment.text, api_key))
+        moderation_stats["queued"] += 1
+    elif is_valid:
+        await record_territory_sentiment(comment.territoryId, comment.text)
+        await bump_territory_version(comment.territoryId)
+    # Remove MongoDB ObjectId (and the key hash and claim) before broadcasting
+    broadcast_data = {k: v for k, v in comment_doc.items() if k not in ('_id', 'moderationKeyId', 'moderationOwner', 'moderationLeaseUntil')}
+    await manager.broadcast({"type": "comment_created", "data": broadcast_data})
     return Comment(**comment_doc)
 
+@api_router.get("/comments/moderation-stats")
+async def get_moderation_stats(user: User = Depends(get_current_user)):
+    """AI comment moderation queue depth and batching counters for this worker"""
+    return {
+        "mode": COMMENT_MODERATION_MODE,
+        "queue_depth": moderation_queue.qsize(),
+        "needs_review": await db.comments.count_documents({"validationStatus": "pending", "needsReview": True}),
+        **moderation_stats,
+        "avg_batch_size": round(moderation_stats["moderated"] / moderation_stats["batches"], 2) if moderation_stats["batches"] else 0.0,
+    }
+
+@api_router.post("/comments/{comment_id}/review")
+async def review_comment(comment_id: str, review: CommentReview, user: User = Depends(check_role([UserRole.ADMIN, UserRole.MANAGER]))):
+    """Settle a pending comment by hand, e.g. one flagged needsReview because its API key is gone"""
+    comment = await db.comments.find_one({"id": comment_id, "validationStatus": "pending"}, {"_id": 0, "id": 1})
+    if not comment:
+        raise HTTPException(status_code=404, detail="No pending comment with this id")
+    await apply_moderation(comment_id, review.approved, review.reason or f"Reviewed by {user.name}", "neutral")
+    return await db.comments.find_one({"id": comment_id}, {"_id": 0})
+
 @api_router.get("/comments", response_model=List[Comment])
 async def get_comments(user: User = Depends(get_current_user), territory_id: Optional[str] = Query(None)):
     query = {}
@@ -940,7 +1686,7 @@ async def submit_data(data: DataGatheringForm, user: User = Depends(check_role([
             "aiInsights": ai_insights.model_dump(),
             "timestamp": datetime.now(timezone.utc).isoformat()
         })
-        await manager.broadcast(json.dumps({"type": "metrics_updated", "territoryId": data.territoryId, "metrics": new_metrics, "aiInsights": ai_insights.model_dump()}))
+        await manager.broadcast({"type": "metrics_updated", "territoryId": data.territoryId, "metrics": new_metrics, "aiInsights": ai_insights.model_dump()})
     return DataGathering(**data_doc)
 
 @api_router.get("/data-gathering", response_model=List[DataGathering])
@@ -994,6 +1740,7 @@ async def create_community(community: CommunityCreate, user: User = Depends(get_
         "createdAt": datetime.now(timezone.utc).isoformat()
     }
     await db.communities.insert_one(community_doc)
+    await bump_territory_version(community_doc.get('territoryId'))
     return Community(**community_doc)
 
 @api_router.get("/communities", response_model=List[Community])
@@ -1019,6 +1766,7 @@ async def join_community(community_id: str, user: User = Depends(get_current_use
             {"id": community_id},
             {"$push": {"members": user.id}}
         )
+        await bump_territory_version(community.get('territoryId'))
     return {"message": "Joined community successfully"}
 
 @api_router.post("/posts")
@@ -1031,9 +1779,15 @@ async def create_post(post: PostCreate, user: User = Depends(get_current_user)):
         "createdAt": datetime.now(timezone.utc).isoformat()
     }
     await db.posts.insert_one(post_doc)
+    community = await db.communities.find_one({"id": post.communityId}, {"_id": 0, "territoryId": 1})
+    # City-wide document frequencies count every post, in a territory or not
+    await record_territory_keywords((community or {}).get("territoryId"), post.text)
+    if community:
+        await record_territory_sentiment(community.get("territoryId"), post.text)
+        await bump_territory_version(community.get("territoryId"))
     # Remove MongoDB ObjectId before broadcasting
     broadcast_data = {k: v for k, v in post_doc.items() if k != '_id'}
-    await manager.broadcast(json.dumps({"type": "post_created", "data": broadcast_data}))
+    await manager.broadcast({"type": "post_created", "data": broadcast_data})
     return Post(**post_doc)
 
 @api_router.get("/posts", response_model=List[Post])
@@ -1067,29 +1821,258 @@ async def get_territory_profile(territory_id: str, user: User = Depends(get_curr
         }
     }
 
-@api_router.get("/territories/{territory_id}/ai-insights")
-async def get_territory_ai_insights(territory_id: str, user: User = Depends(get_current_user)):
-    """Get AI-driven sentiment analysis and contextual intelligence for territory"""
-    territory = await db.territories.find_one({"id": territory_id})
-    if not territory:
-        raise HTTPException(status_code=404, detail="Territory not found")
+# ==========================================
+# TERRITORY INTELLIGENCE SNAPSHOTS
+# ==========================================
+# Seconds before a snapshot is recomputed even without writes (news drifts)
+TERRITORY_INTEL_MAX_AGE = int(os.environ.get('TERRITORY_INTEL_MAX_AGE', '900'))
+# Seconds the refresh worker waits after a write so bursts refresh once
+TERRITORY_INTEL_DEBOUNCE = float(os.environ.get('TERRITORY_INTEL_DEBOUNCE', '2'))
+# Seconds the refresh lock lasts unless renewed; the worker holding it renews
+# it before each territory, so one stuck worker blocks refreshes this long at most
+TERRITORY_INTEL_LOCK_SECONDS = 120
+# Territories one ai-insights batch request may ask for
+TERRITORY_INSIGHTS_BATCH_MAX = int(os.environ.get('TERRITORY_INSIGHTS_BATCH_MAX', '100'))
+
+# Set on writes that change a territory's inputs; wakes the refresh worker
+territory_intel_dirty = asyncio.Event()
+
+async def bump_territory_version(*territory_ids: Optional[str]):
+    """Mark territories' intelligence inputs as changed (pins, posts, events, projects, communities)"""
+    for territory_id in {t for t in territory_ids if t}:
+        await db.territory_stats.update_one(
+            {"territoryId": territory_id},
+            {"$inc": {"contentVersion": 1}, "$setOnInsert": {"territoryId": territory_id}},
+            upsert=True
+        )
+    territory_intel_dirty.set()
+
+class ServerTiming:
+    """Named durations for one request, rendered as a Server-Timing header"""
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+    
+    async def measure(self, name: str, awaitable):
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + (time.perf_counter() - started) * 1000
+    
+    def header(self) -> str:
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in self.durations.items())
+
+# Only the fields analyze_territory_intelligence (and the sentiment/keyword backfills) read
+PIN_ANALYSIS_FIELDS = {"_id": 0, "type": 1}
+COMMUNITY_ANALYSIS_FIELDS = {"_id": 0, "id": 1, "members": 1}
+POST_ANALYSIS_FIELDS = {"_id": 0, "text": 1, "createdAt": 1}
+EVENT_ANALYSIS_FIELDS = {"_id": 0, "title": 1, "createdAt": 1}
+PROJECT_ANALYSIS_FIELDS = {"_id": 0, "id": 1}
+
+async def load_territory_inputs(territory: Dict[str, Any], timing: ServerTiming) -> Dict[str, Any]:
+    """Everything compute_territory_intelligence reads for one territory"""
+    territory_id = territory['id']
+    
+    async def load_communities_and_posts():
+        communities = await db.communities.find({"territoryId": territory_id}, COMMUNITY_ANALYSIS_FIELDS).to_list(length=None)
+        community_ids = [c["id"] for c in communities]
+        posts = await db.posts.find({"communityId": {"$in": community_ids}}, POST_ANALYSIS_FIELDS).to_list(length=None) if community_ids else []
+        return communities, posts
+    
+    async def load_news_metrics():
+        # Articles mentioning this territory, else the city-wide snapshot
+        metrics = await get_territory_news_metrics(db, territory)
+        if metrics is None:
+            metrics = {**await city_news_metrics(2), "scope": "city"}
+        return metrics
+    
+    # Gather all territory data; the queries are independent, so they run concurrently
+    pins, (communities, posts), events, projects, news_metrics, system_config = await asyncio.gather(
+        timing.measure("pins", db.pins.find({"territoryId": territory_id}, PIN_ANALYSIS_FIELDS).to_list(length=None)),
+        timing.measure("posts", load_communities_and_posts()),
+        timing.measure("events", db.events.find({"territoryId": territory_id}, EVENT_ANALYSIS_FIELDS).to_list(length=None)),
+        timing.measure("projects", db.projects.find({"territoryId": territory_id}, PROJECT_ANALYSIS_FIELDS).to_list(length=None)),
+        timing.measure("news", load_news_metrics()),
+        timing.measure("config", db.system_config.find_one({"key": "openai_api_key"}, {"_id": 0, "value": 1})),
+    )
+    return {
+        "pins": pins, "communities": communities, "posts": posts, "events": events, "projects": projects,
+        "news_metrics": news_metrics, "system_config": system_config, "stats": None
+    }
+
+async def load_territories_aggregates(inputs: Dict[str, Dict[str, Any]], timing: ServerTiming, top_n: int = 8):
+    """
+    get_territory_sentiment and get_territory_keywords for every territory in
+    load_territories_inputs' `inputs`, stored as their "sentiment" and
+    "top_keywords": one $in query each for the term counts, the approved
+    comments of territories still to be backfilled and the document
+    frequencies, and one bulk write per collection for the backfills. A
+    territory whose backfill fails gets its exception as "error" instead.
+    """
+    territory_ids = list(inputs)
+    unsummed = [t for t in territory_ids if not sentiment_totals_current(inputs[t]["stats"])]
+    indexed = [t for t in territory_ids if inputs[t]["stats"].get("keywordTermsInitialized")]
+    
+    async def find_all(collection, query, projection) -> List[Dict[str, Any]]:
+        if not query["territoryId"]["$in"]:
+            return []
+        return await collection.find(query, projection).to_list(length=None)
+    
+    async def write_all(collection, writes: List[UpdateOne]):
+        if writes:
+            await collection.bulk_write(writes, ordered=False)
+    
+    comments, term_rows = await asyncio.gather(
+        timing.measure("comments", find_all(
+            db.comments, {"territoryId": {"$in": unsummed}, "validationStatus": "approved"},
+            {"_id": 0, "territoryId": 1, "text": 1}
+        )),
+        # Every term of these territories: Mongo can't cap a find per territory,
+        # so the KEYWORD_RANK_CANDIDATES cut is made in memory below
+        timing.measure("keywords", find_all(
+            db.territory_keywords, {"territoryId": {"$in": indexed}}, {"_id": 0, "territoryId": 1, "term": 1, "count": 1}
+        )),
+    )
+    comment_texts = {territory_id: [] for territory_id in unsummed}
+    for comment in comments:
+        if comment.get("text"):
+            comment_texts[comment["territoryId"]].append(comment["text"])
+    term_counts = {territory_id: {} for territory_id in indexed}
+    for row in term_rows:
+        term_counts[row["territoryId"]][row["term"]] = row["count"]
+    
+    stats_writes, keyword_writes = {}, []
+    
+    async def backfill(territory_id: str):
+        territory = inputs[territory_id]
+        texts = tuple(p['text'] for p in territory["posts"] if p.get('text'))
+        texts += tuple(e['title'] for e in territory["events"] if e.get('title'))
+        update = {"$set": {"territoryId": territory_id}}
+        if territory_id in comment_texts:
+            # As in get_territory_sentiment: the full recount supersedes earlier increments
+            summed = texts + tuple(comment_texts[territory_id])
+            summary = await ANALYSIS_POOL.run(texts_sentiment_summary, summed, size=len(summed))
+            update["$set"].update({"sentiment": summary, "sentimentInitialized": True, "sentimentMode": SENTIMENT_MATCH_MODE})
+            territory["sentiment"] = summary
+        else:
+            territory["sentiment"] = territory["stats"].get("sentiment", {})
+        if territory_id not in term_counts:
+            counts = await ANALYSIS_POOL.run(texts_keyword_counts, texts, size=len(texts))
+            keyword_writes.extend(
+                UpdateOne({"territoryId": territory_id, "term": term}, {"$set": {"count": n}}, upsert=True)
+                for term, n in counts.items()
+            )
+            update["$set"]["keywordTermsInitialized"] = True
+            update["$unset"] = {"keywords": "", "keywordsInitialized": ""}
+            term_counts[territory_id] = counts
+        if len(update["$set"]) > 1:
+            stats_writes[territory_id] = UpdateOne({"territoryId": territory_id}, update, upsert=True)
     
-    # Gather all territory data
-    pins = await db.pins.find({"territoryId": territory_id}).to_list(length=None)
-    communities = await db.communities.find({"territoryId": territory_id}).to_list(length=None)
-    community_ids = [c["id"] for c in communities]
-    posts = await db.posts.find({"communityId": {"$in": community_ids}}).to_list(length=None) if community_ids else []
-    events = await db.events.find({"territoryId": territory_id}).to_list(length=None)
-    projects = await db.projects.find({"territoryId": territory_id}).to_list(length=None)
+    backfills = await timing.measure("backfill", asyncio.gather(
+        *(backfill(territory_id) for territory_id in territory_ids), return_exceptions=True
+    ))
+    for territory_id, error in zip(territory_ids, backfills):
+        if isinstance(error, Exception):
+            inputs[territory_id]["error"] = error
+    
+    candidates = {
+        territory_id: top_keyword_candidates(term_counts[territory_id], KEYWORD_RANK_CANDIDATES)
+        for territory_id in territory_ids if "error" not in inputs[territory_id]
+    }
+    terms = list(set().union(*candidates.values()))
+    city, df_rows, _, _ = await asyncio.gather(
+        keyword_df_cache.get("city"),
+        timing.measure("keyword_df", db.keyword_df.find({"_id": {"$in": terms}}).to_list(length=None)),
+        write_all(db.territory_keywords, keyword_writes),
+        write_all(db.territory_stats, list(stats_writes.values())),
+    )
+    df = {row["_id"]: row["df"] for row in df_rows}
+    for territory_id, territory_candidates in candidates.items():
+        inputs[territory_id]["top_keywords"] = top_keywords_tfidf(territory_candidates, df, city["documents"], top_n)
+
+async def load_territories_inputs(territories: List[Dict[str, Any]], timing: ServerTiming) -> Dict[str, Dict[str, Any]]:
+    """
+    load_territory_inputs for many territories: one $in query per collection,
+    partitioned by territory in memory, with the city news and config read once
+    """
+    territory_ids = [t['id'] for t in territories]
+    by_territory = {"$in": territory_ids}
+    
+    async def load_communities_and_posts():
+        communities = await db.communities.find({"territoryId": by_territory}, {**COMMUNITY_ANALYSIS_FIELDS, "territoryId": 1}).to_list(length=None)
+        community_ids = [c["id"] for c in communities]
+        posts = await db.posts.find({"communityId": {"$in": community_ids}}, {**POST_ANALYSIS_FIELDS, "communityId": 1}).to_list(length=None) if community_ids else []
+        return communities, posts
+    
+    pins, (communities, posts), events, projects, territory_news, city_news, system_config, stats = await asyncio.gather(
+        timing.measure("pins", db.pins.find({"territoryId": by_territory}, {**PIN_ANALYSIS_FIELDS, "territoryId": 1}).to_list(length=None)),
+        timing.measure("posts", load_communities_and_posts()),
+        timing.measure("events", db.events.find({"territoryId": by_territory}, {**EVENT_ANALYSIS_FIELDS, "territoryId": 1}).to_list(length=None)),
+        timing.measure("projects", db.projects.find({"territoryId": by_territory}, {**PROJECT_ANALYSIS_FIELDS, "territoryId": 1}).to_list(length=None)),
+        timing.measure("news", get_territories_news_metrics(db, territories)),
+        timing.measure("city_news", city_news_metrics(2)),
+        timing.measure("config", db.system_config.find_one({"key": "openai_api_key"}, {"_id": 0, "value": 1})),
+        timing.measure("stats", db.territory_stats.find({"territoryId": by_territory}, {"_id": 0}).to_list(length=None)),
+    )
+    
+    inputs = {
+        territory_id: {
+            "pins": [], "communities": [], "posts": [], "events": [], "projects": [],
+            # Territories without enough local articles share the one city-wide snapshot
+            "news_metrics": territory_news.get(territory_id) or {**city_news, "scope": "city"},
+            "system_config": system_config,
+            # {} rather than None: a territory without stats must not be re-read one by one
+            "stats": {}
+        }
+        for territory_id in territory_ids
+    }
+    community_territory = {c["id"]: c["territoryId"] for c in communities}
+    for key, docs in (("pins", pins), ("communities", communities), ("events", events), ("projects", projects)):
+        for doc in docs:
+            inputs[doc["territoryId"]][key].append(doc)
+    for post in posts:
+        inputs[community_territory[post["communityId"]]]["posts"].append(post)
+    for doc in stats:
+        inputs[doc["territoryId"]]["stats"] = doc
+    await load_territories_aggregates(inputs, timing)
+    return inputs
+
+async def compute_territory_intelligence(territory: Dict[str, Any], timing: Optional[ServerTiming] = None,
+                                         inputs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Full analyze_territory_intelligence result for a territory, ChatGPT-enhanced when configured"""
+    territory_id = territory['id']
+    timing = timing or ServerTiming()
+    if inputs is None:
+        inputs = await load_territory_inputs(territory, timing)
+    if "error" in inputs:
+        raise inputs["error"]
+    pins, communities, posts = inputs["pins"], inputs["communities"], inputs["posts"]
+    events, projects, system_config = inputs["events"], inputs["projects"], inputs["system_config"]
     
     # Get territory rating
-    rating = territory.get('rating', {}).get('totalScore', 0)
+    rating = (territory.get('rating') or {}).get('totalScore', 0)
     
     # Get RID (using pincode as RID)
     rid = territory.get('pincode', territory.get('id', 'unknown'))
     
+    # Sentiment and keywords come from maintained aggregates, so the content summary skips texts
+    content_inputs = territory_content_inputs(posts, events, pins, projects, communities, with_texts=False)
+    content = timing.measure("content", ANALYSIS_POOL.run(
+        territory_content_summary, *content_inputs, size=len(posts) + len(events) + len(pins)
+    ))
+    if "top_keywords" in inputs:
+        # Batch inputs: load_territories_aggregates read them for all territories at once
+        sentiment_stats, top_keywords = inputs["sentiment"], inputs["top_keywords"]
+        content_summary = await content
+    else:
+        sentiment_stats, top_keywords, content_summary = await asyncio.gather(
+            timing.measure("sentiment", get_territory_sentiment(territory_id, posts, events, inputs["stats"])),
+            timing.measure("keywords", get_territory_keywords(territory_id, posts, events, stats=inputs["stats"])),
+            content,
+        )
+    
     # Perform AI analysis (uses demo mode by default)
-    ai_insights = await analyze_territory_intelligence(
+    ai_insights = await timing.measure("analyze", analyze_territory_intelligence(
         territory_id=territory_id,
         rid=rid,
         posts=posts,
@@ -1097,20 +2080,231 @@ async def get_territory_ai_insights(territory_id: str, user: User = Depends(get_
         pins=pins,
         projects=projects,
         communities=communities,
-        rating=rating
-    )
+        rating=rating,
+        news_metrics=inputs["news_metrics"],
+        sentiment_stats=sentiment_stats,
+        top_keywords=top_keywords,
+        content_summary=content_summary
+    ))
     
     # If OpenAI API key configured, enhance with ChatGPT
-    system_config = await db.system_config.find_one({"key": "openai_api_key"})
     if system_config and system_config.get("value"):
         from ai_sentiment_analyzer import generate_chatgpt_insight
-        ai_insights["ai_insight"] = await generate_chatgpt_insight(ai_insights, system_config["value"])
+        ai_insights["ai_insight"] = await timing.measure("chatgpt", generate_chatgpt_insight(ai_insights, system_config["value"]))
         ai_insights["ai_mode"] = "ChatGPT"
     else:
         ai_insights["ai_mode"] = "Demo"
     
     return ai_insights
 
+def territory_intelligence_snapshot(territory_id: str, version: int, result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "territoryId": territory_id,
+        "version": version,
+        "result": result,
+        "computedAt": datetime.now(timezone.utc).isoformat()
+    }
+
+async def save_territory_intelligence(territory_id: str, version: int, result: Dict[str, Any]) -> Dict[str, Any]:
+    snapshot = territory_intelligence_snapshot(territory_id, version, result)
+    await db.territory_intelligence.update_one({"territoryId": territory_id}, {"$set": snapshot}, upsert=True)
+    return snapshot
+
+async def refresh_territory_intelligence(territory_id: str, timing: Optional[ServerTiming] = None) -> Optional[Dict[str, Any]]:
+    """Recompute and store a territory's snapshot; None if the territory no longer exists"""
+    territory = await db.territories.find_one({"id": territory_id})
+    if not territory:
+        await db.territory_intelligence.delete_one({"territoryId": territory_id})
+        return None
+    # Read the version first: writes during the computation leave the snapshot stale
+    stats = await db.territory_stats.find_one({"territoryId": territory_id}, {"_id": 0, "contentVersion": 1})
+    version = (stats or {}).get("contentVersion", 0)
+    return await save_territory_intelligence(territory_id, version, await compute_territory_intelligence(territory, timing))
+
+async def refresh_stale_intelligence(lock: Optional[str] = None) -> int:
+    """
+    Refresh snapshots whose territory changed since, or that are older than
+    TERRITORY_INTEL_MAX_AGE; with `lock`, renew that lock before each one and
+    stop if another worker has taken it over
+    """
+    snapshots = await db.territory_intelligence.find({}, {"_id": 0, "territoryId": 1, "version": 1, "computedAt": 1}).to_list(length=None)
+    if not snapshots:
+        return 0
+    stats = await db.territory_stats.find(
+        {"territoryId": {"$in": [s["territoryId"] for s in snapshots]}}, {"_id": 0, "territoryId": 1, "contentVersion": 1}
+    ).to_list(length=None)
+    versions = {s["territoryId"]: s.get("contentVersion", 0) for s in stats}
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=TERRITORY_INTEL_MAX_AGE)).isoformat()
+    stale = [
+        s["territoryId"] for s in snapshots
+        if versions.get(s["territoryId"], 0) > s.get("version", 0) or s["computedAt"] < cutoff
+    ]
+    for refreshed, territory_id in enumerate(stale):
+        if lock and not await acquire_lock(lock, TERRITORY_INTEL_LOCK_SECONDS):
+            return refreshed
+        await refresh_territory_intelligence(territory_id)
+    return len(stale)
+
+async def run_intelligence_worker():
+    """
+    Refresh snapshots shortly after relevant writes, and on a schedule. Every
+    worker runs this, but only the one holding the refresh lock refreshes;
+    the others keep their wake-up pending and try again after it.
+    """
+    while True:
+        try:
+            try:
+                await asyncio.wait_for(territory_intel_dirty.wait(), timeout=TERRITORY_INTEL_MAX_AGE / 2)
+                await asyncio.sleep(TERRITORY_INTEL_DEBOUNCE)
+            except asyncio.TimeoutError:
+                pass
+            if not await acquire_lock("territory_intel_refresh", TERRITORY_INTEL_LOCK_SECONDS):
+                # Its refresh may have read versions older than our writes
+                await asyncio.sleep(TERRITORY_INTEL_DEBOUNCE)
+                continue
+            try:
+                territory_intel_dirty.clear()
+                await refresh_stale_intelligence("territory_intel_refresh")
+            finally:
+                await release_lock("territory_intel_refresh")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Territory intelligence refresh error: {e}")
+            await asyncio.sleep(TERRITORY_INTEL_DEBOUNCE)
+
+def territory_insights_response(snapshot: Dict[str, Any], content_version: int) -> Dict[str, Any]:
+    """A stored snapshot as served by the ai-insights endpoints; stale ones wake the refresh worker"""
+    stale = content_version > snapshot["version"]
+    if stale:
+        territory_intel_dirty.set()
+    computed_at = datetime.fromisoformat(snapshot["computedAt"])
+    return {
+        **snapshot["result"],
+        "snapshot": {
+            "version": snapshot["version"],
+            "computedAt": snapshot["computedAt"],
+            "age_seconds": round((datetime.now(timezone.utc) - computed_at).total_seconds(), 1),
+            "stale": stale
+        }
+    }
+
+@api_router.get("/territories/{territory_id}/ai-insights")
+async def get_territory_ai_insights(territory_id: str, response: Response, user: User = Depends(get_current_user)):
+    """Get AI-driven sentiment analysis and contextual intelligence for territory"""
+    timing = ServerTiming()
+    snapshot, stats = await asyncio.gather(
+        timing.measure("snapshot", db.territory_intelligence.find_one({"territoryId": territory_id}, {"_id": 0})),
+        timing.measure("version", db.territory_stats.find_one({"territoryId": territory_id}, {"_id": 0, "contentVersion": 1})),
+    )
+    if snapshot is None:
+        try:
+            snapshot = await timing.measure("compute", refresh_territory_intelligence(territory_id, timing))
+        except AnalysisUnavailable:
+            raise HTTPException(status_code=503, detail="Territory analysis is taking too long; try again shortly")
+        if snapshot is None:
+            raise HTTPException(status_code=404, detail="Territory not found")
+    response.headers["Server-Timing"] = timing.header()
+    # The frontend is served from another origin; let its devtools show the breakdown
+    response.headers["Timing-Allow-Origin"] = "*"
+    return territory_insights_response(snapshot, (stats or {}).get("contentVersion", 0))
+
+@api_router.post("/territories/ai-insights/batch")
+async def get_territories_ai_insights(batch: TerritoryInsightsBatch, user: User = Depends(get_current_user)):
+    """
+    AI insights for many territories as NDJSON: one {territoryId, status,
+    insights | detail} line per territory as soon as it is ready (stored
+    snapshots first), then a {done, ...} summary line. Territories without a
+    snapshot are loaded together with one query per collection and share the
+    city news metrics; their new snapshots are stored with one bulk write
+    before the summary. Each computed territory has its own outbound deadline,
+    and a territory that fails gets an error line; the stream goes on.
+    """
+    territory_ids = list(dict.fromkeys(batch.territoryIds))
+    if len(territory_ids) > TERRITORY_INSIGHTS_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {TERRITORY_INSIGHTS_BATCH_MAX} territories per batch")
+    timing = ServerTiming()
+    snapshots, stats = await asyncio.gather(
+        timing.measure("snapshot", db.territory_intelligence.find({"territoryId": {"$in": territory_ids}}, {"_id": 0}).to_list(length=None)),
+        timing.measure("version", db.territory_stats.find(
+            {"territoryId": {"$in": territory_ids}}, {"_id": 0, "territoryId": 1, "contentVersion": 1}
+        ).to_list(length=None)),
+    )
+    snapshots = {s["territoryId"]: s for s in snapshots}
+    versions = {s["territoryId"]: s.get("contentVersion", 0) for s in stats}
+    missing = [t for t in territory_ids if t not in snapshots]
+    counts = {"cached": 0, "computed": 0, "failed": 0}
+    computed = []
+    
+    def line(territory_id: str, status_code: int, **body) -> str:
+        return json.dumps({"territoryId": territory_id, "status": status_code, **jsonable_encoder(body)}) + "\n"
+    
+    def failed(territory_id: str, error: Exception) -> str:
+        counts["failed"] += 1
+        if isinstance(error, (AnalysisUnavailable, DeadlineExceeded)):
+            return line(territory_id, 503, detail="Territory analysis is taking too long; try again shortly")
+        logger.error(f"Territory intelligence error for {territory_id}: {error}")
+        return line(territory_id, 500, detail="Territory analysis failed")
+    
+    async def compute(territory: Dict[str, Any], inputs: Dict[str, Any]) -> str:
+        territory_id = territory["id"]
+        # Versions were read before the inputs: writes during the computation leave the snapshot stale
+        version = versions.get(territory_id, 0)
+        try:
+            # Each territory gets the outbound budget of a single-territory request
+            with request_deadline(REQUEST_DEADLINE):
+                result = await compute_territory_intelligence(territory, ServerTiming(), inputs)
+        except Exception as e:
+            return failed(territory_id, e)
+        snapshot = territory_intelligence_snapshot(territory_id, version, result)
+        computed.append(snapshot)
+        counts["computed"] += 1
+        return line(territory_id, 200, insights=territory_insights_response(snapshot, version))
+    
+    async def stream():
+        for territory_id in territory_ids:
+            if territory_id in snapshots:
+                counts["cached"] += 1
+                yield line(territory_id, 200, insights=territory_insights_response(snapshots[territory_id], versions.get(territory_id, 0)))
+        territories = []
+        if missing:
+            territories = await timing.measure("territories", db.territories.find({"id": {"$in": missing}}).to_list(length=None))
+        found = {t["id"] for t in territories}
+        for territory_id in missing:
+            if territory_id not in found:
+                yield line(territory_id, 404, detail="Territory not found")
+        if territories:
+            try:
+                with request_deadline(REQUEST_DEADLINE):
+                    inputs = await load_territories_inputs(territories, timing)
+            except Exception as e:
+                # Without inputs none of them can be computed; report each and still finish the stream
+                for territory in territories:
+                    yield failed(territory["id"], e)
+                territories = []
+        if territories:
+            started = time.perf_counter()
+            for next_done in asyncio.as_completed([compute(t, inputs[t["id"]]) for t in territories]):
+                yield await next_done
+            timing.durations["compute"] = (time.perf_counter() - started) * 1000
+        if computed:
+            try:
+                await timing.measure("save", db.territory_intelligence.bulk_write([
+                    UpdateOne({"territoryId": s["territoryId"]}, {"$set": s}, upsert=True) for s in computed
+                ], ordered=False))
+            except Exception as e:
+                # The insights were already streamed; the next request recomputes them
+                logger.error(f"Failed to store {len(computed)} territory intelligence snapshots: {e}")
+        yield json.dumps({
+            "done": True,
+            "territories": len(territory_ids),
+            **counts,
+            "not_found": len(missing) - len(found),
+            "timing_ms": {name: round(ms, 1) for name, ms in timing.durations.items()}
+        }) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @api_router.get("/professionals")
 async def get_professionals(user: User = Depends(get_current_user), territory_id: Optional[str] = Query(None), profession_type: Optional[str] = Query(None)):
     query = {}
@@ -1136,7 +2330,8 @@ async def create_project(project: ProjectCreate, user: User = Depends(get_curren
         "createdAt": datetime.now(timezone.utc)
     }
     await db.projects.insert_one(project_doc)
-    await manager.broadcast(json.dumps({"type": "project_created", "data": {k: v.isoformat() if isinstance(v, datetime) else v for k, v in project_doc.items() if k != '_id'}}))
+    await bump_territory_version(project.territoryId)
+    await manager.broadcast({"type": "project_created", "data": {k: v.isoformat() if isinstance(v, datetime) else v for k, v in project_doc.items() if k != '_id'}})
     return Project(**project_doc)
 
 @api_router.get("/projects")
@@ -1181,7 +2376,10 @@ async def create_event(event: EventCreate, user: User = Depends(get_current_user
         "createdAt": datetime.now(timezone.utc)
     }
     await db.events.insert_one(event_doc)
-    await manager.broadcast(json.dumps({"type": "event_created", "data": {k: v.isoformat() if isinstance(v, datetime) else v for k, v in event_doc.items() if k != '_id'}}))
+    await record_territory_sentiment(event.territoryId, event.title)
+    await record_territory_keywords(event.territoryId, event.title)
+    await bump_territory_version(event.territoryId)
+    await manager.broadcast({"type": "event_created", "data": {k: v.isoformat() if isinstance(v, datetime) else v for k, v in event_doc.items() if k != '_id'}})
     return Event(**event_doc)
 
 @api_router.get("/events")
@@ -1201,7 +2399,7 @@ async def submit_metrics(metrics: MetricsSubmission, user: User = Depends(get_cu
     metrics_doc = metrics.dict()
     metrics_doc["submittedBy"] = user.email
     await db.metrics_submissions.insert_one(metrics_doc)
-    await manager.broadcast(json.dumps({"type": "metrics_submitted", "territoryId": metrics.territoryId}))
+    await manager.broadcast({"type": "metrics_submitted", "territoryId": metrics.territoryId})
     return {"message": "Metrics submitted successfully", "id": metrics.id}
 
 @api_router.get("/metrics")
@@ -1217,9 +2415,18 @@ async def get_metrics(user: User = Depends(get_current_user), territory_id: Opti
 @api_router.get("/news/scraped")
 async def get_scraped_news(user: User = Depends(get_current_user), pages: int = Query(2, le=5)):
     """Get scraped news data"""
-    from news_scraper import analyze_news_metrics
-    news_data = analyze_news_metrics(pages=pages)
-    return news_data
+    try:
+        return await news_cache.get(pages)
+    except NewsUnavailable:
+        last = news_cache.peek(pages)
+        if last is None:
+            raise HTTPException(status_code=503, detail="News is unavailable; try again shortly")
+        return last
+
+@api_router.get("/news/cache-stats")
+async def get_news_cache_stats(user: User = Depends(get_current_user)):
+    """Hit rate and refresh timings of the in-process news metrics cache"""
+    return news_cache.stats()
 
 @api_router.get("/analytics/dashboard")
 async def get_dashboard_analytics(user: User = Depends(get_current_user), territory_id: Optional[str] = Query(None)):
@@ -1271,8 +2478,7 @@ async def get_dashboard_analytics(user: User = Depends(get_current_user), territ
         livability_index = 0
     
     # Get news metrics
-    from news_scraper import analyze_news_metrics
-    news_metrics = analyze_news_metrics(pages=1)
+    news_metrics = await city_news_metrics(1)
     
     return {
         "totalTerritories": len(territories),
@@ -1299,13 +2505,131 @@ async def get_dashboard_analytics(user: User = Depends(get_current_user), territ
         }
     }
 
+@api_router.get("/ws/stats")
+async def get_ws_stats(user: User = Depends(get_current_user)):
+    """Live WebSocket connection and broadcast fan-out stats for this worker"""
+    return manager.stats()
+
+@api_router.get("/integrations/stats")
+async def get_integration_stats(user: User = Depends(get_current_user)):
+    """Circuit breaker state of the outbound integrations for this worker"""
+    return breaker_stats()
+
+@api_router.get("/ai/cache-stats")
+async def get_llm_cache_stats(user: User = Depends(get_current_user)):
+    """Hit rate of the ChatGPT insight cache (memory and Mongo tiers) for this worker"""
+    return LLM_CACHE.stats()
+
+@api_router.get("/ai/limiter-stats")
+async def get_llm_limiter_stats(user: User = Depends(get_current_user)):
+    """Per-API-key LLM rate limiter state and queue wait times for this worker"""
+    return LLM_LIMITER.stats()
+
+@api_router.get("/analysis/pool-stats")
+async def get_analysis_pool_stats(user: User = Depends(get_current_user)):
+    """Process pool used for CPU-heavy territory analysis on this worker"""
+    return ANALYSIS_POOL.stats()
+
+# Streaming endpoints that give each item its own REQUEST_DEADLINE instead of one for the whole response
+PER_ITEM_DEADLINE_PATHS = {"/api/territories/ai-insights/batch"}
+
+@app.middleware("http")
+async def outbound_deadline(request, call_next):
+    # Bound the total time outbound integrations may take while serving one request
+    if request.url.path in PER_ITEM_DEADLINE_PATHS:
+        return await call_next(request)
+    with request_deadline(REQUEST_DEADLINE):
+        return await call_next(request)
+
+@app.on_event("startup")
+async def attach_llm_cache():
+    await LLM_CACHE.attach(db.llm_cache)
+
+@app.on_event("startup")
+async def ensure_territory_stats_index():
+    await db.territory_stats.create_index("territoryId", unique=True)
+    await db.keyword_stats.create_index("scope", unique=True)
+    await db.territory_keywords.create_index([("territoryId", 1), ("term", 1)], unique=True)
+    await db.territory_keywords.create_index([("territoryId", 1), ("count", -1), ("term", 1)])
+
+@app.on_event("startup")
+async def init_ws_replay_store():
+    if not WS_REPLAY_PERSIST:
+        return
+    if "ws_events" not in await db.list_collection_names():
+        await db.create_collection("ws_events", capped=True, size=WS_REPLAY_COLLECTION_BYTES)
+    await db.ws_events.create_index([("epoch", 1), ("seq", 1)])
+    await manager.init_replay_store(db.ws_events, db.ws_counters)
+
+@app.on_event("startup")
+async def start_ws_heartbeat():
+    manager.start_heartbeat(WS_PING_INTERVAL, WS_IDLE_TIMEOUT)
+
+@app.on_event("shutdown")
+async def stop_ws_heartbeat():
+    await manager.stop_heartbeat()
+
+news_ingestion_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_news_ingestion():
+    global news_ingestion_task
+    if NEWS_INGEST_ENABLED:
+        news_ingestion_task = asyncio.create_task(run_ingestion_loop(db, lock=acquire_lock))
+
+territory_intel_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_intelligence_worker():
+    global territory_intel_task
+    await db.territory_intelligence.create_index("territoryId", unique=True)
+    territory_intel_task = asyncio.create_task(run_intelligence_worker())
+
+@app.on_event("shutdown")
+async def stop_intelligence_worker():
+    if territory_intel_task is not None:
+        territory_intel_task.cancel()
+
+@app.on_event("startup")
+async def start_analysis_pool():
+    await ANALYSIS_POOL.start()
+
+@app.on_event("shutdown")
+async def stop_analysis_pool():
+    ANALYSIS_POOL.shutdown()
+
+moderation_tasks: List[asyncio.Task] = []
+
+@app.on_event("startup")
+async def start_moderation_worker():
+    # The lease loop claims, at once, the comments left pending by a restart
+    moderation_tasks.extend([asyncio.create_task(run_moderation_worker()), asyncio.create_task(run_moderation_leases())])
+
+@app.on_event("shutdown")
+async def stop_moderation_worker():
+    for task in moderation_tasks:
+        task.cancel()
+
+@app.on_event("shutdown")
+async def stop_news_ingestion():
+    if news_ingestion_task is not None:
+        news_ingestion_task.cancel()
+    await close_http_client()
+
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, since: Optional[int] = Query(None), epoch: Optional[str] = Query(None)):
     try:
+        if not await manager.connect(websocket, since=since, epoch=epoch):
+            return
         while True:
-            await websocket.receive_text()
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            # Any frame (pong or otherwise) counts as a sign of life
+            manager.touch(websocket)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
 
 app.include_router(api_router)
@@ -1324,4 +2648,5 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    # Protocol-level ping/pong on top of the application heartbeat
+    uvicorn.run(app, host="0.0.0.0", port=8001, ws_ping_interval=WS_PING_INTERVAL, ws_ping_timeout=WS_IDLE_TIMEOUT)
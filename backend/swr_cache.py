@@ -0,0 +1,97 @@
+"""
+Stale-While-Revalidate Cache
+In-process async cache: fresh values are served directly, stale values are
+served immediately while a single background refresh runs per key, and
+concurrent misses share one in-flight load (single-flight).
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+class StaleWhileRevalidateCache:
+    def __init__(self, loader: Callable[[Hashable], Awaitable[Any]], ttl: float,
+                 max_stale: Optional[float] = None, name: str = "cache"):
+        self.loader = loader
+        self.ttl = ttl
+        # Past ttl + max_stale an entry is too old to serve; callers wait for the reload
+        self.max_stale = max_stale
+        self.name = name
+        self._entries: Dict[Hashable, tuple] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.refresh_seconds_total = 0.0
+        self.last_refresh_seconds = 0.0
+
+    async def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, loaded_at = entry
+            age = time.monotonic() - loaded_at
+            if age < self.ttl:
+                self.hits += 1
+                return value
+            if self.max_stale is None or age < self.ttl + self.max_stale:
+                self.stale_hits += 1
+                self._refresh(key)
+                return value
+        self.misses += 1
+        return await asyncio.shield(self._refresh(key))
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Last loaded value regardless of age, without triggering a refresh."""
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: Hashable, value: Any):
+        self._entries[key] = (value, time.monotonic())
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def _refresh(self, key: Hashable) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key))
+            # Background refresh failures are counted, not raised into the loop
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _load(self, key: Hashable) -> Any:
+        started = time.perf_counter()
+        try:
+            value = await self.loader(key)
+        except Exception:
+            self.refresh_errors += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            self.last_refresh_seconds = time.perf_counter() - started
+            self.refresh_seconds_total += self.last_refresh_seconds
+        self.refreshes += 1
+        self.set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        loads = self.refreshes + self.refresh_errors
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "refreshes_in_flight": len(self._inflight),
+            "last_refresh_ms": round(self.last_refresh_seconds * 1000, 1),
+            "avg_refresh_ms": round(self.refresh_seconds_total / loads * 1000, 1) if loads else 0.0,
+        }
@@ -1,7 +1,9 @@
-import React, { createContext, useContext, useEffect, useState } from 'react';
+import React, { createContext, useContext, useEffect, useRef, useState } from 'react';
 
 const WebSocketContext = createContext();
 
+const MAX_RECONNECT_DELAY = 30000;
+
 export const useWebSocket = () => {
   const context = useContext(WebSocketContext);
   if (!context) {
@@ -14,39 +16,83 @@ export const WebSocketProvider = ({ children }) => {
   const [ws, setWs] = useState(null);
   const [connected, setConnected] = useState(false);
   const [lastMessage, setLastMessage] = useState(null);
+  // Bumped when the server can't replay what we missed; pages should refetch
+  const [resyncCount, setResyncCount] = useState(0);
+  const lastSeq = useRef(null);
+  // Sequence numbers are only comparable within the server's epoch
+  const lastEpoch = useRef(null);
 
   useEffect(() => {
     const backendUrl = process.env.REACT_APP_BACKEND_URL;
     const wsUrl = backendUrl.replace('https://', 'wss://').replace('http://', 'ws://');
-    const socket = new WebSocket(`${wsUrl}/ws`);
+    let socket = null;
+    let reconnectTimer = null;
+    let reconnectDelay = 1000;
+    let closedByUs = false;
 
-    socket.onopen = () => {
-      console.log('WebSocket connected');
-      setConnected(true);
-    };
+    const connect = () => {
+      const since = lastSeq.current !== null
+        ? `?since=${lastSeq.current}&epoch=${encodeURIComponent(lastEpoch.current || '')}`
+        : '';
+      socket = new WebSocket(`${wsUrl}/ws${since}`);
 
-    socket.onmessage = (event) => {
-      try {
-        const data = JSON.parse(event.data);
-        setLastMessage(data);
-      } catch (e) {
-        console.log('WebSocket message:', event.data);
-      }
-    };
+      socket.onopen = () => {
+        console.log('WebSocket connected');
+        reconnectDelay = 1000;
+        setConnected(true);
+      };
 
-    socket.onerror = (error) => {
-      console.error('WebSocket error:', error);
-    };
+      socket.onmessage = (event) => {
+        try {
+          const data = JSON.parse(event.data);
+          if (data.type === 'ping') {
+            socket.send(JSON.stringify({ type: 'pong' }));
+            return;
+          }
+          if (data.type === 'resync_required') {
+            lastSeq.current = data.seq;
+            lastEpoch.current = data.epoch || null;
+            setResyncCount((count) => count + 1);
+            return;
+          }
+          if (typeof data.seq === 'number') {
+            // Frames replayed after a reconnect may overlap what we already saw
+            if (lastSeq.current !== null && data.epoch === lastEpoch.current && data.seq <= lastSeq.current) {
+              return;
+            }
+            lastSeq.current = data.seq;
+            lastEpoch.current = data.epoch || null;
+          }
+          setLastMessage(data);
+        } catch (e) {
+          console.log('WebSocket message:', event.data);
+        }
+      };
 
-    socket.onclose = () => {
-      console.log('WebSocket disconnected');
-      setConnected(false);
+      socket.onerror = (error) => {
+        console.error('WebSocket error:', error);
+      };
+
+      socket.onclose = () => {
+        console.log('WebSocket disconnected');
+        setConnected(false);
+        if (!closedByUs) {
+          reconnectTimer = setTimeout(connect, reconnectDelay);
+          reconnectDelay = Math.min(reconnectDelay * 2, MAX_RECONNECT_DELAY);
+        }
+      };
+
+      setWs(socket);
     };
 
-    setWs(socket);
+    connect();
 
     return () => {
-      socket.close();
+      closedByUs = true;
+      clearTimeout(reconnectTimer);
+      if (socket) {
+        socket.close();
+      }
     };
   }, []);
 
@@ -57,8 +103,8 @@ export const WebSocketProvider = ({ children }) => {
   };
 
   return (
-    <WebSocketContext.Provider value={{ connected, lastMessage, sendMessage }}>
+    <WebSocketContext.Provider value={{ connected, lastMessage, resyncCount, sendMessage }}>
       {children}
     </WebSocketContext.Provider>
   );
-};
\ No newline at end of file
+};
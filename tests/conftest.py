@@ -0,0 +1,76 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(BACKEND / "devtools"))
+
+# server.py reads these at import time; tests never talk to a real Mongo
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("NEWS_INGEST_ENABLED", "false")
+os.environ.setdefault("ANALYSIS_POOL_WORKERS", "0")
+
+
+class ApiClient:
+    """TestClient bound to an admin's token; get/post/put/delete assert a 200 unless told otherwise."""
+    def __init__(self, client, db):
+        self.client = client
+        self.db = db
+        token = self.request("post", "/api/auth/signup", json={
+            "email": "admin@example.com", "password": "secret", "name": "Admin", "role": "admin"
+        }).json()["token"]
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def request(self, method, url, expect=200, **kwargs):
+        response = self.client.request(method, url, headers=getattr(self, "headers", None), **kwargs)
+        if expect is not None:
+            assert response.status_code == expect, (url, response.status_code, response.text)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("get", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("post", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("put", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("delete", url, **kwargs)
+
+    def run(self, awaitable_fn, *args, **kwargs):
+        """Run a coroutine function (e.g. a db call) on the app's event loop."""
+        return self.client.portal.call(awaitable_fn, *args, **kwargs)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """The FastAPI app on an in-memory database, with news metrics already ingested."""
+    import asyncio
+
+    import server
+    from memory_db import MemoryDatabase
+    from news_scraper import score_articles
+    from starlette.testclient import TestClient
+    from swr_cache import StaleWhileRevalidateCache
+
+    db = MemoryDatabase()
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "news_cache", StaleWhileRevalidateCache(
+        lambda pages: server.load_news_metrics(db, pages), ttl=60, name="news_metrics"))
+    monkeypatch.setattr(server, "keyword_df_cache", StaleWhileRevalidateCache(
+        server.load_keyword_df, ttl=60, name="keyword_df"))
+    # Module-level asyncio primitives bind to the first loop that waits on them
+    monkeypatch.setattr(server, "moderation_queue", asyncio.Queue())
+    monkeypatch.setattr(server, "territory_intel_dirty", asyncio.Event())
+    for pages in range(1, 6):
+        db.news_metrics.docs.append({
+            "pages": pages, "metrics": score_articles([]), "computedAt": "2026-01-01T00:00:00+00:00"
+        })
+    with TestClient(server.app) as client:
+        yield ApiClient(client, db)
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from analysis_pool import AnalysisPool, AnalysisTimeout, AnalysisUnavailable
+from resilience import request_deadline
+
+
+# Run in spawned workers, so they must be importable module-level functions
+def nap(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def die():
+    os._exit(1)
+
+
+def run_pool(scenario, **kwargs):
+    async def main():
+        pool = AnalysisPool(workers=1, min_items=1, **kwargs)
+        try:
+            return await scenario(pool)
+        finally:
+            pool.shutdown()
+    return asyncio.run(main())
+
+
+def test_small_inputs_run_inline():
+    async def scenario(pool):
+        assert await pool.run(nap, 0, size=0) == 0
+        return pool.stats()
+    stats = run_pool(scenario, timeout=5)
+    assert (stats["inline"], stats["offloaded"]) == (1, 0)
+
+
+def test_result_timeout():
+    async def scenario(pool):
+        with pytest.raises(AnalysisTimeout, match="took longer"):
+            await pool.run(nap, 3, size=1)
+        return pool.stats()
+    stats = run_pool(scenario, timeout=0.5)
+    assert stats["timeouts"] == 1
+    # The abandoned task still holds its slot until the worker is done with it
+    assert stats["pending"] == 1
+
+
+def test_slot_timeout():
+    async def scenario(pool):
+        busy = asyncio.ensure_future(pool.run(nap, 3, size=1))
+        await asyncio.sleep(0)
+        with pytest.raises(AnalysisTimeout, match="no analysis slot"):
+            await pool.run(nap, 0, size=1)
+        with pytest.raises(AnalysisTimeout):
+            await busy
+        return pool.stats()
+    assert run_pool(scenario, max_pending=1, timeout=0.5)["timeouts"] == 2
+
+
+def test_spent_request_deadline_is_an_analysis_timeout():
+    async def scenario(pool):
+        with request_deadline(0):
+            with pytest.raises(AnalysisTimeout, match="deadline"):
+                await pool.run(nap, 0, size=1)
+        return pool.stats()
+    stats = run_pool(scenario, timeout=5)
+    assert (stats["timeouts"], stats["offloaded"]) == (1, 0)
+
+
+def test_dead_worker_fails_the_task_and_the_next_one_gets_a_fresh_pool():
+    async def scenario(pool):
+        with pytest.raises(AnalysisUnavailable, match="died"):
+            await pool.run(die, size=1)
+        assert await pool.run(nap, 0, size=1) == 0
+        return pool.stats()
+    stats = run_pool(scenario, timeout=30)
+    assert stats["broken_pools"] == 1
+    assert stats["pending"] == 0
+
+
+@pytest.fixture
+def territory(api, monkeypatch):
+    import server
+
+    async def rating(territory_id, center, radius):
+        return server.TerritoryRating(totalScore=8.5)
+    monkeypatch.setattr(server, "calculate_territory_rating", rating)
+    return api.post("/api/territories", json={"name": "Satellite", "city": "Ahmedabad", "pincode": "380015"}).json()
+
+
+@pytest.mark.parametrize("error", [AnalysisTimeout("too slow"), AnalysisUnavailable("worker died")])
+def test_insights_endpoint_answers_503_when_analysis_is_unavailable(api, territory, monkeypatch, error):
+    import server
+
+    async def failing_run(fn, *args, size):
+        raise error
+    monkeypatch.setattr(server.ANALYSIS_POOL, "run", failing_run)
+    response = api.get(f"/api/territories/{territory['id']}/ai-insights", expect=503)
+    assert "try again" in response.json()["detail"]
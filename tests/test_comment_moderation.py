@@ -0,0 +1,106 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def verdicts(monkeypatch):
+    """Fake AI moderation: approves everything, recording which key each batch used."""
+    calls = []
+
+    async def moderate(texts, api_key):
+        calls.append((list(texts), api_key))
+        return [(True, "Looks fine", "positive") for _ in texts]
+    monkeypatch.setattr(server, "moderate_comments_ai", moderate)
+    return calls
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def comment(api, user_id, text, key_id=None):
+    doc = {"id": text, "territoryId": "t1", "userId": user_id, "text": text, "validationStatus": "pending"}
+    if key_id:
+        doc["moderationKeyId"] = key_id
+    api.run(api.db.comments.insert_one, doc)
+
+
+def status(api, comment_id):
+    return api.run(api.db.comments.find_one, {"id": comment_id})["validationStatus"]
+
+
+def test_queued_comment_is_moderated_with_its_key(api, verdicts):
+    created = api.post("/api/comments", json={
+        "territoryId": "t1", "text": "Clean and safe streets", "useAI": True, "apiKey": "sk-author"
+    }).json()
+    assert created["validationStatus"] == "pending"
+    assert "moderationKeyId" not in created
+    wait_for(lambda: status(api, created["id"]) == "approved")
+    assert verdicts == [(["Clean and safe streets"], "sk-author")]
+    # The key hash is only needed while pending
+    assert "moderationKeyId" not in api.run(api.db.comments.find_one, {"id": created["id"]})
+
+
+def test_claims_use_only_the_submitting_key(api, verdicts):
+    api.run(api.db.system_config.insert_one, {"key": "openai_api_key", "value": "sk-system"})
+    api.run(api.db.users.insert_one, {"id": "u1", "openai_api_key": "sk-u1"})
+    api.run(api.db.users.insert_one, {"id": "u2", "openai_api_key": "sk-u2-rotated"})
+    api.run(api.db.users.insert_one, {"id": "u3"})
+    # u1 submitted with their stored key; u2 with a key since rotated; u3 with a one-off request key
+    comment(api, "u1", "stored key", server.moderation_key_id("sk-u1"))
+    comment(api, "u2", "rotated key", server.moderation_key_id("sk-u2"))
+    comment(api, "u3", "request key", server.moderation_key_id("sk-once"))
+
+    assert api.run(server.claim_expired_comments) == 3
+    wait_for(lambda: status(api, "stored key") == "approved")
+    assert verdicts == [(["stored key"], "sk-u1")]
+    # Never published unmoderated: they wait for a person, and later sweeps skip them
+    for comment_id in ("rotated key", "request key"):
+        doc = api.run(api.db.comments.find_one, {"id": comment_id})
+        assert (doc["validationStatus"], doc["needsReview"]) == ("pending", True)
+        assert "moderationOwner" not in doc
+    assert api.run(server.claim_expired_comments) == 0
+    assert api.get("/api/comments/moderation-stats").json()["needs_review"] == 2
+
+    reviewed = api.post("/api/comments/request key/review", json={"approved": False, "reason": "Spam"}).json()
+    assert (reviewed["validationStatus"], reviewed["validationReason"]) == ("rejected", "Spam")
+    assert "needsReview" not in reviewed
+    api.post("/api/comments/request key/review", json={"approved": True}, expect=404)
+
+
+def test_only_expired_claims_are_taken_over(api, verdicts, monkeypatch):
+    api.run(api.db.users.insert_one, {"id": "u1", "openai_api_key": "sk-u1"})
+    key_id = server.moderation_key_id("sk-u1")
+    comment(api, "u1", "other worker", key_id)
+    comment(api, "u1", "dead worker", key_id)
+    live = {"moderationOwner": "other", "moderationLeaseUntil": "2999-01-01T00:00:00+00:00"}
+    dead = {"moderationOwner": "dead", "moderationLeaseUntil": "2000-01-01T00:00:00+00:00"}
+    api.run(api.db.comments.update_one, {"id": "other worker"}, {"$set": live})
+    api.run(api.db.comments.update_one, {"id": "dead worker"}, {"$set": dead})
+
+    # Two workers sweeping at once claim each expired comment once between them
+    async def sweep_twice():
+        return await asyncio.gather(server.claim_expired_comments(), server.claim_expired_comments())
+    assert sorted(api.run(sweep_twice)) == [0, 1]
+    wait_for(lambda: status(api, "dead worker") == "approved")
+    assert verdicts == [(["dead worker"], "sk-u1")]
+    assert status(api, "other worker") == "pending"
+
+
+def test_renewal_keeps_this_workers_claims(api):
+    comment(api, "u1", "in my queue", server.moderation_key_id("sk-u1"))
+    api.run(api.db.comments.update_one, {"id": "in my queue"}, {"$set": {
+        "moderationOwner": server.WORKER_ID, "moderationLeaseUntil": "2000-01-01T00:00:00+00:00"
+    }})
+    api.run(server.renew_moderation_leases)
+    doc = api.run(api.db.comments.find_one, {"id": "in my queue"})
+    assert doc["moderationLeaseUntil"] > datetime.now(timezone.utc).isoformat()
+    assert api.run(server.claim_expired_comments) == 0
@@ -0,0 +1,127 @@
+import asyncio
+import json
+
+import pytest
+
+import server
+from resilience import deadline_timeout
+
+
+@pytest.fixture
+def territories(api, monkeypatch):
+    async def rating(territory_id, center, radius):
+        return server.TerritoryRating(totalScore=8.5)
+    monkeypatch.setattr(server, "calculate_territory_rating", rating)
+    return [
+        api.post("/api/territories", json={"name": name, "city": "Ahmedabad", "pincode": "380015"}).json()["id"]
+        for name in ("Satellite", "Bopal", "Thaltej")
+    ]
+
+
+def batch(api, territory_ids):
+    response = api.post("/api/territories/ai-insights/batch", json={"territoryIds": territory_ids})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[-1]["done"] is True
+    return {line["territoryId"]: line["status"] for line in lines[:-1]}, lines[-1]
+
+
+def test_computes_missing_and_serves_cached(api, territories):
+    statuses, summary = batch(api, territories + ["nope"])
+    assert statuses == {**{t: 200 for t in territories}, "nope": 404}
+    assert (summary["computed"], summary["cached"], summary["not_found"]) == (3, 0, 1)
+    statuses, summary = batch(api, territories)
+    assert (summary["computed"], summary["cached"]) == (0, 3)
+
+
+def test_each_territory_gets_its_own_deadline(api, territories, monkeypatch):
+    # Together the batch takes longer than REQUEST_DEADLINE, but no single territory does
+    monkeypatch.setattr(server, "REQUEST_DEADLINE", 0.3)
+    load_inputs, compute = server.load_territories_inputs, server.compute_territory_intelligence
+
+    async def slow_inputs(*args):
+        await asyncio.sleep(0.2)
+        deadline_timeout(10)
+        return await load_inputs(*args)
+
+    async def slow_compute(*args):
+        await asyncio.sleep(0.2)
+        deadline_timeout(10)
+        return await compute(*args)
+    monkeypatch.setattr(server, "load_territories_inputs", slow_inputs)
+    monkeypatch.setattr(server, "compute_territory_intelligence", slow_compute)
+    statuses, summary = batch(api, territories)
+    assert set(statuses.values()) == {200}
+    assert summary["failed"] == 0
+
+
+def test_failed_territory_does_not_end_the_stream(api, territories, monkeypatch):
+    compute = server.compute_territory_intelligence
+    slow, broken = territories[0], territories[1]
+
+    async def flaky_compute(territory, *args):
+        if territory["id"] == slow:
+            with server.request_deadline(0):
+                deadline_timeout(10)
+        if territory["id"] == broken:
+            raise RuntimeError("boom")
+        return await compute(territory, *args)
+    monkeypatch.setattr(server, "compute_territory_intelligence", flaky_compute)
+    statuses, summary = batch(api, territories)
+    assert statuses == {slow: 503, broken: 500, territories[2]: 200}
+    assert (summary["computed"], summary["failed"]) == (1, 2)
+
+
+def test_failed_inputs_are_reported_per_territory(api, territories, monkeypatch):
+    async def no_inputs(*args):
+        raise RuntimeError("mongo down")
+    monkeypatch.setattr(server, "load_territories_inputs", no_inputs)
+    statuses, summary = batch(api, territories)
+    assert statuses == {t: 500 for t in territories}
+    assert summary["failed"] == 3
+
+
+def add_content(api, territory_id, text):
+    community = api.post("/api/communities", json={"name": "C", "territoryId": territory_id}).json()["id"]
+    api.post("/api/posts", json={"communityId": community, "text": text, "location": {"lat": 1, "lng": 2}})
+    api.run(api.db.comments.insert_one, {"id": text, "territoryId": territory_id, "text": f"{text} is great",
+                                         "validationStatus": "approved"})
+
+
+def count_calls(api, monkeypatch, collections, methods=("find", "bulk_write")):
+    calls = []
+    for name in collections:
+        collection = getattr(api.db, name)
+        for method in methods:
+            def recording(*args, _call=getattr(collection, method), _key=(name, method), **kwargs):
+                calls.append(_key)
+                return _call(*args, **kwargs)
+            monkeypatch.setattr(collection, method, recording)
+    return calls
+
+
+@pytest.mark.parametrize("backfilled", [False, True])
+def test_aggregates_and_snapshots_take_one_query_for_the_batch(api, territories, monkeypatch, backfilled):
+    for territory_id, text in zip(territories, ("Metro station opens", "Lake cleanup drive", "Flyover traffic jam")):
+        add_content(api, territory_id, text)
+    if backfilled:
+        batch(api, territories)
+        api.run(api.db.territory_intelligence.delete_many, {})
+    expected = {}
+    for territory_id in territories:
+        insights = api.get(f"/api/territories/{territory_id}/ai-insights").json()
+        expected[territory_id] = (insights["top_keywords"], insights["sentiment_score"])
+    api.run(api.db.territory_intelligence.delete_many, {})
+    if not backfilled:
+        api.run(api.db.territory_stats.delete_many, {})
+        api.run(api.db.territory_keywords.delete_many, {})
+
+    calls = count_calls(api, monkeypatch, ("territory_keywords", "keyword_df", "comments", "territory_intelligence"))
+    response = api.post("/api/territories/ai-insights/batch", json={"territoryIds": territories})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert {l["territoryId"]: (l["insights"]["top_keywords"], l["insights"]["sentiment_score"]) for l in lines[:-1]} == expected
+    assert sorted(set(calls)) == sorted(calls), calls
+    assert ("territory_intelligence", "bulk_write") in calls
+    # Backfills read each territory's comments; afterwards its stored term counts
+    assert (("comments", "find") in calls) is not backfilled
+    assert (("territory_keywords", "find") in calls) is backfilled
+    assert len(api.db.territory_intelligence.docs) == 3
@@ -0,0 +1,107 @@
+import pytest
+
+import server
+from ai_sentiment_analyzer import top_keyword_candidates, top_keywords_tfidf
+
+
+def test_tfidf_ranks_distinctive_terms_above_common_ones():
+    term_counts = {"traffic": 3, "metro": 3, "road": 1}
+    # "traffic" is in every city document: even used 3 times it ranks below a rarer one-off
+    df = {"traffic": 100, "metro": 5, "road": 5}
+    assert top_keywords_tfidf(term_counts, df, 100, top_n=2) == ["metro", "road"]
+    # A frequent enough common term still beats a rare one-off
+    assert top_keywords_tfidf({"traffic": 30, "metro": 1}, df, 100, top_n=1) == ["traffic"]
+    # Terms missing from the city table rank as if seen nowhere else
+    assert top_keywords_tfidf({"traffic": 1, "flyover": 1}, df, 100, top_n=1) == ["flyover"]
+
+
+def test_candidates_are_the_most_frequent_terms_ties_by_term():
+    assert top_keyword_candidates({"b": 2, "a": 2, "c": 5, "d": 1}, 3) == {"c": 5, "a": 2, "b": 2}
+
+
+@pytest.fixture
+def territory(api, monkeypatch):
+    async def rating(territory_id, center, radius):
+        return server.TerritoryRating(totalScore=8.5)
+    monkeypatch.setattr(server, "calculate_territory_rating", rating)
+    return api.post("/api/territories", json={"name": "Satellite", "city": "Ahmedabad", "pincode": "380015"}).json()["id"]
+
+
+def add_content(api, territory_id, posts, events=()):
+    community = api.post("/api/communities", json={"name": "C", "territoryId": territory_id}).json()["id"]
+    for text in posts:
+        api.post("/api/posts", json={"communityId": community, "text": text, "location": {"lat": 1, "lng": 2}})
+    for title in events:
+        api.post("/api/events", json={"title": title, "date": "2026-01-01T10:00:00", "location": "Hall",
+                                      "territoryId": territory_id, "organizer": "RWA"})
+
+
+def city_index(api):
+    stats = api.run(api.db.keyword_stats.find_one, {"scope": "city"})
+    df = {doc["_id"]: doc["df"] for doc in api.db.keyword_df.docs}
+    return stats["documents"], df
+
+
+def keywords(api, territory_id):
+    return api.get(f"/api/territories/{territory_id}/ai-insights").json()["top_keywords"]
+
+
+def test_incremental_counts_match_a_backfill(api, territory):
+    api.run(server.load_keyword_df)
+    add_content(api, territory, ["Metro work on the ring road", "Metro station opens", "the"],
+                events=["Road safety drive"])
+    # A post whose community is gone still counts city-wide, as in the backfill
+    api.post("/api/posts", json={"communityId": "gone", "text": "Flyover traffic", "location": {"lat": 1, "lng": 2}})
+    incremental = city_index(api)
+    assert incremental[0] == 5
+
+    api.run(api.db.keyword_stats.update_one, {"scope": "city"}, {"$unset": {"termsInitialized": ""}})
+    api.run(api.db.keyword_df.delete_many, {})
+    api.run(server.load_keyword_df)
+    assert city_index(api) == incremental
+
+
+def test_terms_are_stored_one_document_each(api, territory):
+    add_content(api, territory, ["Metro metro park", "Park cleanup"])
+    assert keywords(api, territory)[:2] == ["metro", "park"]
+    add_content(api, territory, ["Metro line extended"])
+
+    territory_terms = {d["term"]: d["count"] for d in api.db.territory_keywords.docs if d["territoryId"] == territory}
+    assert territory_terms["metro"] == 3 and territory_terms["park"] == 2
+    stats = api.run(api.db.territory_stats.find_one, {"territoryId": territory})
+    assert stats["keywordTermsInitialized"] is True
+    assert "keywords" not in stats
+    assert "df" not in api.run(api.db.keyword_stats.find_one, {"scope": "city"})
+
+
+def test_only_the_most_frequent_terms_are_ranked(api, territory, monkeypatch):
+    add_content(api, territory, ["Metro metro metro park park lake"])
+    keywords(api, territory)
+    monkeypatch.setattr(server, "KEYWORD_RANK_CANDIDATES", 2)
+    requested = []
+    find = api.db.keyword_df.find
+
+    def recording_find(query=None, projection=None):
+        requested.extend(query["_id"]["$in"])
+        return find(query, projection)
+    monkeypatch.setattr(api.db.keyword_df, "find", recording_find)
+    api.run(api.db.territory_intelligence.delete_many, {})
+    assert keywords(api, territory) == ["metro", "park"]
+    assert sorted(requested) == ["metro", "park"]
+
+
+def test_backfill_replaces_the_old_single_document_maps(api, territory):
+    add_content(api, territory, ["Metro park"])
+    api.run(api.db.keyword_stats.update_one, {"scope": "city"},
+            {"$set": {"df": {"metro": 9}, "initialized": True}, "$unset": {"termsInitialized": ""}})
+    api.run(api.db.territory_stats.update_one, {"territoryId": territory},
+            {"$set": {"keywords": {"metro": 9}, "keywordsInitialized": True}, "$unset": {"keywordTermsInitialized": ""}})
+    api.run(api.db.territory_keywords.delete_many, {})
+    api.run(api.db.territory_intelligence.delete_many, {})
+
+    assert set(keywords(api, territory)) == {"metro", "park"}
+    city = api.run(api.db.keyword_stats.find_one, {"scope": "city"})
+    assert "df" not in city and "initialized" not in city
+    stats = api.run(api.db.territory_stats.find_one, {"territoryId": territory})
+    assert "keywords" not in stats and "keywordsInitialized" not in stats
+    assert {d["term"]: d["count"] for d in api.db.territory_keywords.docs} == {"metro": 1, "park": 1}
@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tests.conftest import BACKEND
+from news_scraper import NEWS_CLASSIFIER, KeywordMatcher, NewsClassifier
+
+
+def test_matches_whole_words_and_inflections():
+    matcher = KeywordMatcher(["arrest", "AI", "theft"])
+    assert matcher.find("Two arrested after thefts") == {"arrest", "theft"}
+    # Substrings of other words don't count
+    assert matcher.find("Officials said the rail line is ready") == set()
+    assert matcher.find("") == set()
+
+
+def test_matches_multi_word_keywords():
+    matcher = KeywordMatcher(["real estate", "rent"])
+    assert matcher.find("Real  estate prices and rents rise") == {"real estate", "rent"}
+    assert matcher.find("Real-estate developers") == {"real estate"}
+    assert matcher.find("The estate is real") == set()
+
+
+def test_keyword_that_is_another_keywords_inflection_maps_to_both():
+    matcher = KeywordMatcher(["crimes", "crime"])
+    assert matcher.base_forms["crimes"] == ("crimes", "crime")
+    assert matcher.find("Rising crimes in city") == {"crime", "crimes"}
+
+
+def test_find_many_matches_find():
+    matcher = KeywordMatcher(["police", "job", "hiring"])
+    texts = ["Police hiring drive", "No jobs here", None]
+    assert matcher.find_many(texts) == [matcher.find(t) for t in texts]
+
+
+def test_classifier_tags_and_categories():
+    result = NEWS_CLASSIFIER.classify("Rising crimes in city as police arrest gang")
+    assert result["categories"] == ["crime"]
+    assert {"crime", "crimes", "police", "arrest"} <= set(result["tags"])
+
+    classifier = NewsClassifier(tags=["Metro"], categories={"infrastructure": ["metro", "flyover"]})
+    assert classifier.classify("New flyovers and metro lines") == {
+        "tags": ["Metro"], "categories": ["infrastructure"]
+    }
+
+
+CLASSIFY_SCRIPT = """
+import json
+from news_scraper import NEWS_CLASSIFIER
+texts = ["Rising crimes in city", "Crime branch arrests robbers", "Hiring at the new startup hub"]
+print(json.dumps(NEWS_CLASSIFIER.classify_many(texts)))
+"""
+
+
+@pytest.mark.parametrize("seed", ["0", "1", "4", "6", "42"])
+def test_classification_is_independent_of_hash_seed(seed):
+    env = {**os.environ, "PYTHONHASHSEED": seed}
+    output = subprocess.run(
+        [sys.executable, "-c", CLASSIFY_SCRIPT], cwd=BACKEND, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    results = json.loads(output)
+    assert results[0]["categories"] == ["crime"]
+    assert results[0]["tags"] == ["crime", "crimes"]
+    assert results == NEWS_CLASSIFIER.classify_many(
+        ["Rising crimes in city", "Crime branch arrests robbers", "Hiring at the new startup hub"]
+    )
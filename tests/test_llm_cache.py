@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from llm_cache import LLMResponseCache, completion_key
+from memory_db import MemoryDatabase
+
+MESSAGES = [{"role": "user", "content": "Summarise Satellite"}]
+
+
+def test_completion_key_is_stable_and_covers_every_input():
+    key = completion_key("gpt-4o-mini", MESSAGES, temperature=0.7, max_tokens=300)
+    assert key == completion_key("gpt-4o-mini", [{"content": "Summarise Satellite", "role": "user"}],
+                                 max_tokens=300, temperature=0.7)
+    assert key != completion_key("gpt-4o", MESSAGES, temperature=0.7, max_tokens=300)
+    assert key != completion_key("gpt-4o-mini", MESSAGES, temperature=0.2, max_tokens=300)
+    assert key != completion_key("gpt-4o-mini", [{"role": "user", "content": "Summarise Bopal"}],
+                                 temperature=0.7, max_tokens=300)
+
+
+class Completion:
+    def __init__(self, error=None):
+        self.calls = 0
+        self.gate = None
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return f"insight {self.calls}"
+
+
+def test_memory_tier_is_lru_and_expires():
+    async def scenario():
+        cache = LLMResponseCache(max_entries=2, ttl=60)
+        for key in ("a", "b"):
+            await cache.set(key, key.upper())
+        assert await cache.get("a") == "A"
+        await cache.set("c", "C")
+        # "b" was the least recently used
+        assert [await cache.get(k) for k in ("a", "b", "c")] == ["A", None, "C"]
+
+        expired = LLMResponseCache(ttl=0)
+        await expired.set("a", "A")
+        assert await expired.get("a") is None
+        assert expired.stats()["entries"] == 0
+    asyncio.run(scenario())
+
+
+def test_store_tier_is_shared_across_workers():
+    db = MemoryDatabase()
+
+    async def scenario():
+        first, second = LLMResponseCache(), LLMResponseCache()
+        await first.attach(db.llm_cache)
+        await second.attach(db.llm_cache)
+        completion = Completion()
+        assert await first.get_or_create("k", completion, model="gpt-4o-mini") == "insight 1"
+        # Another worker, with nothing in memory, reads it from Mongo and then keeps it locally
+        assert await second.get_or_create("k", completion) == "insight 1"
+        assert await second.get_or_create("k", completion) == "insight 1"
+        assert completion.calls == 1
+        return first.stats(), second.stats()
+    first, second = asyncio.run(scenario())
+    assert (first["misses"], first["completions"], first["persistent"]) == (1, 1, True)
+    assert (second["store_hits"], second["memory_hits"], second["misses"]) == (1, 1, 0)
+    assert db.llm_cache.docs[0]["model"] == "gpt-4o-mini"
+
+
+def test_expired_store_documents_are_ignored():
+    db = MemoryDatabase()
+
+    async def scenario():
+        cache = LLMResponseCache()
+        await cache.attach(db.llm_cache)
+        # Mongo hands back naive UTC datetimes; the TTL monitor may not have removed it yet
+        await db.llm_cache.insert_one({"key": "k", "value": "old", "expiresAt": datetime.utcnow() - timedelta(seconds=1)})
+        await db.llm_cache.insert_one({"key": "fresh", "value": "new", "expiresAt": datetime.utcnow() + timedelta(hours=1)})
+        return await cache.get("k"), await cache.get("fresh")
+    assert asyncio.run(scenario()) == (None, "new")
+
+
+def test_concurrent_misses_share_one_completion():
+    async def scenario():
+        cache = LLMResponseCache()
+        completion = Completion()
+        completion.gate = asyncio.Event()
+        waiting = asyncio.gather(*(cache.get_or_create("k", completion) for _ in range(5)))
+        await asyncio.sleep(0)
+        completion.gate.set()
+        return await waiting, completion.calls, cache.stats()
+    values, calls, stats = asyncio.run(scenario())
+    assert values == ["insight 1"] * 5
+    assert calls == 1
+    assert (stats["misses"], stats["completions"], stats["completions_in_flight"]) == (5, 1, 0)
+
+
+def test_failed_completions_are_not_cached():
+    async def scenario():
+        cache = LLMResponseCache()
+        failing = Completion(error=RuntimeError("rate limited"))
+        with pytest.raises(RuntimeError):
+            await cache.get_or_create("k", failing)
+        assert await cache.get("k") is None
+        return await cache.get_or_create("k", Completion())
+    assert asyncio.run(scenario()) == "insight 1"
+
+
+class BrokenCollection:
+    async def create_index(self, *args, **kwargs):
+        return "index"
+
+    async def find_one(self, *args, **kwargs):
+        raise ConnectionError("mongo down")
+
+    async def update_one(self, *args, **kwargs):
+        raise ConnectionError("mongo down")
+
+
+def test_store_errors_fall_back_to_memory():
+    async def scenario():
+        cache = LLMResponseCache()
+        await cache.attach(BrokenCollection())
+        completion = Completion()
+        assert await cache.get_or_create("k", completion) == "insight 1"
+        assert await cache.get_or_create("k", completion) == "insight 1"
+        return cache.stats()
+    stats = asyncio.run(scenario())
+    # One failed read on the miss, one failed write after the completion
+    assert (stats["store_errors"], stats["completions"], stats["memory_hits"]) == (2, 1, 1)
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import llm_limiter
+from llm_limiter import LLMLimiter, RateLimitTimeout, TokenBucket, estimate_tokens, is_rate_limited
+from resilience import CircuitBreaker
+
+
+class RateLimited(Exception):
+    """Shaped like the openai SDK's RateLimitError."""
+    def __init__(self, retry_after=None):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        headers = {"retry-after": retry_after} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=429, headers=headers)
+
+
+def flaky(failures, result="ok", **error):
+    """A call that is rate limited `failures` times, then returns `result`."""
+    calls = []
+
+    async def call(**kwargs):
+        calls.append(kwargs)
+        if len(calls) <= failures:
+            raise RateLimited(**error)
+        return result
+    return call, calls
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(llm_limiter, "LLM_RETRY_BASE", 0.001)
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.wait_time(60) == 0
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1, abs=0.05)
+    # More than the bucket holds waits for a full bucket, not forever
+    assert bucket.wait_time(600) == pytest.approx(60, abs=0.1)
+    bucket.give_back(1000)
+    assert bucket.level == 60
+
+
+def test_estimate_tokens_and_429_detection():
+    assert estimate_tokens([{"role": "user", "content": "x" * 400}], max_tokens=50) == 150
+    assert estimate_tokens(None) == 256
+    assert is_rate_limited(RateLimited())
+    assert is_rate_limited(SimpleNamespace(response=SimpleNamespace(status_code=429)))
+    assert not is_rate_limited(RuntimeError("500"))
+
+
+def test_keys_are_limited_separately_and_reported_by_hash():
+    limiter = LLMLimiter(rpm=1)
+    call, _ = flaky(0)
+
+    async def scenario():
+        await limiter.call("sk-one", call)
+        # sk-one's single request per minute is spent; sk-two is unaffected
+        with pytest.raises(RateLimitTimeout, match="needs"):
+            await limiter.call("sk-one", call, queue_timeout=0.05)
+        return await limiter.call("sk-two", call)
+    assert asyncio.run(scenario()) == "ok"
+    stats = limiter.stats()["keys"]
+    assert len(stats) == 2
+    assert all("sk-" not in key["key"] for key in stats)
+    assert sorted(key["queue_timeouts"] for key in stats) == [0, 1]
+
+
+def test_in_flight_cap_queues_callers():
+    limiter = LLMLimiter(max_in_flight=1)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return "done"
+        first = asyncio.ensure_future(limiter.call("sk", slow))
+        await asyncio.sleep(0)
+        with pytest.raises(RateLimitTimeout, match="no LLM slot"):
+            await limiter.call("sk", slow, queue_timeout=0.05)
+        second = asyncio.ensure_future(limiter.call("sk", slow))
+        await asyncio.sleep(0.01)
+        stats = limiter.for_key("sk").stats()
+        assert (stats["in_flight"], stats["waiting"]) == (1, 1)
+        release.set()
+        return await asyncio.gather(first, second)
+    assert asyncio.run(scenario()) == ["done", "done"]
+    assert limiter.for_key("sk").stats()["in_flight"] == 0
+
+
+def test_429_is_retried_without_opening_the_breaker():
+    limiter = LLMLimiter()
+    breaker = CircuitBreaker("openai_test", failure_threshold=1)
+    call, calls = flaky(2)
+    assert asyncio.run(limiter.call("sk", call, breaker=breaker, messages=[])) == "ok"
+    assert len(calls) == 3
+    stats = limiter.for_key("sk").stats()
+    assert (stats["rate_limited"], stats["retries"], stats["calls"]) == (2, 2, 3)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retries_give_up_with_the_429(monkeypatch):
+    monkeypatch.setattr(llm_limiter, "LLM_MAX_RETRIES", 2)
+    limiter = LLMLimiter()
+    call, calls = flaky(5)
+    with pytest.raises(RateLimited):
+        asyncio.run(limiter.call("sk", call))
+    assert len(calls) == 3
+
+
+def test_retry_after_is_honoured():
+    limiter = LLMLimiter()
+    call, _ = flaky(1, retry_after="0.2")
+    started = time.monotonic()
+    asyncio.run(limiter.call("sk", call))
+    assert time.monotonic() - started >= 0.2
+
+
+def test_reported_usage_refunds_the_token_estimate():
+    limiter = LLMLimiter(tpm=1000)
+    call, _ = flaky(0, result={"usage": {"total_tokens": 100}})
+    asyncio.run(limiter.call("sk", call, tokens=800))
+    assert limiter.for_key("sk").tokens.level == pytest.approx(900, abs=1)
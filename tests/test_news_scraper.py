@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+import news_scraper
+from news_stub import FIXTURES, start_stub_server
+from resilience import CircuitBreaker
+
+PAGES = 2
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server, base_url = start_stub_server()
+    yield server, base_url
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def scraper(stub, monkeypatch):
+    """Point the scraper at the fixture server, with a closed breaker and no injected failures."""
+    server, base_url = stub
+    server.config.fail_rate = 0.0
+    monkeypatch.setattr(news_scraper, "BASE_URL", base_url)
+    monkeypatch.setattr(news_scraper, "NEWS_SITE_BREAKER", CircuitBreaker("news_site"))
+    monkeypatch.setattr(news_scraper, "RETRY_BACKOFF", 0.01)
+    return server
+
+
+def per_page():
+    return len(news_scraper.parse_listing_page((FIXTURES / "listing_page.html").read_text(encoding="utf-8")))
+
+
+def analyze_async(pages=PAGES):
+    async def run():
+        async with news_scraper.new_http_client() as client:
+            return await news_scraper.analyze_news_metrics_async(pages, client)
+    return asyncio.run(run())
+
+
+def test_sync_and_async_agree_and_score_every_headline():
+    result = news_scraper.analyze_news_metrics(PAGES)
+    assert result == analyze_async()
+    assert result["articles_analyzed"] == per_page() * PAGES
+
+
+def test_conditional_get_returns_not_modified():
+    async def run():
+        async with news_scraper.new_http_client() as client:
+            first = await news_scraper.fetch_listing_page_async(1, client)
+            again = await news_scraper.fetch_listing_page_async(1, client, etag=first["etag"])
+            return first, again
+    first, again = asyncio.run(run())
+    assert first["etag"] and first["headlines"]
+    assert again["not_modified"]
+
+
+def test_article_bodies_parse():
+    expected = news_scraper.parse_article_content((FIXTURES / "article_page.html").read_text(encoding="utf-8"))
+    assert expected
+
+    async def run():
+        async with news_scraper.new_http_client() as client:
+            listing = await news_scraper.fetch_listing_page_async(1, client)
+            links = [h["link"] for h in listing["headlines"][:3]]
+            return links, await news_scraper.fetch_article_bodies(links, client)
+    links, bodies = asyncio.run(run())
+    assert links and all(link.startswith(news_scraper.BASE_URL) for link in links)
+    assert [bodies.get(link) for link in links] == [expected] * len(links)
+
+
+def test_injected_failures_give_an_empty_result(scraper):
+    scraper.config.fail_rate = 1.0
+    assert news_scraper.analyze_news_metrics(PAGES)["articles_analyzed"] == 0
+    assert analyze_async()["articles_analyzed"] == 0
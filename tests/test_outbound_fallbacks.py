@@ -0,0 +1,205 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+import news_ingestion
+import news_scraper
+import resilience
+import server
+from memory_db import MemoryDatabase
+from resilience import CircuitBreaker, request_deadline
+from swr_cache import StaleWhileRevalidateCache
+from tests.conftest import BACKEND
+
+REAL_ASYNC_CLIENT = httpx.AsyncClient
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(news_scraper, "NEWS_SITE_BREAKER", CircuitBreaker("news_site", failure_threshold=1))
+
+
+def mock_transport(monkeypatch, handler):
+    """Route every httpx.AsyncClient (and the scraper's shared client) through `handler`."""
+    requests = []
+
+    def record(request):
+        requests.append(request)
+        return handler(request)
+    transport = httpx.MockTransport(record)
+    monkeypatch.setattr(httpx, "AsyncClient", lambda *a, **kw: REAL_ASYNC_CLIENT(transport=transport))
+    monkeypatch.setattr(news_scraper, "_http_client", REAL_ASYNC_CLIENT(transport=transport))
+    return requests
+
+
+# ==========================================
+# ARTICLE BODIES
+# ==========================================
+def pending_article_db():
+    db = MemoryDatabase()
+
+    async def seed():
+        await db.news_sources.insert_one({"page": 1, "linkHashes": ["h1"]})
+        await db.articles.insert_one({"linkHash": "h1", "link": "https://news.test/a/1", "title": "Metro work"})
+    asyncio.run(seed())
+    return db
+
+
+def body_attempts(db):
+    doc = asyncio.run(db.articles.find_one({"linkHash": "h1"}))
+    return doc.get("bodyAttempts", 0)
+
+
+def test_open_breaker_skips_body_without_using_an_attempt(monkeypatch):
+    requests = mock_transport(monkeypatch, lambda r: httpx.Response(200, text="<p>body</p>"))
+    breaker = news_scraper.NEWS_SITE_BREAKER
+    breaker.state, breaker.opened_at = CircuitBreaker.OPEN, time.monotonic()
+    db = pending_article_db()
+
+    stats = asyncio.run(news_ingestion.fetch_pending_bodies(db, 1, "2026-01-01T00:00:00+00:00"))
+    assert stats == {"bodies_fetched": 0, "bodies_failed": 0, "bodies_skipped": 1}
+    assert requests == []
+    assert body_attempts(db) == 0
+
+
+def test_spent_deadline_skips_body_without_using_an_attempt(monkeypatch):
+    requests = mock_transport(monkeypatch, lambda r: httpx.Response(200, text="<p>body</p>"))
+    db = pending_article_db()
+
+    async def run():
+        with request_deadline(0):
+            return await news_ingestion.fetch_pending_bodies(db, 1, "2026-01-01T00:00:00+00:00")
+    assert asyncio.run(run())["bodies_skipped"] == 1
+    assert requests == []
+    assert body_attempts(db) == 0
+
+
+def test_failed_body_uses_an_attempt(monkeypatch):
+    mock_transport(monkeypatch, lambda r: httpx.Response(404))
+    db = pending_article_db()
+    stats = asyncio.run(news_ingestion.fetch_pending_bodies(db, 1, "2026-01-01T00:00:00+00:00"))
+    assert stats == {"bodies_fetched": 0, "bodies_failed": 1, "bodies_skipped": 0}
+    assert body_attempts(db) == 1
+
+
+# ==========================================
+# LIVE NEWS METRICS
+# ==========================================
+LISTING_HTML = (BACKEND / "devtools" / "fixtures" / "listing_page.html").read_text(encoding="utf-8")
+
+
+def live_news_cache(**kwargs):
+    # No ingested snapshots: load_news_metrics scrapes live
+    db = MemoryDatabase()
+    return StaleWhileRevalidateCache(lambda pages: news_ingestion.load_news_metrics(db, pages), ttl=0, **kwargs)
+
+
+def open_news_breaker():
+    breaker = news_scraper.NEWS_SITE_BREAKER
+    breaker.state, breaker.opened_at = CircuitBreaker.OPEN, time.monotonic()
+
+
+@pytest.mark.parametrize("outage", ["breaker", "site"])
+def test_news_outage_keeps_the_cached_metrics(monkeypatch, outage):
+    mock_transport(monkeypatch, lambda r: httpx.Response(200, text=LISTING_HTML))
+    cache = live_news_cache()
+
+    async def scenario():
+        good = await cache.get(1)
+        if outage == "breaker":
+            open_news_breaker()
+        else:
+            mock_transport(monkeypatch, lambda r: httpx.Response(503))
+        assert await cache.get(1) == good
+        # Let the background refresh finish
+        await asyncio.sleep(0.05)
+        return good
+    good = asyncio.run(scenario())
+    assert good["articles_analyzed"] > 0
+    assert cache.peek(1) == good
+    assert cache.stats()["refresh_errors"] == 1
+
+
+def test_news_outage_past_max_stale_serves_the_last_good_metrics(monkeypatch):
+    mock_transport(monkeypatch, lambda r: httpx.Response(200, text=LISTING_HTML))
+    cache = live_news_cache(max_stale=0)
+    monkeypatch.setattr(server, "news_cache", cache)
+
+    async def scenario():
+        good = await server.city_news_metrics(1)
+        open_news_breaker()
+        return good, await server.city_news_metrics(1), await server.city_news_metrics(2)
+    good, after, never_loaded = asyncio.run(scenario())
+    assert after == good
+    # Nothing to fall back on: neutral scores, not cached
+    assert never_loaded["articles_analyzed"] == 0
+    assert cache.peek(2) is None
+
+
+# ==========================================
+# PINCODE API
+# ==========================================
+def pincode_user(url):
+    return server.User(email="u@example.com", name="U", role="admin", pincode_api_url=url)
+
+
+def lookup(user, pincode="395001"):
+    return asyncio.run(server.fetch_pincode_data(user, pincode))
+
+
+@pytest.fixture
+def pincode_db(monkeypatch):
+    db = MemoryDatabase()
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+
+def pincode_handler(request):
+    if request.url.host == "down.test":
+        return httpx.Response(503)
+    if request.url.params["pincode"] == "000000":
+        return httpx.Response(404)
+    return httpx.Response(200, json={"boundary": [[1, 2]], "host": request.url.host})
+
+
+def test_broken_provider_only_trips_its_own_breaker(monkeypatch, pincode_db):
+    mock_transport(monkeypatch, pincode_handler)
+    broken, healthy = pincode_user("https://down.test/lookup"), pincode_user("https://up.test/lookup")
+    for _ in range(resilience.BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(HTTPException) as error:
+            lookup(broken)
+        assert error.value.status_code == 500
+    with pytest.raises(HTTPException) as error:
+        lookup(broken)
+    assert error.value.status_code == 503
+    assert lookup(healthy)["host"] == "up.test"
+    assert server.get_breaker("pincode_api:up.test").state == CircuitBreaker.CLOSED
+
+
+def test_unknown_pincode_is_not_a_breaker_failure(monkeypatch, pincode_db):
+    mock_transport(monkeypatch, pincode_handler)
+    user = pincode_user("https://up.test/lookup")
+    for _ in range(resilience.BREAKER_FAILURE_THRESHOLD + 1):
+        with pytest.raises(HTTPException) as error:
+            lookup(user, "000000")
+        assert error.value.status_code == 404
+    breaker = server.get_breaker("pincode_api:up.test")
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures_total == 0
+
+
+def test_fallback_cache_is_per_provider(monkeypatch, pincode_db):
+    mock_transport(monkeypatch, pincode_handler)
+    assert lookup(pincode_user("https://up.test/lookup"))["host"] == "up.test"
+
+    # Another provider that is down must not be answered with up.test's data
+    with pytest.raises(HTTPException):
+        lookup(pincode_user("https://down.test/lookup"))
+
+    # ...while the same provider falls back to its last good answer
+    mock_transport(monkeypatch, lambda r: httpx.Response(502))
+    assert lookup(pincode_user("https://up.test/lookup"))["host"] == "up.test"
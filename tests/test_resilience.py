@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, deadline_timeout, request_deadline
+
+
+async def ok():
+    return "ok"
+
+
+async def boom():
+    raise RuntimeError("down")
+
+
+async def slow():
+    await asyncio.sleep(1)
+
+
+def call(breaker, fn, timeout=None):
+    return asyncio.run(breaker.call(fn, timeout=timeout))
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("t", failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            call(breaker, boom)
+    assert breaker.state == CircuitBreaker.CLOSED
+    # A success resets the streak
+    assert call(breaker, ok) == "ok"
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            call(breaker, boom)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        call(breaker, ok)
+    assert breaker.stats()["rejected_total"] == 1
+    assert breaker.stats()["opened_total"] == 1
+
+
+def test_breaker_half_open_probe():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0)
+    with pytest.raises(RuntimeError):
+        call(breaker, boom)
+    assert breaker.state == CircuitBreaker.OPEN
+    # Probe fails: stays open
+    with pytest.raises(RuntimeError):
+        call(breaker, boom)
+    assert breaker.state == CircuitBreaker.OPEN
+    # Probe succeeds: closes
+    assert call(breaker, ok) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_allows_one_probe_at_a_time():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0)
+    with pytest.raises(RuntimeError):
+        call(breaker, boom)
+
+    async def probes():
+        return await asyncio.gather(breaker.call(lambda: asyncio.sleep(0.05)), breaker.call(ok),
+                                    return_exceptions=True)
+    first, second = asyncio.run(probes())
+    assert first is None
+    assert isinstance(second, CircuitOpenError)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_counts_timeouts_as_failures():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=60)
+    with pytest.raises(asyncio.TimeoutError):
+        call(breaker, slow, timeout=0.01)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_deadline_caps_timeouts_and_is_not_a_breaker_failure():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=60)
+
+    async def scenario():
+        with request_deadline(0.02):
+            assert deadline_timeout(10) <= 0.02
+            with pytest.raises(DeadlineExceeded):
+                await breaker.call(slow, timeout=10)
+            # Once spent, the next call fails without going out
+            await asyncio.sleep(0.03)
+            with pytest.raises(DeadlineExceeded):
+                await breaker.call(ok, timeout=10)
+    asyncio.run(scenario())
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures_total == 0
+
+
+def test_calls_without_a_timeout():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=60)
+
+    async def times_out():
+        raise asyncio.TimeoutError()
+
+    async def scenario():
+        # Bounded by the request deadline alone, which is not the integration's fault
+        with request_deadline(0.02):
+            with pytest.raises(DeadlineExceeded):
+                await breaker.call(slow)
+        assert breaker.state == CircuitBreaker.CLOSED
+        # The call's own timeout is
+        with pytest.raises(asyncio.TimeoutError):
+            await breaker.call(times_out)
+    asyncio.run(scenario())
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_nested_deadlines_only_shrink():
+    assert deadline_timeout(5) == 5
+    with request_deadline(10):
+        with request_deadline(60):
+            assert deadline_timeout(100) <= 10
+        with request_deadline(0.5):
+            assert deadline_timeout(100) <= 0.5
+        assert 0.5 < deadline_timeout(100) <= 10
+    assert deadline_timeout(5) == 5
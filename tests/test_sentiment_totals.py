@@ -0,0 +1,46 @@
+import pytest
+
+import server
+
+
+@pytest.fixture
+def territory(api, monkeypatch):
+    async def rating(territory_id, center, radius):
+        return server.TerritoryRating(totalScore=8.5)
+    monkeypatch.setattr(server, "calculate_territory_rating", rating)
+    territory_id = api.post("/api/territories", json={"name": "Satellite", "city": "Ahmedabad", "pincode": "380015"}).json()["id"]
+    community = api.post("/api/communities", json={"name": "C", "territoryId": territory_id}).json()["id"]
+    for text in ("Lovely clean park", "Unsafe road, dirty drains"):
+        api.post("/api/posts", json={"communityId": community, "text": text, "location": {"lat": 1, "lng": 2}})
+    return territory_id
+
+
+def stats(api, territory_id):
+    return api.run(api.db.territory_stats.find_one, {"territoryId": territory_id})
+
+
+def recompute(api, territory_id):
+    api.run(api.db.territory_intelligence.delete_many, {})
+    return api.get(f"/api/territories/{territory_id}/ai-insights").json()
+
+
+@pytest.mark.parametrize("stored", [{"sentimentMode": "substring"}, {}], ids=["other mode", "mode not recorded"])
+@pytest.mark.parametrize("batch", [False, True], ids=["single", "batch"])
+def test_totals_from_another_match_mode_are_recounted(api, territory, stored, batch):
+    recompute(api, territory)
+    current = stats(api, territory)
+    assert current["sentimentMode"] == server.SENTIMENT_MATCH_MODE
+    assert current["sentiment"]["count"] == 2
+
+    # Totals counted with another scorer, then grown by $inc like any new write
+    wrong = {"sentiment": {"count": 9, "positive": 9, "negative": 0, "neutral": 0, "scoreSum": 90.0}}
+    api.run(api.db.territory_stats.update_one, {"territoryId": territory},
+            {"$set": {**wrong, **stored}} if stored else {"$set": wrong, "$unset": {"sentimentMode": ""}})
+    if batch:
+        api.run(api.db.territory_intelligence.delete_many, {})
+        api.post("/api/territories/ai-insights/batch", json={"territoryIds": [territory]})
+    else:
+        recompute(api, territory)
+    recounted = stats(api, territory)
+    assert recounted["sentiment"] == current["sentiment"]
+    assert recounted["sentimentMode"] == server.SENTIMENT_MATCH_MODE
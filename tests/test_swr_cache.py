@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from swr_cache import StaleWhileRevalidateCache
+
+
+class Loader:
+    """Returns "<key>:<n>" on the n-th load; waits for `gate` when one is set."""
+    def __init__(self):
+        self.calls = 0
+        self.gate = None
+        self.error = None
+
+    async def __call__(self, key):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return f"{key}:{self.calls}"
+
+
+def test_miss_then_hit():
+    loader = Loader()
+    cache = StaleWhileRevalidateCache(loader, ttl=60)
+
+    async def scenario():
+        return await cache.get("a"), await cache.get("a"), await cache.get("b")
+    assert asyncio.run(scenario()) == ("a:1", "a:1", "b:2")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["refreshes"], stats["entries"]) == (1, 2, 2, 2)
+
+
+def test_concurrent_misses_share_one_load():
+    loader = Loader()
+    cache = StaleWhileRevalidateCache(loader, ttl=60)
+
+    async def scenario():
+        loader.gate = asyncio.Event()
+        waiting = asyncio.gather(*(cache.get("a") for _ in range(5)))
+        await asyncio.sleep(0)
+        assert cache.stats()["refreshes_in_flight"] == 1
+        loader.gate.set()
+        return await waiting
+    assert asyncio.run(scenario()) == ["a:1"] * 5
+    assert loader.calls == 1
+
+
+def test_stale_value_is_served_while_one_refresh_runs():
+    loader = Loader()
+    cache = StaleWhileRevalidateCache(loader, ttl=0)
+
+    async def scenario():
+        cache.set("a", "old")
+        loader.gate = asyncio.Event()
+        assert [await cache.get("a") for _ in range(3)] == ["old"] * 3
+        await asyncio.sleep(0)
+        assert (loader.calls, cache.stats()["refreshes_in_flight"]) == (1, 1)
+        loader.gate.set()
+        await asyncio.sleep(0.01)
+        return cache.peek("a")
+    assert asyncio.run(scenario()) == "a:1"
+    assert cache.stats()["stale_hits"] == 3
+
+
+def test_too_stale_value_waits_for_the_reload():
+    loader = Loader()
+    cache = StaleWhileRevalidateCache(loader, ttl=0, max_stale=0)
+
+    async def scenario():
+        cache.set("a", "old")
+        return await cache.get("a")
+    assert asyncio.run(scenario()) == "a:1"
+    assert cache.stats()["misses"] == 1
+
+
+def test_failed_refresh_keeps_the_last_value():
+    loader = Loader()
+    cache = StaleWhileRevalidateCache(loader, ttl=0)
+    loader.error = RuntimeError("down")
+
+    async def scenario():
+        cache.set("a", "old")
+        assert await cache.get("a") == "old"
+        await asyncio.sleep(0.01)
+        assert await cache.get("a") == "old"
+        await asyncio.sleep(0.01)
+        # A miss has nothing to fall back on
+        with pytest.raises(RuntimeError):
+            await cache.get("b")
+    asyncio.run(scenario())
+    assert cache.stats()["refresh_errors"] == 3
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_load():
+    loader = Loader()
+    cache = StaleWhileRevalidateCache(loader, ttl=60)
+
+    async def scenario():
+        loader.gate = asyncio.Event()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(cache.get("a"), 0.01)
+        loader.gate.set()
+        return await cache.get("a")
+    assert asyncio.run(scenario()) == "a:1"
+    assert loader.calls == 1
+
+
+def test_invalidate():
+    loader = Loader()
+    cache = StaleWhileRevalidateCache(loader, ttl=60)
+
+    async def scenario():
+        await cache.get("a")
+        await cache.get("b")
+        cache.invalidate("a")
+        assert cache.peek("a") is None and cache.peek("b") == "b:2"
+        assert await cache.get("a") == "a:3"
+        cache.invalidate()
+        assert cache.peek("b") is None
+    asyncio.run(scenario())
@@ -0,0 +1,82 @@
+import pytest
+
+import server
+
+
+@pytest.fixture
+def territory(api, monkeypatch):
+    async def rating(territory_id, center, radius):
+        return server.TerritoryRating(totalScore=8.5)
+    monkeypatch.setattr(server, "calculate_territory_rating", rating)
+    return api.post("/api/territories", json={"name": "Satellite", "city": "Ahmedabad", "pincode": "380015"}).json()
+
+
+def insights(api, territory_id):
+    return api.get(f"/api/territories/{territory_id}/ai-insights").json()
+
+
+def test_content_write_marks_snapshot_stale(api, territory):
+    assert insights(api, territory["id"])["snapshot"]["stale"] is False
+    community = api.post("/api/communities", json={"name": "C", "territoryId": territory["id"]}).json()
+    api.post("/api/posts", json={"communityId": community["id"], "text": "Lovely park", "location": {"lat": 1, "lng": 2}})
+    assert insights(api, territory["id"])["snapshot"]["stale"] is True
+
+
+def test_territory_update_marks_snapshot_stale(api, territory):
+    assert insights(api, territory["id"])["snapshot"]["stale"] is False
+    api.put(f"/api/territories/{territory['id']}", json={"name": "Satellite East"})
+    assert insights(api, territory["id"])["snapshot"]["stale"] is True
+
+    # A refresh picks up the new name's news localities
+    server.territory_intel_dirty.clear()
+    assert api.run(server.refresh_stale_intelligence) == 1
+    assert insights(api, territory["id"])["snapshot"]["stale"] is False
+
+
+def test_rating_marks_snapshot_stale(api, territory):
+    assert insights(api, territory["id"])["snapshot"]["stale"] is False
+    api.post(f"/api/territories/{territory['id']}/calculate-rating")
+    assert insights(api, territory["id"])["snapshot"]["stale"] is True
+    api.run(server.refresh_stale_intelligence)
+    assert insights(api, territory["id"])["territory_rating"] == 8.5
+
+
+def test_delete_removes_snapshot_and_stats(api, territory):
+    insights(api, territory["id"])
+    assert api.run(api.db.territory_intelligence.count_documents, {"territoryId": territory["id"]}) == 1
+    assert api.run(api.db.territory_stats.count_documents, {"territoryId": territory["id"]}) == 1
+
+    api.delete(f"/api/territories/{territory['id']}")
+    assert api.run(api.db.territory_intelligence.count_documents, {"territoryId": territory["id"]}) == 0
+    assert api.run(api.db.territory_stats.count_documents, {"territoryId": territory["id"]}) == 0
+    api.get(f"/api/territories/{territory['id']}/ai-insights", expect=404)
+
+
+def test_locks_are_held_by_one_worker(api):
+    assert api.run(server.acquire_lock, "job", 60) is True
+    # The holder extends its own lock
+    assert api.run(server.acquire_lock, "job", 60) is True
+    api.run(api.db.locks.update_one, {"_id": "job"}, {"$set": {"owner": "other worker"}})
+    assert api.run(server.acquire_lock, "job", 60) is False
+    # Releasing only gives up this worker's own lock
+    api.run(server.release_lock, "job")
+    assert api.run(server.acquire_lock, "job", 60) is False
+    api.run(api.db.locks.update_one, {"_id": "job"}, {"$set": {"expiresAt": "2000-01-01T00:00:00+00:00"}})
+    assert api.run(server.acquire_lock, "job", 60) is True
+    api.run(server.release_lock, "job")
+    assert api.run(api.db.locks.count_documents, {}) == 0
+
+
+def test_refresh_stops_when_another_worker_holds_the_lock(api, territory, monkeypatch):
+    # Keep this worker's own refresh loop out of the way
+    monkeypatch.setattr(server, "TERRITORY_INTEL_DEBOUNCE", 60)
+    insights(api, territory["id"])
+    api.put(f"/api/territories/{territory['id']}", json={"name": "Satellite East"})
+    api.run(api.db.locks.insert_one, {"_id": "territory_intel_refresh", "owner": "other worker",
+                                      "expiresAt": "2999-01-01T00:00:00+00:00"})
+    assert api.run(server.refresh_stale_intelligence, "territory_intel_refresh") == 0
+    assert insights(api, territory["id"])["snapshot"]["stale"] is True
+
+    api.run(api.db.locks.delete_many, {})
+    assert api.run(server.refresh_stale_intelligence, "territory_intel_refresh") == 1
+    assert insights(api, territory["id"])["snapshot"]["stale"] is False
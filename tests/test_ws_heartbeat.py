@@ -0,0 +1,88 @@
+import asyncio
+import json
+import time
+
+from server import ConnectionManager, EncodedFrame
+
+
+class FakeWebSocket:
+    def __init__(self, send_delay=0.0):
+        self.scope = {"subprotocols": []}
+        self.send_delay = send_delay
+        self.pings = []
+        self.closed = False
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.send_delay)
+        if json.loads(text)["type"] == "ping":
+            self.pings.append(time.monotonic())
+
+    async def close(self, code=1000, reason=""):
+        self.closed = True
+
+
+def run_heartbeat(manager, clients, interval, idle_timeout, duration):
+    async def scenario():
+        for client in clients:
+            await manager.connect(client)
+        manager.start_heartbeat(interval, idle_timeout)
+        await asyncio.sleep(duration)
+        await manager.stop_heartbeat()
+    asyncio.run(scenario())
+
+
+def test_slow_client_does_not_delay_other_pings():
+    manager = ConnectionManager()
+    slow = [FakeWebSocket(send_delay=5.0) for _ in range(3)]
+    fast = [FakeWebSocket() for _ in range(20)]
+    started = time.monotonic()
+    run_heartbeat(manager, slow + fast, interval=0.05, idle_timeout=60, duration=0.28)
+    for client in fast:
+        # One ping per interval; sequential sends would stall behind each slow client
+        assert len(client.pings) >= 3
+        assert client.pings[0] - started < 0.1
+    # Slow clients miss the per-send timeout and are reaped
+    assert all(c.closed for c in slow)
+    assert set(manager.active_connections) == set(fast)
+    assert manager.reaped_total == 3
+
+
+def test_idle_clients_are_reaped():
+    manager = ConnectionManager()
+    quiet, chatty = FakeWebSocket(), FakeWebSocket()
+
+    async def scenario():
+        await manager.connect(quiet)
+        await manager.connect(chatty)
+        manager.start_heartbeat(0.03, 0.1)
+        for _ in range(8):
+            await asyncio.sleep(0.025)
+            manager.touch(chatty)
+        await manager.stop_heartbeat()
+    asyncio.run(scenario())
+
+    assert quiet.closed and not chatty.closed
+    assert list(manager.active_connections) == [chatty]
+
+
+
+def test_clients_busy_receiving_are_neither_pinged_nor_reaped():
+    manager = ConnectionManager()
+    # Never sends anything back (e.g. a MessagePack client that ignores pings), but keeps receiving
+    listener = FakeWebSocket()
+
+    async def scenario():
+        await manager.connect(listener)
+        manager.start_heartbeat(0.1, 0.2)
+        for seq in range(1, 21):
+            await asyncio.sleep(0.02)
+            await manager.send_all(EncodedFrame(seq, {"type": "pin_created", "data": {}}))
+        await manager.stop_heartbeat()
+    asyncio.run(scenario())
+
+    assert not listener.closed
+    assert listener.pings == []
+    assert manager.reaped_total == 0
@@ -0,0 +1,140 @@
+import asyncio
+import json
+
+from memory_db import MemoryDatabase
+from server import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.scope = {"subprotocols": []}
+        self.frames = []
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, text):
+        self.frames.append(json.loads(text))
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+def emit_all(manager, count, start=0):
+    for i in range(start, start + count):
+        asyncio.run(manager.broadcast({"type": "pin_created", "n": i}))
+
+
+def test_replay_sends_missed_frames():
+    manager = ConnectionManager(replay_size=100)
+    emit_all(manager, 5)
+    client = FakeWebSocket()
+    asyncio.run(manager.connect(client, since=2, epoch=manager.epoch))
+    assert [f["seq"] for f in client.frames] == [3, 4, 5]
+    assert [f["n"] for f in client.frames] == [2, 3, 4]
+    assert all(f["epoch"] == manager.epoch for f in client.frames)
+
+
+def test_replay_up_to_date_client_gets_nothing():
+    manager = ConnectionManager(replay_size=100)
+    emit_all(manager, 3)
+    client = FakeWebSocket()
+    asyncio.run(manager.connect(client, since=3, epoch=manager.epoch))
+    assert client.frames == []
+
+
+def test_replay_other_worker_epoch_requires_resync():
+    worker_a = ConnectionManager(replay_size=100)
+    worker_b = ConnectionManager(replay_size=100)
+    emit_all(worker_a, 3)
+    emit_all(worker_b, 5)
+    client = FakeWebSocket()
+    asyncio.run(worker_b.connect(client, since=3, epoch=worker_a.epoch))
+    assert client.frames == [{"type": "resync_required", "seq": 5, "epoch": worker_b.epoch}]
+
+
+def test_replay_without_epoch_requires_resync():
+    manager = ConnectionManager(replay_size=100)
+    emit_all(manager, 3)
+    client = FakeWebSocket()
+    asyncio.run(manager.connect(client, since=1))
+    assert client.frames[0]["type"] == "resync_required"
+
+
+def test_replay_gap_older_than_buffer_requires_resync():
+    manager = ConnectionManager(replay_size=3)
+    emit_all(manager, 10)
+    client = FakeWebSocket()
+    asyncio.run(manager.connect(client, since=2, epoch=manager.epoch))
+    assert client.frames == [{"type": "resync_required", "seq": 10, "epoch": manager.epoch}]
+
+    client = FakeWebSocket()
+    asyncio.run(manager.connect(client, since=7, epoch=manager.epoch))
+    assert [f["seq"] for f in client.frames] == [8, 9, 10]
+
+
+def test_shared_counter_replays_across_workers():
+    db = MemoryDatabase()
+    worker_a = ConnectionManager(replay_size=100)
+    worker_b = ConnectionManager(replay_size=100)
+    asyncio.run(worker_a.init_replay_store(db.ws_events, db.ws_counters))
+    asyncio.run(worker_b.init_replay_store(db.ws_events, db.ws_counters))
+    assert worker_a.epoch == worker_b.epoch
+
+    emit_all(worker_a, 2)
+    emit_all(worker_b, 2, start=2)
+    emit_all(worker_a, 1, start=4)
+
+    # A client that saw seq 1 on worker A resumes on worker B with every frame since
+    client = FakeWebSocket()
+    asyncio.run(worker_b.connect(client, since=1, epoch=worker_a.epoch))
+    assert [f["seq"] for f in client.frames] == [2, 3, 4, 5]
+    assert [f["n"] for f in client.frames] == [1, 2, 3, 4]
+
+
+def test_shared_counter_survives_restart():
+    db = MemoryDatabase()
+    before = ConnectionManager(replay_size=100)
+    asyncio.run(before.init_replay_store(db.ws_events, db.ws_counters))
+    emit_all(before, 3)
+
+    after = ConnectionManager(replay_size=100)
+    asyncio.run(after.init_replay_store(db.ws_events, db.ws_counters))
+    assert (after.epoch, after.seq) == (before.epoch, 3)
+    emit_all(after, 1, start=3)
+    client = FakeWebSocket()
+    asyncio.run(after.connect(client, since=1, epoch=before.epoch))
+    assert [f["seq"] for f in client.frames] == [2, 3, 4]
+
+
+def test_shared_counter_gap_requires_resync():
+    db = MemoryDatabase()
+    manager = ConnectionManager(replay_size=100)
+    asyncio.run(manager.init_replay_store(db.ws_events, db.ws_counters))
+    emit_all(manager, 4)
+    # A frame evicted from the capped log (or not yet written by another worker)
+    asyncio.run(db.ws_events.delete_one({"seq": 3}))
+    client = FakeWebSocket()
+    asyncio.run(manager.connect(client, since=1, epoch=manager.epoch))
+    assert client.frames == [{"type": "resync_required", "seq": 4, "epoch": manager.epoch}]
+
+
+def test_coalescing_merges_per_type_and_territory_in_arrival_order():
+    manager = ConnectionManager(coalesce_ms=20)
+    client = FakeWebSocket()
+
+    def event(event_type, territory_id, n):
+        return {"type": event_type, "data": {"territoryId": territory_id, "n": n}}
+
+    async def scenario():
+        await manager.connect(client)
+        for e in (event("post_created", "t2", 0), event("pin_created", "t1", 1), event("post_created", "t1", 2),
+                  event("post_created", "t2", 3), {"type": "config_updated"}):
+            await manager.broadcast(e)
+        await asyncio.sleep(0.1)
+    asyncio.run(scenario())
+    frames = [(f["type"], f.get("territoryId", (f.get("data") or {}).get("territoryId"))) for f in client.frames]
+    assert frames == [("post_created", "t2"), ("pin_created", "t1"), ("post_created", "t1"), ("config_updated", None)]
+    assert [p["data"]["n"] for p in client.frames[0]["batch"]] == [0, 3]
+    assert client.frames[2]["data"]["n"] == 2
+    assert [f["seq"] for f in client.frames] == [1, 2, 3, 4]